@@ -0,0 +1,399 @@
+import random
+import time
+from array import array
+from typing import List, Dict, Callable, Optional
+
+import ludo_engine
+from ludo_rng import BlockDice
+from ludo_engine import (COLORS, IN_HOME, FINISHED, HOME_PATH_START, MAIN_PATH_LENGTH,
+                         PIECES_PER_PLAYER, HOME_ENTRANCE_POSITIONS, LudoEngine, MatchState)
+
+# Políticas de IA sobre el motor sin interfaz.
+# Una política recibe el motor (con el dado ya tirado) y las fichas legales,
+# y devuelve el índice de la ficha a mover: policy(engine, moves) -> int
+
+Policy = Callable[[LudoEngine, List[int]], int]
+
+
+def _build_views():
+    """Precalcula, por color y progreso, los atributos que usa Player.ai_select_piece"""
+    views = {}
+    for color in COLORS:
+        table = []
+        for progress in range(IN_HOME, FINISHED + 1):
+            square = ludo_engine.main_square(color, progress)
+            path_position = square - 1 if square else 0
+            on_home_path = progress >= HOME_PATH_START
+            home_path_position = progress - HOME_PATH_START if on_home_path else -1
+            is_safe = progress == IN_HOME or ludo_engine.is_safe_square(square)
+            table.append((path_position, on_home_path, home_path_position, is_safe))
+        views[color] = table
+    return views
+
+
+# _VIEWS[color][progreso + 1] -> (path_position, on_home_path, home_path_position, is_safe)
+_VIEWS = _build_views()
+
+
+def heuristic_policy(engine: LudoEngine, moves: List[int]) -> int:
+    """Misma heurística que Player.ai_select_piece, sobre el estado compacto"""
+    state = engine.state
+    player = state.current_player
+    color = engine.colors[player]
+    dice_value = state.dice_value
+    own = state.pieces(player)
+
+    # Prioridad 1: Sacar una ficha nueva
+    for piece in moves:
+        if own[piece] == IN_HOME:
+            return piece
+
+    # Ocupación rival por casilla, como el índice BoardOccupancy de la interfaz
+    enemy_count = [0] * (MAIN_PATH_LENGTH + 1)
+    for other, other_color in enumerate(engine.colors):
+        if other_color != color:
+            squares = ludo_engine.SQUARE_TABLES[other_color]
+            for progress in state.pieces(other):
+                enemy_count[squares[progress + 1]] += 1
+    enemy_count[0] = 0
+
+    home_entrance = HOME_ENTRANCE_POSITIONS[color]
+    views = _VIEWS[color]
+    squares = ludo_engine.SQUARE_TABLES[color]
+    moves_table = ludo_engine.MOVE_TABLES[color]
+    best_piece = None
+    best_score = -1000
+    for piece in moves:
+        progress = own[piece]
+        path_position, on_home_path, home_path_position, is_safe = views[progress + 1]
+        score = 0
+
+        # Bonus por estar cerca de la meta
+        if on_home_path:
+            score += 50 + home_path_position * 10
+        else:
+            if path_position <= home_entrance:
+                distance_to_home = home_entrance - path_position
+            else:
+                distance_to_home = (MAIN_PATH_LENGTH - path_position) + home_entrance
+            score += (MAIN_PATH_LENGTH - distance_to_home)
+
+        # Bonus por capturar oponentes en la casilla de destino
+        move = moves_table[(progress + 1) * ludo_engine.DIE_STRIDE + dice_value]
+        if move.square and not move.safe:
+            score += 100 * enemy_count[move.square]
+
+        # Penalización por tener rivales a 6 casillas o menos por detrás
+        square = squares[progress + 1]
+        if not is_safe and square:
+            for steps in range(1, 7):
+                score -= 20 * enemy_count[(square - steps - 1) % MAIN_PATH_LENGTH + 1]
+
+        if score > best_score:
+            best_score = score
+            best_piece = piece
+
+    return best_piece
+
+
+def random_policy(engine: LudoEngine, moves: List[int]) -> int:
+    """Elige una ficha legal al azar"""
+    return engine.rng.choice(moves)
+
+
+def first_policy(engine: LudoEngine, moves: List[int]) -> int:
+    """Mueve siempre la primera ficha legal"""
+    return moves[0]
+
+
+def advanced_policy(engine: LudoEngine, moves: List[int]) -> int:
+    """Mueve la ficha más adelantada"""
+    own = engine.state.pieces(engine.state.current_player)
+    return max(moves, key=lambda piece: own[piece])
+
+
+def _build_piece_values():
+    """Valor de una ficha según su progreso para evaluar posiciones"""
+    values = []
+    for progress in range(IN_HOME, FINISHED + 1):
+        if progress == IN_HOME:
+            values.append(0)
+        elif progress == FINISHED:
+            values.append(100)
+        elif progress >= HOME_PATH_START:
+            values.append(progress + 15)  # En la columna ya no puede ser capturada
+        else:
+            values.append(progress + 8)   # Haber salido de casa ya vale algo
+    return values
+
+
+# _PIECE_VALUES[progreso + 1] -> valor de la ficha
+_PIECE_VALUES = _build_piece_values()
+
+
+def evaluate(state: MatchState, player: int) -> float:
+    """Valor entre 0 y 1 de la posición para un jugador"""
+    winner = state.winner
+    if winner is not None:
+        return 1.0 if winner == player else 0.0
+    data = state.data
+    total = 0
+    mine = 0
+    for other in range(state.num_players):
+        base = other * PIECES_PER_PLAYER
+        value = 1 + sum(_PIECE_VALUES[data[base + i] + 1] for i in range(PIECES_PER_PLAYER))
+        total += value
+        if other == player:
+            mine = value
+    return mine / total
+
+
+class MonteCarloAI:
+    """IA de búsqueda: simula cada jugada con tiradas aleatorias y elige la de mejor media
+
+    Todas las jugadas candidatas se simulan con la misma secuencia de dados en
+    cada ronda, así la comparación entre ellas tiene mucha menos varianza.
+    """
+    def __init__(self, time_budget: Optional[float] = 0.05, rollouts: Optional[int] = None,
+                 depth: int = 24, rollout_policy: Optional[Policy] = None,
+                 rng: Optional[random.Random] = None):
+        self.time_budget = time_budget   # Segundos por decisión (None = sin límite de tiempo)
+        self.rollouts = rollouts         # Rondas máximas por decisión (None = sin límite)
+        self.depth = depth               # Tiradas simuladas antes de evaluar
+        self.rollout_policy = rollout_policy or heuristic_policy
+        self.rng = rng                   # None = usar el flujo de la partida (engine.rng)
+        self.last_rounds = 0
+
+    def __call__(self, engine: LudoEngine, moves: List[int]) -> int:
+        return self.select(engine, moves)
+
+    def select(self, engine: LudoEngine, moves: List[int]) -> int:
+        """Elige la ficha a mover dentro del presupuesto de tiempo o de rondas"""
+        if len(moves) == 1:
+            return moves[0]
+        player = engine.current_player
+        totals = [0.0] * len(moves)
+        deadline = time.perf_counter() + self.time_budget if self.time_budget is not None else None
+        rounds = 0
+        rng = self.rng if self.rng is not None else engine.rng
+        while True:
+            seed = rng.getrandbits(64)
+            for k, piece in enumerate(moves):
+                totals[k] += self._rollout(engine, piece, player, seed)
+            rounds += 1
+            if self.rollouts is not None and rounds >= self.rollouts:
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            if deadline is None and self.rollouts is None:
+                break
+        self.last_rounds = rounds
+        best = max(range(len(moves)), key=totals.__getitem__)
+        return moves[best]
+
+    def _rollout(self, engine: LudoEngine, piece: int, player: int, seed: int) -> float:
+        """Juega la ficha y simula self.depth tiradas; devuelve la evaluación para el jugador"""
+        # Dados pregenerados en bloque: misma secuencia para todas las jugadas candidatas
+        sim = engine.copy(dice=BlockDice(seed, self.depth + 8))
+        sim.apply_move(piece)
+        choose = self.rollout_policy
+        for _ in range(self.depth):
+            if sim.is_over:
+                break
+            sim.roll()
+            moves = sim.legal_moves()
+            if not moves:
+                sim.pass_turn()
+            else:
+                sim.apply_move(moves[0] if len(moves) == 1 else choose(sim, moves))
+        return evaluate(sim.state, player)
+
+
+class TranspositionTable:
+    """Tabla de transposición acotada con cubetas de dos entradas
+
+    La primera entrada de cada cubeta se reemplaza solo por búsquedas de igual o
+    mayor profundidad; la segunda se reemplaza siempre. Así los resultados caros
+    sobreviven y los recientes también tienen sitio.
+    """
+    ENTRY_BYTES = 8 + 8 + 1  # clave, valor y profundidad
+
+    def __init__(self, size_mb: float = 8):
+        entries = 2
+        while entries * 2 * self.ENTRY_BYTES <= size_mb * 1024 * 1024:
+            entries *= 2
+        self.size = entries
+        self.mask = entries - 2  # Índice par: primera entrada de la cubeta
+        self.keys = array("Q", bytes(8 * entries))
+        self.values = array("d", bytes(8 * entries))
+        self.depths = array("b", bytes(entries))
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.replacements = 0
+
+    @property
+    def memory_bytes(self) -> int:
+        return self.size * self.ENTRY_BYTES
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self):
+        """Vacía la tabla (los contadores se mantienen)"""
+        self.keys = array("Q", bytes(8 * self.size))
+
+    def reset_stats(self):
+        self.hits = self.misses = self.stores = self.replacements = 0
+
+    def lookup(self, key: int, depth: int) -> Optional[float]:
+        """Valor guardado para la posición si se buscó con al menos esa profundidad"""
+        key = key or 1  # La clave 0 marca una entrada vacía
+        index = key & self.mask
+        keys = self.keys
+        for slot in (index, index + 1):
+            if keys[slot] == key and self.depths[slot] >= depth:
+                self.hits += 1
+                return self.values[slot]
+        self.misses += 1
+        return None
+
+    def store(self, key: int, depth: int, value: float):
+        """Guarda el valor de una posición según la política de reemplazo"""
+        key = key or 1
+        index = key & self.mask
+        keys = self.keys
+        if keys[index] == key or keys[index] == 0 or depth >= self.depths[index]:
+            slot = index
+        else:
+            slot = index + 1
+        if keys[slot] not in (0, key):
+            self.replacements += 1
+        keys[slot] = key
+        self.values[slot] = value
+        self.depths[slot] = depth
+        self.stores += 1
+
+    def report(self) -> str:
+        return (f"TT {self.memory_bytes / 1024 / 1024:.1f} MB, {self.size} entradas: "
+                f"{self.hits} aciertos, {self.misses} fallos ({self.hit_rate:.1%}), "
+                f"{self.stores} escrituras, {self.replacements} reemplazos")
+
+
+class _SearchTimeout(Exception):
+    pass
+
+
+# Claves que distinguen el punto de vista del jugador en la tabla de transposición
+_PERSPECTIVE_KEYS = [random.Random(0x7E + player).getrandbits(64) for player in range(ludo_engine.MAX_PLAYERS)]
+
+
+class ExpectimaxAI:
+    """IA de búsqueda expectimax sobre los resultados del dado con tabla de transposición
+
+    Los rivales juegan con la heurística; las tiradas sin movimiento de varios
+    dados llevan a la misma posición y se resuelven desde la tabla.
+    """
+    def __init__(self, time_budget: Optional[float] = 0.05, max_depth: int = 6,
+                 table: Optional[TranspositionTable] = None, table_mb: float = 8):
+        self.time_budget = time_budget
+        self.max_depth = max_depth
+        self.table = table if table is not None else TranspositionTable(table_mb)
+        self.last_depth = 0
+        self._player = 0
+        self._colors = None
+        self._deadline = None
+
+    def __call__(self, engine: LudoEngine, moves: List[int]) -> int:
+        return self.select(engine, moves)
+
+    def select(self, engine: LudoEngine, moves: List[int]) -> int:
+        """Profundiza iterativamente hasta agotar el tiempo y devuelve la mejor ficha"""
+        if len(moves) == 1:
+            return moves[0]
+        if engine.colors != self._colors:
+            # El hash se basa en asientos; con otros colores las posiciones no son equivalentes
+            self.table.clear()
+            self._colors = engine.colors
+        self._player = engine.current_player
+        self._deadline = time.perf_counter() + self.time_budget if self.time_budget is not None else None
+        best = moves[0]
+        self.last_depth = 0
+        for depth in range(1, self.max_depth + 1):
+            try:
+                best = self._best_move(engine, moves, depth)
+            except _SearchTimeout:
+                break
+            self.last_depth = depth
+        return best
+
+    def _best_move(self, engine: LudoEngine, moves: List[int], depth: int) -> int:
+        best_piece = moves[0]
+        best_value = -1.0
+        for piece in moves:
+            child = engine.copy()
+            child.apply_move(piece)
+            value = self._chance_value(child, depth - 1)
+            if value > best_value:
+                best_value = value
+                best_piece = piece
+        return best_piece
+
+    def _chance_value(self, engine: LudoEngine, depth: int) -> float:
+        """Valor esperado (para el jugador que busca) antes de la siguiente tirada"""
+        if depth == 0 or engine.is_over:
+            return evaluate(engine.state, self._player)
+        if self._deadline is not None and time.perf_counter() >= self._deadline:
+            raise _SearchTimeout()
+
+        key = engine.hash ^ _PERSPECTIVE_KEYS[self._player]
+        cached = self.table.lookup(key, depth)
+        if cached is not None:
+            return cached
+
+        total = 0.0
+        for dice_value in range(1, 7):
+            child = engine.copy()
+            child.roll(dice_value)
+            moves = child.legal_moves()
+            if not moves:
+                child.pass_turn()
+                total += self._chance_value(child, depth - 1)
+            elif child.current_player == self._player:
+                best = 0.0
+                for piece in moves:
+                    option = child.copy()
+                    option.apply_move(piece)
+                    best = max(best, self._chance_value(option, depth - 1))
+                total += best
+            else:
+                child.apply_move(moves[0] if len(moves) == 1 else heuristic_policy(child, moves))
+                total += self._chance_value(child, depth - 1)
+
+        value = total / 6
+        self.table.store(key, depth, value)
+        return value
+
+
+POLICIES: Dict[str, Policy] = {
+    "heuristic": heuristic_policy,
+    "random": random_policy,
+    "first": first_policy,
+    "advanced": advanced_policy,
+    "montecarlo": MonteCarloAI(time_budget=0.05),
+    "expectimax": ExpectimaxAI(time_budget=0.05),
+}
+
+
+def get_policy(name: str) -> Policy:
+    """Busca una política por nombre ("montecarlo:20" usa 20 ms por decisión)"""
+    if name.startswith("montecarlo:"):
+        return MonteCarloAI(time_budget=float(name.split(":", 1)[1]) / 1000)
+    if name.startswith("expectimax:"):
+        return ExpectimaxAI(time_budget=float(name.split(":", 1)[1]) / 1000)
+    try:
+        return POLICIES[name]
+    except KeyError:
+        raise ValueError(f"Política desconocida: {name} (disponibles: {', '.join(sorted(POLICIES))})")
@@ -0,0 +1,118 @@
+import asyncio
+import multiprocessing
+import os
+import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional
+
+import ludo_ai
+from ludo_engine import LudoEngine, MatchState
+
+# Decisiones de la IA en procesos aparte para que el bucle del servidor no se
+# pare mientras busca. Cada decisión tiene un plazo: si el pool no responde a
+# tiempo, o ya tiene demasiadas pendientes, se decide con la heurística en el
+# acto. Las decisiones canceladas que aún no empezaron no llegan a ejecutarse.
+
+AI_DEADLINE = 0.25  # Segundos máximos por decisión, incluida la espera en la cola del pool
+                    # (el presupuesto de la política, p. ej. "montecarlo:50", debe ser menor)
+
+_policy: Optional[ludo_ai.Policy] = None  # Política de cada proceso del pool
+
+
+def _init_worker(policy: str, parent: int):
+    global _policy
+    _policy = ludo_ai.get_policy(policy)
+    threading.Thread(target=_watch_parent, args=(parent,), name="ludo-aipool-parent", daemon=True).start()
+
+
+def _watch_parent(parent: int):
+    """Si el servidor muere sin cerrar el pool (SIGTERM, SIGKILL) el proceso no queda huérfano"""
+    while os.getppid() == parent:
+        time.sleep(1.0)
+    os._exit(0)
+
+
+def _decide(colors: List[str], raw_state: bytes, moves: List[int], seed: int, deadline: float) -> Optional[int]:
+    """Se ejecuta en un proceso del pool; None si la decisión ya venció al salir de la cola"""
+    if time.time() >= deadline:
+        return None
+    engine = LudoEngine(colors, random.Random(seed), MatchState.from_bytes(raw_state))
+    return _policy(engine, moves)
+
+
+class AIPool:
+    """Procesos que eligen jugadas con una política cara (montecarlo, expectimax)"""
+    def __init__(self, policy: str, workers: int, deadline: float = AI_DEADLINE,
+                 max_pending: Optional[int] = None, fallback: ludo_ai.Policy = ludo_ai.heuristic_policy):
+        ludo_ai.get_policy(policy)  # Nombre desconocido: error aquí y no en cada proceso
+        self.policy = policy
+        self.deadline = deadline
+        self.max_pending = max_pending if max_pending is not None else 2 * workers
+        self.fallback = fallback
+        # "spawn": los procesos no heredan el bucle ni los sockets del servidor
+        self.executor = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"),
+                                            initializer=_init_worker, initargs=(policy, os.getpid()))
+        self.pending = 0         # Decisiones enviadas que aún ocupan el pool
+        self.decisions = 0       # Resueltas por el pool a tiempo
+        self.overloaded = 0      # Resueltas con la heurística porque el pool estaba lleno
+        self.late = 0            # Resueltas con la heurística porque venció el plazo
+        self.cancelled = 0
+        self.failed = 0
+
+    async def decide(self, engine: LudoEngine, moves: List[int]) -> int:
+        """Elige una de las fichas de moves; como mucho tarda el plazo de la decisión"""
+        if self.pending >= self.max_pending:
+            self.overloaded += 1
+            return self.fallback(engine, moves)
+        loop = asyncio.get_running_loop()
+        due = time.time() + self.deadline
+        try:
+            future = self.executor.submit(_decide, engine.colors, engine.state.to_bytes(), list(moves),
+                                          engine.rng.getrandbits(64), due)
+        except (BrokenProcessPool, RuntimeError):
+            self.failed += 1
+            return self.fallback(engine, moves)
+        self.pending += 1
+        # Libera el hueco cuando el proceso termina de verdad, no cuando se deja de esperar
+        future.add_done_callback(lambda _: self._finished_soon(loop))
+        try:
+            piece = await asyncio.wait_for(asyncio.wrap_future(future), self.deadline)
+        except asyncio.TimeoutError:
+            piece = None  # wait_for cancela la decisión si aún no había empezado
+        except asyncio.CancelledError:
+            future.cancel()
+            self.cancelled += 1
+            raise
+        except BrokenProcessPool:
+            self.failed += 1
+            return self.fallback(engine, moves)
+        if piece is None:
+            self.late += 1
+            return self.fallback(engine, moves)
+        self.decisions += 1
+        return piece
+
+    def _finished_soon(self, loop: asyncio.AbstractEventLoop):
+        """Callback del hilo del pool: la cuenta se actualiza en el bucle"""
+        try:
+            loop.call_soon_threadsafe(self._finished)
+        except RuntimeError:
+            pass  # El bucle ya terminó
+
+    def _finished(self):
+        self.pending -= 1
+
+    def stats(self) -> dict:
+        return {"ai_decisions": self.decisions, "ai_overloaded": self.overloaded, "ai_late": self.late,
+                "ai_cancelled": self.cancelled, "ai_failed": self.failed, "ai_pending": self.pending}
+
+    def shutdown(self):
+        """Descarta lo que está en cola y espera a la decisión en curso (como mucho su presupuesto)
+
+        Sin esperar, un proceso que termina su bucle normalmente puede quedarse al salir
+        esperando a un hijo que nunca recibe la orden de terminar.
+        """
+        self.executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,118 @@
+import os
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import pygame
+
+# Imágenes del juego compartidas por todo el proceso. Cada archivo se lee del
+# disco una sola vez y se convierte al formato de la pantalla; cada tamaño que
+# se pide se escala una sola vez. Las fichas y el dado reciben la misma
+# superficie en vez de guardar cada uno su copia, así que no se deben
+# modificar: quien necesite cambiarlas tiene que hacer una copia.
+
+ICONS_DIR = "Icons"
+ATLAS_WIDTH = 1024  # Ancho máximo de una fila del atlas
+
+Size = Tuple[int, int]
+
+
+def to_display_format(surface: pygame.Surface) -> pygame.Surface:
+    """Convierte al formato de la pantalla (sin ventana abierta no se puede y se deja igual)"""
+    if pygame.display.get_surface() is None:
+        return surface
+    if surface.get_masks()[3] or surface.get_colorkey() is not None:
+        return surface.convert_alpha()
+    return surface.convert()  # Sin transparencia la copia es más rápida
+
+
+class AssetManager:
+    """Imágenes cargadas una vez por proceso, con sus versiones escaladas por tamaño"""
+    def __init__(self, root: str = ICONS_DIR):
+        self.root = root
+        self.originals: Dict[str, Optional[pygame.Surface]] = {}  # None: no se pudo cargar
+        self.variants: Dict[Tuple[str, Size], pygame.Surface] = {}
+        self.atlas: Optional[pygame.Surface] = None
+        self.loads = 0      # Archivos leídos del disco
+        self.scales = 0     # Versiones escaladas creadas
+        self.hits = 0       # Peticiones servidas sin leer ni escalar
+
+    def image(self, name: str) -> Optional[pygame.Surface]:
+        """La imagen name de la carpeta de iconos, convertida; None si no existe o no se puede leer"""
+        if name not in self.originals:
+            try:
+                surface = pygame.image.load(os.path.join(self.root, name))
+            except (pygame.error, OSError):
+                surface = None
+            else:
+                self.loads += 1
+                surface = to_display_format(surface)
+            self.originals[name] = surface
+        return self.originals[name]
+
+    def scaled(self, name: str, size: Size,
+               fallback: Optional[Callable[[], pygame.Surface]] = None) -> pygame.Surface:
+        """La imagen name escalada a size; si no se puede cargar, la que dibuje fallback()
+
+        El resultado, también el de fallback, se guarda y se comparte con las
+        siguientes peticiones del mismo nombre y tamaño.
+        """
+        key = (name, tuple(size))
+        surface = self.variants.get(key)
+        if surface is not None:
+            self.hits += 1
+            return surface
+        original = self.image(name)
+        if original is not None:
+            surface = pygame.transform.scale(original, key[1])
+        elif fallback is not None:
+            surface = fallback()
+        else:
+            raise FileNotFoundError(os.path.join(self.root, name))
+        self.scales += 1
+        surface = to_display_format(surface)
+        self.variants[key] = surface
+        return surface
+
+    def pack_atlas(self, entries: Iterable[Tuple[str, Size]]) -> pygame.Surface:
+        """Junta en una sola superficie las versiones ya pedidas de entries
+
+        A partir de aquí scaled() devuelve trozos (subsurface) del atlas en vez
+        de superficies sueltas. Solo entran las imágenes con alfa por píxel (el
+        atlas lo tiene; una opaca se copia más rápido suelta). Lo que se pida
+        después sigue yendo suelto.
+        """
+        entries = [(name, tuple(size)) for name, size in entries]
+        entries = [key for key in dict.fromkeys(entries)
+                   if key in self.variants and self.variants[key].get_masks()[3]]
+        if self.atlas is not None and all(self.variants[key].get_parent() is self.atlas for key in entries):
+            return self.atlas  # Ya estaban todas juntas
+        placements: List[Tuple[Tuple[str, Size], int, int]] = []
+        x = y = row_height = width = 0
+        for key in entries:
+            w, h = key[1]
+            if x and x + w > ATLAS_WIDTH:  # Fila llena: empezar otra debajo
+                x, y, row_height = 0, y + row_height, 0
+            placements.append((key, x, y))
+            x += w
+            row_height = max(row_height, h)
+            width = max(width, x)
+        atlas = pygame.Surface((max(width, 1), max(y + row_height, 1)), pygame.SRCALPHA)
+        atlas = to_display_format(atlas)
+        atlas.fill((0, 0, 0, 0))
+        for key, x, y in placements:
+            atlas.blit(self.variants[key], (x, y))
+        for key, x, y in placements:
+            self.variants[key] = atlas.subsurface(pygame.Rect((x, y), key[1]))
+        self.atlas = atlas
+        return atlas
+
+    def clear(self):
+        """Olvida las imágenes cargadas; las siguientes peticiones vuelven a leer del disco"""
+        self.originals.clear()
+        self.variants.clear()
+        self.atlas = None
+
+    def stats(self) -> dict:
+        return {"asset_loads": self.loads, "asset_scales": self.scales, "asset_hits": self.hits}
+
+
+ASSETS = AssetManager()  # Compartido por todo el proceso
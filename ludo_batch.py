@@ -0,0 +1,291 @@
+import argparse
+import random
+import time
+from typing import List, Optional, NamedTuple
+
+import numpy as np
+
+import ludo_engine
+from ludo_engine import (COLORS, PIECES_PER_PLAYER, IN_HOME, FINISHED, HOME_PATH_START,
+                         MAIN_PATH_LENGTH, MAX_CONSECUTIVE_SIXES, SAFE_POSITIONS)
+
+# Simulador por lotes: N partidas en paralelo como arrays de NumPy.
+# Usa las mismas tablas de movimiento que ludo_engine, así que las reglas
+# (salida con 6, camino de 68 casillas, columna de 8, casillas seguras,
+# capturas y tres 6 seguidos) son exactamente las del motor escalar.
+
+ILLEGAL = -2
+
+# ADVANCE[progreso + 1, dado] -> progreso destino o ILLEGAL
+ADVANCE = np.array([ILLEGAL if end is None else end for end in ludo_engine.ADVANCE_TABLE],
+                   dtype=np.int16).reshape(-1, ludo_engine.DIE_STRIDE)
+# SQUARES[color, progreso + 1] -> casilla del camino principal (0 si no está en él)
+SQUARES = np.array([ludo_engine.SQUARE_TABLES[color] for color in COLORS], dtype=np.int16)
+# SAFE[casilla] -> casilla segura
+SAFE = np.zeros(MAIN_PATH_LENGTH + 1, dtype=bool)
+SAFE[SAFE_POSITIONS] = True
+
+
+class BatchResult(NamedTuple):
+    """Resultado de cada partida del lote"""
+    winners: np.ndarray    # Asiento ganador de cada partida
+    turns: np.ndarray      # Cambios de turno hasta terminar (como LudoEngine.turn_count)
+    rolls: np.ndarray      # Tiradas de dado de cada partida
+    progress: np.ndarray   # Progreso final (partidas, jugadores, fichas)
+    seconds: float
+
+
+class MoveContext(NamedTuple):
+    """Información que reciben las políticas vectorizadas"""
+    games: np.ndarray        # Índices de las partidas que eligen ficha
+    seats: np.ndarray        # Asiento que mueve en cada una
+    progress: np.ndarray     # (n, 4) progreso actual de sus fichas
+    destination: np.ndarray  # (n, 4) progreso destino o ILLEGAL
+    legal: np.ndarray        # (n, 4) fichas que pueden moverse
+    squares: np.ndarray      # (n, 4) casilla actual de cada ficha
+    dest_squares: np.ndarray # (n, 4) casilla destino de cada ficha
+    enemy_squares: np.ndarray  # (n, jugadores * 4) casillas de las fichas rivales (0 = fuera)
+    rng: np.random.Generator
+
+
+def first_policy(ctx: MoveContext) -> np.ndarray:
+    """Mueve la primera ficha legal (igual que LudoEngine.play_turn sin elección)"""
+    return np.argmax(ctx.legal, axis=1)
+
+
+def random_policy(ctx: MoveContext) -> np.ndarray:
+    """Elige una ficha legal al azar"""
+    noise = ctx.rng.random(ctx.legal.shape)
+    return np.argmax(np.where(ctx.legal, noise, -1.0), axis=1)
+
+
+def heuristic_policy(ctx: MoveContext) -> np.ndarray:
+    """Versión vectorizada de las prioridades de Player.ai_select_piece"""
+    progress = ctx.progress
+    # Cercanía a la meta
+    score = np.where(progress >= HOME_PATH_START,
+                     50 + (progress - HOME_PATH_START) * 10,
+                     progress + (MAIN_PATH_LENGTH - HOME_PATH_START)).astype(np.int32)
+
+    # Bonus por capturar oponentes en la casilla destino
+    dest = ctx.dest_squares
+    capturable = (dest > 0) & ~SAFE[dest]
+    hits = (ctx.enemy_squares[:, None, :] == dest[:, :, None]).sum(axis=2)
+    score += np.where(capturable, hits * 100, 0)
+
+    # Penalización por tener rivales entre 1 y 6 casillas por detrás
+    here = ctx.squares
+    behind = (here[:, :, None] - ctx.enemy_squares[:, None, :]) % MAIN_PATH_LENGTH
+    threats = ((behind >= 1) & (behind <= 6) & (ctx.enemy_squares[:, None, :] > 0)).sum(axis=2)
+    score -= np.where((here > 0) & ~SAFE[here], threats * 20, 0)
+
+    # Sacar una ficha nueva tiene prioridad absoluta
+    score = np.where(progress == IN_HOME, 10000, score)
+    return np.argmax(np.where(ctx.legal, score, np.iinfo(np.int32).min), axis=1)
+
+
+POLICIES = {
+    "first": first_policy,
+    "random": random_policy,
+    "heuristic": heuristic_policy,
+}
+
+
+class BatchSimulator:
+    """Juega muchas partidas a la vez con operaciones vectorizadas"""
+    def __init__(self, num_games: int, num_players: int = 4, policies=None,
+                 seed: Optional[int] = None, max_rolls: int = 100000):
+        self.num_games = num_games
+        self.num_players = num_players
+        self.colors = COLORS[:num_players]
+        policies = policies or ["heuristic"]
+        # Una política por asiento (si se pasa una sola, la usan todos)
+        self.policies = [POLICIES[p] if isinstance(p, str) else p
+                         for p in (policies * num_players)[:num_players]]
+        self.rng = np.random.default_rng(seed)
+        self.max_rolls = max_rolls
+        self.seat_squares = SQUARES[:num_players]
+        self.dice_log = None   # Si es una lista, run() guarda aquí (partidas, dados) de cada tirada
+        self.move_log = None   # Si es una lista, step() guarda aquí (partidas, ficha elegida)
+
+        self.progress = np.full((num_games, num_players, PIECES_PER_PLAYER), IN_HOME, dtype=np.int16)
+        self.current = np.zeros(num_games, dtype=np.int8)
+        self.sixes = np.zeros(num_games, dtype=np.int8)
+        self.winners = np.full(num_games, -1, dtype=np.int8)
+        self.turns = np.zeros(num_games, dtype=np.int32)
+        self.rolls = np.zeros(num_games, dtype=np.int32)
+
+    def _board_squares(self, games: np.ndarray) -> np.ndarray:
+        """(n, jugadores, 4) casilla de cada ficha en las partidas indicadas"""
+        seats = np.arange(self.num_players)[None, :, None]
+        return self.seat_squares[seats, self.progress[games] + 1]
+
+    def _next_turn(self, games: np.ndarray):
+        self.turns[games] += 1
+        self.current[games] = (self.current[games] + 1) % self.num_players
+        self.sixes[games] = 0
+
+    def step(self, games: np.ndarray, dice: Optional[np.ndarray] = None):
+        """Juega una tirada en cada una de las partidas indicadas"""
+        n = len(games)
+        if dice is None:
+            dice = self.rng.integers(1, 7, size=n, dtype=np.int16)
+        self.rolls[games] += 1
+        seats = self.current[games].astype(np.intp)
+        own = self.progress[games, seats]                      # (n, 4)
+        destination = ADVANCE[own + 1, dice[:, None]]          # (n, 4)
+        legal = destination != ILLEGAL
+        can_play = legal.any(axis=1)
+
+        # Sin movimientos: con un 6 se vuelve a tirar, si no pasa el turno
+        stuck = ~can_play
+        self._next_turn(games[stuck & (dice != 6)])
+
+        if not can_play.any():
+            return
+        games, seats, dice = games[can_play], seats[can_play], dice[can_play]
+        own, destination, legal = own[can_play], destination[can_play], legal[can_play]
+
+        # Elegir ficha según la política de cada asiento
+        board = self._board_squares(games)                     # (n, jugadores, 4)
+        enemy = board.copy()
+        enemy[np.arange(len(games)), seats] = 0
+        enemy = enemy.reshape(len(games), -1)
+        squares = board[np.arange(len(games)), seats]
+        seat_table = self.seat_squares[seats]
+        dest_squares = np.take_along_axis(seat_table, np.where(legal, destination, IN_HOME) + 1, axis=1)
+        dest_squares = np.where(legal, dest_squares, 0)
+        choice = np.zeros(len(games), dtype=np.intp)
+        for seat, policy in enumerate(self.policies):
+            mine = seats == seat
+            if not mine.any():
+                continue
+            ctx = MoveContext(games[mine], seats[mine], own[mine], destination[mine], legal[mine],
+                              squares[mine], dest_squares[mine], enemy[mine], self.rng)
+            choice[mine] = policy(ctx)
+        if self.move_log is not None:
+            self.move_log.append((games, choice.copy()))
+
+        rows = np.arange(len(games))
+        end = destination[rows, choice]
+        self.progress[games, seats, choice] = end
+
+        # Capturas: fichas rivales en la misma casilla no segura
+        landing = dest_squares[rows, choice]
+        hit = (landing > 0) & ~SAFE[landing]
+        if hit.any():
+            hg = games[hit]
+            victims = (board[hit] == landing[hit, None, None])
+            victims[np.arange(len(hg)), seats[hit]] = False
+            sub = self.progress[hg]
+            sub[victims] = IN_HOME
+            self.progress[hg] = sub
+
+        # Victoria
+        won = (end == FINISHED) & (self.progress[games, seats] == FINISHED).all(axis=1)
+        self.winners[games[won]] = seats[won]
+
+        # Regla de los tres 6
+        alive = ~won
+        six = alive & (dice == 6)
+        self.sixes[games[six]] += 1
+        lost = six & (self.sixes[games] >= MAX_CONSECUTIVE_SIXES)
+        self._next_turn(games[(alive & (dice != 6)) | lost])
+
+    def run(self) -> BatchResult:
+        """Juega todas las partidas hasta que termine cada una"""
+        start = time.perf_counter()
+        record = self.dice_log is not None
+        for _ in range(self.max_rolls):
+            games = np.flatnonzero(self.winners < 0)
+            if len(games) == 0:
+                break
+            dice = self.rng.integers(1, 7, size=len(games), dtype=np.int16)
+            if record:
+                self.dice_log.append((games, dice))
+            self.step(games, dice)
+        return BatchResult(self.winners.copy(), self.turns.copy(), self.rolls.copy(),
+                           self.progress.copy(), time.perf_counter() - start)
+
+
+def simulate(num_games: int, num_players: int = 4, policies=None, seed: Optional[int] = None) -> BatchResult:
+    """Atajo para jugar un lote de partidas"""
+    return BatchSimulator(num_games, num_players, policies, seed).run()
+
+
+def validate_against_engine(num_games: int = 200, num_players: int = 4, seed: int = 0,
+                            policies=None) -> List[int]:
+    """Repite las partidas del lote en LudoEngine con los mismos dados y devuelve las que difieren
+
+    Las políticas se usan como en BatchSimulator; el motor mueve la misma
+    ficha que eligió cada una, así que se comprueban las reglas del lote con
+    las jugadas que hace cada política.
+    """
+    sim = BatchSimulator(num_games, num_players, policies or ["first"], seed)
+    sim.dice_log = []
+    sim.move_log = []
+    result = sim.run()
+
+    dice_per_game = [[] for _ in range(num_games)]
+    for games, dice in sim.dice_log:
+        for game, value in zip(games.tolist(), dice.tolist()):
+            dice_per_game[game].append(value)
+    moves_per_game = [[] for _ in range(num_games)]
+    for games, choice in sim.move_log:
+        for game, piece in zip(games.tolist(), choice.tolist()):
+            moves_per_game[game].append(piece)
+
+    mismatches = []
+    for game in range(num_games):
+        engine = ludo_engine.LudoEngine(COLORS[:num_players])
+        chosen = iter(moves_per_game[game])
+        for value in dice_per_game[game]:
+            engine.roll(value)
+            moves = engine.legal_moves()
+            if moves:
+                piece = next(chosen, None)
+                if piece not in moves:  # El lote movió otra cosa o no pudo mover
+                    break
+                engine.apply_move(piece)
+            else:
+                engine.pass_turn()
+        final = [list(engine.state.pieces(p)) for p in range(num_players)]
+        if (engine.winner != result.winners[game] or engine.turn_count != result.turns[game]
+                or final != result.progress[game].tolist()):
+            mismatches.append(game)
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulación de partidas de Ludo por lotes")
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--players", type=int, default=4, choices=[2, 3, 4])
+    parser.add_argument("--policies", nargs="+", default=["heuristic"], choices=sorted(POLICIES))
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--validate", type=int, default=0, metavar="N",
+                        help="comparar N partidas contra el motor escalar")
+    args = parser.parse_args()
+
+    if args.validate:
+        seed = args.seed if args.seed is not None else random.randrange(2**31)
+        failed = False
+        for policy in dict.fromkeys(args.policies):
+            mismatches = validate_against_engine(args.validate, args.players, seed, [policy])
+            print(f"Validación ({policy}): {args.validate - len(mismatches)}/{args.validate} partidas idénticas")
+            if mismatches:
+                print(f"Partidas distintas: {mismatches[:20]}")
+                failed = True
+        if failed:
+            raise SystemExit(1)
+
+    result = simulate(args.games, args.players, args.policies, args.seed)
+    wins = np.bincount(result.winners[result.winners >= 0], minlength=args.players)
+    print(f"{args.games} partidas en {result.seconds:.2f} s ({args.games / result.seconds:.0f} partidas/s)")
+    print(f"Tiradas medias por partida: {result.rolls.mean():.1f}")
+    for seat in range(args.players):
+        policy = args.policies[seat % len(args.policies)]
+        print(f"  {COLORS[seat]:<7} ({policy}): {wins[seat] / args.games:.1%}")
+
+
+if __name__ == "__main__":
+    main()
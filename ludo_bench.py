@@ -0,0 +1,247 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import timeit
+from typing import Callable, Dict, List, Optional
+
+# Microbenchmarks de las rutas críticas de reglas, IA y dibujo.
+# Usa el driver de video "dummy" de SDL, así que funciona sin pantalla.
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+
+import ludo_ai
+import ludo_assets
+import ludo_engine
+import ludo_game_improved as ludo
+import ludo_protocol
+
+
+def measure(func: Callable[[], None], repeat: int = 5, min_time: float = 0.2) -> Dict[str, float]:
+    """Mide una función; devuelve nanosegundos por llamada (mediana y mejor de las repeticiones)"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    runs = [t / number * 1e9 for t in timer.repeat(repeat=repeat, number=number)]
+    return {"ns_per_op": statistics.median(runs), "best_ns": min(runs), "number": number}
+
+
+class BenchContext:
+    """Partida a mitad de juego sobre la que se miden las funciones"""
+    def __init__(self, seed: int = 1234, turns: int = 120):
+        self.game = ludo.LudoGame()
+        self.game.start_game(4)
+        self.game.messages = []
+
+        # Llevar la partida a una posición con fichas repartidas por el tablero
+        engine = ludo_engine.LudoEngine(ludo_engine.COLORS, random.Random(seed))
+        for _ in range(turns):
+            engine.play_turn(ludo_ai.heuristic_policy)
+        engine.state.apply_to_players(self.game.players)
+        self.game.current_player_index = engine.current_player
+        self.engine = engine
+
+        self.player = self.game.players[self.game.current_player_index]
+        self.dice_value = 6
+        self.game.dice.value = self.dice_value
+        on_board = [p for p in self.player.pieces if not p.is_home and not p.has_finished]
+        self.piece = on_board[0] if on_board else self.player.pieces[0]
+        self.start_progress = self.piece.progress
+
+
+def build_benchmarks(ctx: BenchContext) -> Dict[str, Callable[[], None]]:
+    """Funciones a medir, por nombre"""
+    game, player, piece, dice_value = ctx.game, ctx.player, ctx.piece, ctx.dice_value
+    start = ctx.start_progress
+    steps = 1 if piece.can_move(1) else dice_value
+
+    def piece_move():
+        # Incluye devolver la ficha a su sitio para repetir la misma jugada
+        piece.move(steps)
+        piece.set_progress(start)
+
+    def ai_select_piece():
+        player.ai_select_piece(player.get_movable_pieces(dice_value), game.players, dice_value)
+
+    def board_paths():
+        ludo.generate_board_path()
+        ludo.generate_home_paths()
+
+    def draw_frame():
+        # Repintado completo, como el primer frame tras cambiar de pantalla
+        game.scene = None
+        game.draw()
+
+    def draw_frame_idle():
+        # Nada cambió desde el frame anterior
+        game.draw()
+
+    def draw_frame_rolling():
+        # Un frame de la animación del dado: solo cambia la zona del dado
+        dice = game.dice
+        game.state = ludo.GameState.ROLLING_DICE
+        dice.rolling = dice.hold = True
+        dice.rect.center = (ludo.WINDOW_WIDTH // 2, ludo.WINDOW_HEIGHT // 2)
+        dice.update()
+        game.draw()
+        dice.rolling = dice.hold = False
+        game.state = ludo.GameState.PLAYING
+
+    pieces = [p for pl in game.players for p in pl.pieces]
+
+    def draw_pieces():
+        for p in pieces:
+            p.draw(game.screen)
+
+    window_size = game.screen.get_size()
+
+    def relayout_cached():
+        # Cambiar a un tamaño ya usado y volver: tablero, caminos e imágenes salen de las cachés
+        game.relayout(1280, 800)
+        game.relayout(*window_size)
+
+    def draw_game_over():
+        # Solo la capa de fin de juego, sin la partida de debajo
+        game.winner = player
+        game.draw_game_over()
+
+    engine = ctx.engine
+    engine.roll(dice_value)
+    moves = engine.legal_moves()
+
+    def engine_apply_move():
+        sim = engine.copy()
+        sim.apply_move(moves[0])
+
+    benchmarks = {
+        "piece.can_move": lambda: piece.can_move(dice_value),
+        "piece.move": piece_move,
+        "player.get_movable_pieces": lambda: player.get_movable_pieces(dice_value),
+        "player.ai_select_piece": ai_select_piece,
+        "game.check_captures": lambda: game.check_captures(piece),
+        "generate_board_path+home_paths": board_paths,
+        "board._create_detailed_board": game.board._create_detailed_board,
+        "game.draw_frame": draw_frame,
+        "game.draw_frame(idle)": draw_frame_idle,
+        "game.draw_frame(rolling)": draw_frame_rolling,
+        "game.draw_menu": game.draw_menu,
+        "game.relayout(cached x2)": relayout_cached,
+        "player.__init__(4 pieces)": lambda: ludo.Player("Jugador", "red"),
+        "pieces.draw(16)": draw_pieces,
+        "text_cache.render(hit)": lambda: game.text_cache.render(game.menu_font, "Dado: 6", True, ludo.BLACK),
+        "font.render(uncached)": lambda: game.menu_font.render("Dado: 6", True, ludo.BLACK),
+        "game.draw_game_over": draw_game_over,
+        "engine.copy": engine.copy,
+        "engine.legal_moves": engine.legal_moves,
+        "engine.zobrist_hash": lambda: ludo_engine.zobrist_hash(engine.state),
+    }
+    # Protocolo de red: codificar y decodificar los mensajes más frecuentes
+    state = engine.state
+    moved = ludo_protocol.encode_moved(0, 1, 30, False)
+    snapshot = ludo_protocol.encode_snapshot(1, 0, state)
+    stream = ludo_protocol.encode_rolled(0, 6, [0, 1]) + moved + ludo_protocol.encode_turn(1)
+    frames = ludo_protocol.FrameReader()
+    benchmarks.update({
+        "protocol.encode_moved": lambda: ludo_protocol.encode_moved(0, 1, 30, False),
+        "protocol.decode_moved": lambda: ludo_protocol.decode(moved, 2, len(moved) - 2),
+        "protocol.encode_snapshot": lambda: ludo_protocol.encode_snapshot(1, 0, state),
+        "protocol.decode_snapshot": lambda: ludo_protocol.decode(snapshot, 2, len(snapshot) - 2),
+        "protocol.encode_delta": lambda: ludo_protocol.encode_delta(state, [0, 5]),
+        "protocol.frame_reader(3 msgs)": lambda: frames.feed(stream),
+    })
+    if moves:
+        benchmarks["engine.copy+apply_move"] = engine_apply_move
+        benchmarks["ai.heuristic_policy"] = lambda: ludo_ai.heuristic_policy(engine, moves)
+    return benchmarks
+
+
+def run(selected: Optional[List[str]] = None, repeat: int = 5, min_time: float = 0.2) -> dict:
+    """Ejecuta los benchmarks y devuelve el informe en formato JSON"""
+    ctx = BenchContext()
+    benchmarks = build_benchmarks(ctx)
+    results = {}
+    for name, func in benchmarks.items():
+        if selected and not any(pattern in name for pattern in selected):
+            continue
+        results[name] = measure(func, repeat, min_time)
+        print(f"{name:<34} {format_ns(results[name]['ns_per_op']):>12}", file=sys.stderr)
+    return {
+        "text_cache": ctx.game.text_cache.stats(),
+        "assets": ludo_assets.ASSETS.stats(),
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "video_driver": os.environ.get("SDL_VIDEODRIVER"),
+        },
+        "results": results,
+    }
+
+
+def format_ns(ns: float) -> str:
+    if ns >= 1e6:
+        return f"{ns / 1e6:.2f} ms"
+    if ns >= 1e3:
+        return f"{ns / 1e3:.2f} µs"
+    return f"{ns:.0f} ns"
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> int:
+    """Muestra la diferencia con una ejecución guardada; devuelve el número de regresiones
+
+    Se compara el mejor tiempo de cada benchmark, que es el menos sensible al ruido de la máquina.
+    """
+    regressions = 0
+    print(f"{'Benchmark':<34} {'Base':>12} {'Actual':>12} {'Cambio':>9}")
+    for name, result in current["results"].items():
+        old = baseline["results"].get(name)
+        if old is None:
+            print(f"{name:<34} {'-':>12} {format_ns(result['best_ns']):>12} {'nuevo':>9}")
+            continue
+        ratio = result["best_ns"] / old["best_ns"]
+        mark = ""
+        if ratio > 1 + threshold:
+            mark = "  REGRESIÓN"
+            regressions += 1
+        elif ratio < 1 - threshold:
+            mark = "  mejora"
+        print(f"{name:<34} {format_ns(old['best_ns']):>12} {format_ns(result['best_ns']):>12} "
+              f"{ratio - 1:>+8.1%}{mark}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks de reglas, IA y dibujo")
+    parser.add_argument("--output", "-o", help="guardar los resultados en un archivo JSON")
+    parser.add_argument("--compare", "-c", metavar="BASE", help="comparar con un JSON guardado")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="cambio relativo que cuenta como regresión (por defecto 0.10)")
+    parser.add_argument("--filter", "-k", nargs="+", help="medir solo los benchmarks que contengan estos textos")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="segundos por repetición")
+    args = parser.parse_args()
+
+    report = run(args.filter, args.repeat, args.min_time)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold):
+            sys.exit(1)
+    elif not args.output:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import asyncio
+import queue
+import threading
+from typing import Optional
+
+import pygame
+
+import ludo_protocol as proto
+
+# Conexión de la interfaz con el servidor de partidas.
+# Un hilo en segundo plano con su propio bucle de asyncio es dueño del socket:
+# los mensajes recibidos se publican en la cola de eventos de pygame y los que
+# se envían pasan por una cola que no bloquea nunca el bucle principal.
+
+# Todos los eventos llevan event.client para descartar los de una conexión ya cerrada
+NETWORK_EVENT = pygame.USEREVENT + 2    # event.message: tupla decodificada del protocolo
+CONNECTION_EVENT = pygame.USEREVENT + 3  # event.connected, event.error
+CONNECT_TIMEOUT = 5.0
+READ_SIZE = 64 * 1024
+
+
+def post_event(event_type: int, **attributes):
+    """Publica un evento en la cola de pygame (se puede llamar desde cualquier hilo)"""
+    try:
+        pygame.event.post(pygame.event.Event(event_type, **attributes))
+    except pygame.error:
+        pass  # Cola llena o pygame cerrado: el evento se pierde igual que un frame
+
+
+class NetworkClient:
+    """Socket del cliente atendido por un hilo propio"""
+    def __init__(self, host: str, port: int, post=post_event):
+        self.host = host
+        self.port = port
+        self.post = post
+        self.connected = False
+        self._outgoing: "queue.SimpleQueue[bytes]" = queue.SimpleQueue()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread = threading.Thread(target=self._run, name="ludo-network", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def send(self, frame: bytes):
+        """Encola una trama para enviarla; vuelve en el acto aunque el servidor no responda"""
+        self._outgoing.put(frame)
+        loop = self._loop
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(self._wake.set)
+            except RuntimeError:
+                pass  # El bucle ya terminó
+
+    def close(self):
+        loop = self._loop
+        if loop is not None and self._task is not None:
+            try:
+                loop.call_soon_threadsafe(self._task.cancel)
+            except RuntimeError:
+                pass
+        self._thread.join(timeout=1.0)
+
+    def _run(self):
+        asyncio.run(self._main())
+
+    async def _main(self):
+        self._task = asyncio.current_task()
+        self._wake = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port),
+                                                    CONNECT_TIMEOUT)
+        except (OSError, asyncio.TimeoutError) as e:
+            self.post(CONNECTION_EVENT, client=self, connected=False, error=str(e) or "tiempo de espera agotado")
+            return
+        except asyncio.CancelledError:
+            return
+        self.connected = True
+        self.post(CONNECTION_EVENT, client=self, connected=True, error=None)
+        sender = asyncio.create_task(self._send_loop(writer))
+        frames = proto.FrameReader()
+        error = None
+        try:
+            while True:
+                data = await reader.read(READ_SIZE)
+                if not data:
+                    break
+                for message in frames.feed(data):
+                    self.post(NETWORK_EVENT, client=self, message=message)
+        except (OSError, ValueError) as e:
+            error = str(e)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.connected = False
+            sender.cancel()
+            writer.close()
+        self.post(CONNECTION_EVENT, client=self, connected=False, error=error)
+
+    async def _send_loop(self, writer: asyncio.StreamWriter):
+        outgoing = self._outgoing
+        self._wake.set()  # Enviar lo que se encoló antes de conectar
+        try:
+            while True:
+                await self._wake.wait()
+                self._wake.clear()
+                frames = []
+                while not outgoing.empty():
+                    frames.append(outgoing.get_nowait())
+                if frames:
+                    writer.writelines(frames)
+                    await writer.drain()
+        except OSError:
+            pass  # El bucle de lectura detecta el cierre y lo avisa
@@ -0,0 +1,508 @@
+import random
+from array import array
+from enum import Enum
+from typing import List, Tuple, Optional, NamedTuple
+
+# Motor de reglas del Ludo sin dependencias de pygame.
+# Se puede importar en servidores, simulaciones o búsquedas de la IA sin
+# inicializar pantallas, fuentes ni imágenes.
+
+# Dimensiones del tablero
+MAIN_PATH_LENGTH = 68      # Casillas del camino principal (numeradas 1-68)
+HOME_PATH_LENGTH = 8       # Casillas de la columna de color (incluida la meta)
+PIECES_PER_PLAYER = 4
+MAX_PLAYERS = 4
+MAX_CONSECUTIVE_SIXES = 3
+
+# Orden de los colores en una partida
+COLORS = ["red", "green", "yellow", "blue"]
+
+# Zonas seguras (casillas con estrella)
+SAFE_POSITIONS = [1, 9, 14, 22, 27, 35, 40, 48, 53, 61, 66, 68]
+
+# Posiciones de inicio en el camino principal (casillas de salida)
+START_POSITIONS = {
+    "yellow": 5,   # Sale por la casilla 5
+    "blue": 22,    # Sale por la casilla 22
+    "red": 39,     # Sale por la casilla 39
+    "green": 56    # Sale por la casilla 56
+}
+
+# Posiciones de entrada a las columnas de color (un paso antes de entrar)
+HOME_ENTRANCE_POSITIONS = {
+    "yellow": 68,   # Entra a la columna amarilla después de la casilla 68
+    "blue": 17,     # Entra a la columna azul después de la casilla 17
+    "red": 34,      # Entra a la columna roja después de la casilla 34
+    "green": 51     # Entra a la columna verde después de la casilla 51
+}
+
+# Progreso de una ficha: número de casillas recorridas desde su salida.
+#   IN_HOME            -> la ficha está en casa
+#   0 .. HOME_PATH_START - 1 -> camino principal (0 = casilla de salida)
+#   HOME_PATH_START .. FINISHED - 1 -> columna de color
+#   FINISHED           -> la ficha llegó a la meta
+IN_HOME = -1
+HOME_PATH_START = (HOME_ENTRANCE_POSITIONS["red"] - START_POSITIONS["red"]) % MAIN_PATH_LENGTH + 1
+FINISHED = HOME_PATH_START + HOME_PATH_LENGTH - 1
+
+# Todas las casillas de salida deben estar a la misma distancia de su entrada
+assert all((HOME_ENTRANCE_POSITIONS[c] - START_POSITIONS[c]) % MAIN_PATH_LENGTH + 1 == HOME_PATH_START
+           for c in COLORS)
+
+_SAFE_SET = frozenset(SAFE_POSITIONS)
+
+
+class TurnOutcome(Enum):
+    NEXT_PLAYER = "next_player"    # Pasa el turno al siguiente jugador
+    ROLL_AGAIN = "roll_again"      # Sacó un 6, vuelve a tirar
+    THREE_SIXES = "three_sixes"    # Tres 6 seguidos, pierde el turno
+
+
+class Transition(NamedTuple):
+    """Destino de una ficha tras mover un número de casillas"""
+    progress: int
+    square: int          # Casilla del camino principal (1-68) o 0
+    on_home_path: bool
+    finished: bool
+    safe: bool
+
+
+def _compute_square(color: str, progress: int) -> int:
+    if progress < 0 or progress >= HOME_PATH_START:
+        return 0
+    return (START_POSITIONS[color] - 1 + progress) % MAIN_PATH_LENGTH + 1
+
+
+def _compute_advance(progress: int, steps: int) -> Optional[int]:
+    if progress == IN_HOME:
+        return 0 if steps == 6 else None  # Solo puede salir con un 6
+    if progress + steps > FINISHED:
+        return None  # No puede pasarse de la meta
+    return progress + steps
+
+
+# Las tablas se indexan con (progreso + 1) * DIE_STRIDE + dado, dado entre 0 y 6
+DIE_STRIDE = 7
+_PROGRESS_VALUES = range(IN_HOME, FINISHED + 1)
+
+
+def _build_tables():
+    """Precalcula los destinos de cada progreso y dado para todos los colores"""
+    advance_table = []
+    for progress in _PROGRESS_VALUES:
+        advance_table.extend(_compute_advance(progress, steps) if steps else None
+                             for steps in range(DIE_STRIDE))
+    square_tables = {}
+    move_tables = {}
+    for color in COLORS:
+        squares = [_compute_square(color, progress) for progress in _PROGRESS_VALUES]
+        moves = []
+        for end in advance_table:
+            if end is None:
+                moves.append(None)
+            else:
+                square = squares[end + 1]
+                moves.append(Transition(end, square, end >= HOME_PATH_START,
+                                        end == FINISHED, square in _SAFE_SET))
+        square_tables[color] = squares
+        move_tables[color] = moves
+    return advance_table, square_tables, move_tables
+
+
+# ADVANCE_TABLE no depende del color; SQUARE_TABLES y MOVE_TABLES se indexan por color
+ADVANCE_TABLE, SQUARE_TABLES, MOVE_TABLES = _build_tables()
+
+
+def main_square(color: str, progress: int) -> int:
+    """Devuelve la casilla (1-68) del camino principal o 0 si no está en él"""
+    return SQUARE_TABLES[color][progress + 1]
+
+
+def is_safe_square(square: int) -> bool:
+    """Indica si una casilla del camino principal es segura"""
+    return square in _SAFE_SET
+
+
+def transition(color: str, progress: int, steps: int) -> Optional[Transition]:
+    """Destino de la ficha o None si el movimiento no es legal"""
+    return MOVE_TABLES[color][(progress + 1) * DIE_STRIDE + steps]
+
+
+def can_move(progress: int, steps: int) -> bool:
+    """Verifica si una ficha con ese progreso puede moverse"""
+    return ADVANCE_TABLE[(progress + 1) * DIE_STRIDE + steps] is not None
+
+
+def advance(progress: int, steps: int) -> int:
+    """Devuelve el progreso tras mover (se asume un movimiento legal)"""
+    return ADVANCE_TABLE[(progress + 1) * DIE_STRIDE + steps]
+
+
+def has_won(progresses: List[int]) -> bool:
+    """Verifica si todas las fichas llegaron a la meta"""
+    return all(progress == FINISHED for progress in progresses)
+
+
+def turn_outcome(dice_value: int, consecutive_sixes: int) -> Tuple[TurnOutcome, int]:
+    """Aplica la regla de los tres 6 tras mover; devuelve el resultado y el nuevo contador"""
+    if dice_value != 6:
+        return TurnOutcome.NEXT_PLAYER, 0
+    consecutive_sixes += 1
+    if consecutive_sixes >= MAX_CONSECUTIVE_SIXES:
+        return TurnOutcome.THREE_SIXES, consecutive_sixes
+    return TurnOutcome.ROLL_AGAIN, consecutive_sixes
+
+
+class BoardOccupancy:
+    """Índice casilla -> fichas del camino principal, actualizado al mover cada ficha
+
+    Sirve para cualquier objeto con atributo color (las fichas de la interfaz)
+    y responde las consultas de capturas y peligro sin recorrer todas las fichas.
+    """
+    def __init__(self, num_squares: int = MAIN_PATH_LENGTH):
+        self.num_squares = num_squares
+        self.squares = [[] for _ in range(num_squares + 1)]  # La casilla 0 no se usa
+
+    @classmethod
+    def from_pieces(cls, pieces, num_squares: int = MAIN_PATH_LENGTH) -> "BoardOccupancy":
+        """Construye el índice a partir de fichas con color y progress"""
+        occupancy = cls(num_squares)
+        for piece in pieces:
+            occupancy.add(main_square(piece.color, piece.progress), piece)
+        return occupancy
+
+    def add(self, square: int, piece):
+        if square:
+            self.squares[square].append(piece)
+
+    def remove(self, square: int, piece):
+        if square:
+            self.squares[square].remove(piece)
+
+    def move(self, old_square: int, new_square: int, piece):
+        """Actualiza el índice cuando una ficha cambia de casilla"""
+        if old_square != new_square:
+            self.remove(old_square, piece)
+            self.add(new_square, piece)
+
+    def at(self, square: int) -> list:
+        """Fichas en una casilla"""
+        return self.squares[square] if 0 < square <= self.num_squares else []
+
+    def enemies_at(self, square: int, color: str) -> list:
+        """Fichas de otros colores en una casilla (copia, se puede modificar el índice)"""
+        return [piece for piece in self.at(square) if piece.color != color]
+
+    def is_contested(self, square: int) -> bool:
+        """Indica si hay fichas de más de un color en la casilla"""
+        occupants = self.at(square)
+        return len(occupants) > 1 and any(piece.color != occupants[0].color for piece in occupants)
+
+    def enemies_behind(self, square: int, color: str, distance: int = 6) -> list:
+        """Fichas rivales entre 1 y distance casillas por detrás (con la vuelta del tablero)"""
+        if not square:
+            return []
+        enemies = []
+        squares = self.squares
+        for steps in range(1, distance + 1):
+            behind = (square - steps - 1) % self.num_squares + 1
+            for piece in squares[behind]:
+                if piece.color != color:
+                    enemies.append(piece)
+        return enemies
+
+
+class MoveResult(NamedTuple):
+    """Resultado de aplicar un movimiento en el motor"""
+    player: int
+    piece: int
+    start: int
+    end: int
+    captured: List[Tuple[int, int]]   # (jugador, ficha) enviadas a casa
+    outcome: TurnOutcome
+    winner: Optional[int]
+
+
+class MatchState:
+    """Estado compacto de una partida: 16 progresos y 5 bytes de cabecera en un array('b')"""
+    __slots__ = ("data",)
+
+    # Distribución del array: progreso de las fichas por jugador y luego la cabecera
+    CURRENT_PLAYER = MAX_PLAYERS * PIECES_PER_PLAYER
+    CONSECUTIVE_SIXES = CURRENT_PLAYER + 1
+    DICE_VALUE = CURRENT_PLAYER + 2
+    NUM_PLAYERS = CURRENT_PLAYER + 3
+    WINNER = CURRENT_PLAYER + 4
+    SIZE = CURRENT_PLAYER + 5
+
+    def __init__(self, num_players: int = MAX_PLAYERS, data: Optional[array] = None):
+        if data is None:
+            data = array("b", [IN_HOME] * (MAX_PLAYERS * PIECES_PER_PLAYER) + [0, 0, 0, num_players, -1])
+        self.data = data
+
+    def copy(self) -> "MatchState":
+        """Copia el estado (21 bytes, sin objetos por ficha)"""
+        return MatchState(data=self.data[:])
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, MatchState) and self.data == other.data
+
+    def __hash__(self) -> int:
+        return hash(self.data.tobytes())
+
+    def __repr__(self) -> str:
+        return f"MatchState({list(self.data)})"
+
+    def to_bytes(self) -> bytes:
+        return self.data.tobytes()
+
+    @classmethod
+    def from_bytes(cls, raw: bytes) -> "MatchState":
+        if len(raw) != cls.SIZE:
+            raise ValueError(f"Se esperaban {cls.SIZE} bytes, se recibieron {len(raw)}")
+        data = array("b")
+        data.frombytes(raw)
+        return cls(data=data)
+
+    def get_progress(self, player: int, piece: int) -> int:
+        return self.data[player * PIECES_PER_PLAYER + piece]
+
+    def set_progress(self, player: int, piece: int, progress: int):
+        self.data[player * PIECES_PER_PLAYER + piece] = progress
+
+    def pieces(self, player: int) -> array:
+        """Progreso de las cuatro fichas de un jugador (copia)"""
+        start = player * PIECES_PER_PLAYER
+        return self.data[start:start + PIECES_PER_PLAYER]
+
+    @property
+    def current_player(self) -> int:
+        return self.data[self.CURRENT_PLAYER]
+
+    @current_player.setter
+    def current_player(self, value: int):
+        self.data[self.CURRENT_PLAYER] = value
+
+    @property
+    def consecutive_sixes(self) -> int:
+        return self.data[self.CONSECUTIVE_SIXES]
+
+    @consecutive_sixes.setter
+    def consecutive_sixes(self, value: int):
+        self.data[self.CONSECUTIVE_SIXES] = value
+
+    @property
+    def dice_value(self) -> int:
+        return self.data[self.DICE_VALUE]
+
+    @dice_value.setter
+    def dice_value(self, value: int):
+        self.data[self.DICE_VALUE] = value
+
+    @property
+    def num_players(self) -> int:
+        return self.data[self.NUM_PLAYERS]
+
+    @property
+    def winner(self) -> Optional[int]:
+        winner = self.data[self.WINNER]
+        return None if winner < 0 else winner
+
+    @winner.setter
+    def winner(self, value: Optional[int]):
+        self.data[self.WINNER] = -1 if value is None else value
+
+    @classmethod
+    def from_players(cls, players, current_player_index: int = 0, dice_value: int = 0) -> "MatchState":
+        """Construye el estado a partir de los objetos Player/Piece de la interfaz"""
+        state = cls(len(players))
+        for p, player in enumerate(players):
+            for piece in player.pieces:
+                state.set_progress(p, piece.index, piece.progress)
+            if player.check_winner():
+                state.winner = p
+        state.current_player = current_player_index
+        state.consecutive_sixes = players[current_player_index].consecutive_sixes
+        state.dice_value = dice_value
+        return state
+
+    def apply_to_players(self, players):
+        """Coloca las fichas de los objetos Player/Piece según este estado"""
+        for p, player in enumerate(players):
+            for piece in player.pieces:
+                progress = self.get_progress(p, piece.index)
+                if piece.progress != progress:
+                    piece.set_progress(progress)
+            player.update_finished_pieces()
+        players[self.current_player].consecutive_sixes = self.consecutive_sixes
+
+
+# Claves Zobrist: una por (ficha, progreso), por jugador en turno y por contador de seises.
+# El dado no forma parte del hash: los nodos de azar se identifican antes de tirar.
+_PROGRESS_SLOTS = FINISHED + 2
+_zobrist_rng = random.Random(0x1D0)
+ZOBRIST_PIECES = [_zobrist_rng.getrandbits(64)
+                  for _ in range(MAX_PLAYERS * PIECES_PER_PLAYER * _PROGRESS_SLOTS)]
+ZOBRIST_TURN = [_zobrist_rng.getrandbits(64) for _ in range(MAX_PLAYERS)]
+ZOBRIST_SIXES = [_zobrist_rng.getrandbits(64) for _ in range(MAX_CONSECUTIVE_SIXES + 1)]
+del _zobrist_rng
+
+
+def zobrist_hash(state: MatchState) -> int:
+    """Calcula desde cero el hash Zobrist de un estado"""
+    data = state.data
+    h = ZOBRIST_TURN[data[MatchState.CURRENT_PLAYER]] ^ ZOBRIST_SIXES[data[MatchState.CONSECUTIVE_SIXES]]
+    for slot in range(state.num_players * PIECES_PER_PLAYER):
+        h ^= ZOBRIST_PIECES[slot * _PROGRESS_SLOTS + data[slot] + 1]
+    return h
+
+
+class LudoEngine:
+    """Reglas de una partida sin interfaz gráfica sobre un MatchState"""
+    def __init__(self, colors: List[str], rng: Optional[random.Random] = None,
+                 state: Optional[MatchState] = None, dice=None):
+        self.colors = list(colors)
+        self.state = state if state is not None else MatchState(len(self.colors))
+        self.turn_count = 0
+        self._moves = [MOVE_TABLES[color] for color in self.colors]
+        self._squares = [SQUARE_TABLES[color] for color in self.colors]
+        self.rng = rng if rng is not None else random.Random()
+        self.dice = dice  # Fuente de dados con roll() (ver ludo_rng); None = tirar con self.rng
+        self.hash = zobrist_hash(self.state)  # Se actualiza en cada movimiento y cambio de turno
+
+    def copy(self, rng: Optional[random.Random] = None, dice=None) -> "LudoEngine":
+        """Copia la partida para explorar jugadas sin modificar la original
+
+        Si se pasa un rng o un dado nuevo, la copia no consume los dados de la partida original.
+        """
+        engine = LudoEngine.__new__(LudoEngine)
+        engine.colors = self.colors
+        engine.state = self.state.copy()
+        engine.turn_count = self.turn_count
+        engine._moves = self._moves
+        engine._squares = self._squares
+        engine.rng = rng if rng is not None else self.rng
+        engine.dice = dice if dice is not None or rng is not None else self.dice
+        engine.hash = self.hash
+        return engine
+
+    @property
+    def current_player(self) -> int:
+        return self.state.current_player
+
+    @property
+    def dice_value(self) -> int:
+        return self.state.dice_value
+
+    @property
+    def winner(self) -> Optional[int]:
+        return self.state.winner
+
+    @property
+    def is_over(self) -> bool:
+        return self.state.winner is not None
+
+    def roll(self, value: Optional[int] = None) -> int:
+        """Tira el dado (o fija el valor recibido, p. ej. desde la interfaz)"""
+        if value is None:
+            value = self.dice.roll() if self.dice is not None else self.rng.randint(1, 6)
+        self.state.dice_value = value
+        return value
+
+    def legal_moves(self) -> List[int]:
+        """Índices de las fichas del jugador actual que pueden moverse"""
+        data = self.state.data
+        player = data[MatchState.CURRENT_PLAYER]
+        table = self._moves[player]
+        dice_value = data[MatchState.DICE_VALUE]
+        base = player * PIECES_PER_PLAYER
+        return [i for i in range(PIECES_PER_PLAYER)
+                if table[(data[base + i] + 1) * DIE_STRIDE + dice_value] is not None]
+
+    def captures_at(self, player: int, progress: int) -> List[Tuple[int, int]]:
+        """Fichas enemigas que serían capturadas por una ficha con ese progreso"""
+        square = self._squares[player][progress + 1]
+        if square == 0 or square in _SAFE_SET:
+            return []
+        return self._captures_on(player, square)
+
+    def _captures_on(self, player: int, square: int) -> List[Tuple[int, int]]:
+        data = self.state.data
+        captured = []
+        for other, squares in enumerate(self._squares):
+            if other == player:
+                continue
+            base = other * PIECES_PER_PLAYER
+            for index in range(PIECES_PER_PLAYER):
+                if squares[data[base + index] + 1] == square:
+                    captured.append((other, index))
+        return captured
+
+    def apply_move(self, piece: int) -> MoveResult:
+        """Mueve una ficha del jugador actual y resuelve capturas, turno y victoria"""
+        state = self.state
+        data = state.data
+        player = data[MatchState.CURRENT_PLAYER]
+        dice_value = data[MatchState.DICE_VALUE]
+        slot = player * PIECES_PER_PLAYER + piece
+        start = data[slot]
+        move = self._moves[player][(start + 1) * DIE_STRIDE + dice_value]
+        if move is None:
+            raise ValueError(f"Movimiento ilegal: ficha {piece} con dado {dice_value}")
+
+        end, square, _, finished, safe = move
+        data[slot] = end
+        base = slot * _PROGRESS_SLOTS + 1
+        h = self.hash ^ ZOBRIST_PIECES[base + start] ^ ZOBRIST_PIECES[base + end]
+
+        captured = []
+        if square and not safe:
+            captured = self._captures_on(player, square)
+            for other, index in captured:
+                victim = other * PIECES_PER_PLAYER + index
+                base = victim * _PROGRESS_SLOTS + 1
+                h ^= ZOBRIST_PIECES[base + data[victim]] ^ ZOBRIST_PIECES[base + IN_HOME]
+                data[victim] = IN_HOME
+        self.hash = h
+
+        if finished and has_won(state.pieces(player)):
+            state.winner = player
+            return MoveResult(player, piece, start, end, captured, TurnOutcome.NEXT_PLAYER, player)
+
+        sixes = data[MatchState.CONSECUTIVE_SIXES]
+        outcome, new_sixes = turn_outcome(dice_value, sixes)
+        if new_sixes != sixes:
+            data[MatchState.CONSECUTIVE_SIXES] = new_sixes
+            self.hash ^= ZOBRIST_SIXES[sixes] ^ ZOBRIST_SIXES[new_sixes]
+        if outcome != TurnOutcome.ROLL_AGAIN:
+            self.next_turn()
+        return MoveResult(player, piece, start, end, captured, outcome, None)
+
+    def pass_turn(self) -> TurnOutcome:
+        """Resuelve una tirada sin movimientos posibles"""
+        if self.state.dice_value == 6:
+            # Con un 6 se puede volver a tirar aunque no se mueva
+            return TurnOutcome.ROLL_AGAIN
+        self.next_turn()
+        return TurnOutcome.NEXT_PLAYER
+
+    def next_turn(self):
+        """Pasa al siguiente jugador"""
+        data = self.state.data
+        current = data[MatchState.CURRENT_PLAYER]
+        following = (current + 1) % len(self.colors)
+        self.turn_count += 1
+        self.hash ^= (ZOBRIST_TURN[current] ^ ZOBRIST_TURN[following] ^
+                      ZOBRIST_SIXES[data[MatchState.CONSECUTIVE_SIXES]] ^ ZOBRIST_SIXES[0])
+        data[MatchState.CURRENT_PLAYER] = following
+        data[MatchState.CONSECUTIVE_SIXES] = 0
+
+    def play_turn(self, choose=None) -> Optional[MoveResult]:
+        """Tira el dado y juega una tirada completa; choose(engine, moves) elige la ficha"""
+        self.roll()
+        moves = self.legal_moves()
+        if not moves:
+            self.pass_turn()
+            return None
+        piece = choose(self, moves) if choose is not None else moves[0]
+        return self.apply_move(piece)
@@ -3,8 +3,17 @@ import sys
 import random
 import math
 from enum import Enum
-from typing import List, Tuple, Dict, Optional
+from typing import Callable, List, Tuple, Dict, Optional
 import os
+from collections import OrderedDict, deque
+
+import ludo_ai
+import ludo_assets
+import ludo_client
+import ludo_engine
+import ludo_protocol
+from ludo_engine import SAFE_POSITIONS, HOME_ENTRANCE_POSITIONS, TurnOutcome
+from ludo_rng import MatchStreams, RandomDice
 
 # Inicializar pygame
 pygame.init()
@@ -12,10 +21,20 @@ pygame.init()
 # Constantes
 WINDOW_WIDTH = 900
 WINDOW_HEIGHT = 900
+MIN_WINDOW_SIZE = (720, 720)  # El menú no cabe en menos
+RESIZE_DEBOUNCE = 150     # ms sin cambios de tamaño antes de recolocar el tablero
 FPS = 60
-BOARD_SIZE = 700
+AI_SEARCH_TIME = 0.05  # Segundos por decisión de la IA de búsqueda (0 = usar la heurística)
+CLIENT_PREDICTION = True  # En red: animar el dado y mover la ficha sin esperar al servidor
+RECONNECT_ATTEMPTS = 5    # En red: intentos de volver a la partida tras perder la conexión
+RECONNECT_DELAY = 1000    # ms de espera antes de cada intento (crece con cada uno)
+DIRTY_RENDERING = True    # Repintar solo las zonas que cambiaron (False: la ventana entera en cada frame)
+DIRTY_RECT_LIMIT = 4      # Más zonas sucias que estas se repintan como una sola que las cubre
+TEXT_CACHE_SIZE = 256     # Textos renderizados que se guardan; se descartan los usados hace más tiempo
+BOARD_SIZE = 700          # Con otro tamaño de ventana se recalcula (7/9 del lado menor)
 BOARD_OFFSET_X = (WINDOW_WIDTH - BOARD_SIZE) // 2
 BOARD_OFFSET_Y = (WINDOW_HEIGHT - BOARD_SIZE) // 2
+BOARD_CACHE_SIZE = 8      # Tamaños de tablero ya dibujados que se guardan
 
 # Colores
 WHITE = (255, 255, 255)
@@ -33,59 +52,66 @@ class GameState(Enum):
     MENU = "menu"
     PLAYING = "playing"
     ROLLING_DICE = "rolling_dice"
+    WAITING = "waiting"  # Conectando o esperando rivales en red
     MOVING_PIECE = "moving_piece"
     GAME_OVER = "game_over"
     PAUSED = "paused"
 
+def merge_dirty_rects(rects: List[pygame.Rect], bounds: pygame.Rect,
+                      limit: int = DIRTY_RECT_LIMIT) -> List[pygame.Rect]:
+    """Une las zonas que se solapan y recorta lo que sale de la ventana
+
+    Cada zona cuesta un repintado recortado; si quedan más de limit, se repinta
+    una sola que las cubre a todas.
+    """
+    merged = []
+    for rect in rects:
+        rect = rect.clip(bounds)
+        if not rect.width or not rect.height:
+            continue
+        index = rect.collidelist(merged)
+        while index >= 0:
+            rect.union_ip(merged.pop(index))
+            index = rect.collidelist(merged)
+        merged.append(rect)
+    if len(merged) > limit:
+        return [merged[0].unionall(merged[1:])]
+    return merged
+
 # Tamaño de las casillas del tablero
 CELL_SIZE = BOARD_SIZE // 15
 
 # Posiciones de las casas de inicio (ajustadas al tablero real)
-HOME_POSITIONS = {
-    "red": [
-        (BOARD_OFFSET_X + CELL_SIZE * 2.5, BOARD_OFFSET_Y + CELL_SIZE * 2.5),
-        (BOARD_OFFSET_X + CELL_SIZE * 3.5, BOARD_OFFSET_Y + CELL_SIZE * 2.5),
-        (BOARD_OFFSET_X + CELL_SIZE * 2.5, BOARD_OFFSET_Y + CELL_SIZE * 3.5),
-        (BOARD_OFFSET_X + CELL_SIZE * 3.5, BOARD_OFFSET_Y + CELL_SIZE * 3.5)
-    ],
-    "green": [
-        (BOARD_OFFSET_X + CELL_SIZE * 11.5, BOARD_OFFSET_Y + CELL_SIZE * 2.5),
-        (BOARD_OFFSET_X + CELL_SIZE * 12.5, BOARD_OFFSET_Y + CELL_SIZE * 2.5),
-        (BOARD_OFFSET_X + CELL_SIZE * 11.5, BOARD_OFFSET_Y + CELL_SIZE * 3.5),
-        (BOARD_OFFSET_X + CELL_SIZE * 12.5, BOARD_OFFSET_Y + CELL_SIZE * 3.5)
-    ],
-    "yellow": [
-        (BOARD_OFFSET_X + CELL_SIZE * 11.5, BOARD_OFFSET_Y + CELL_SIZE * 11.5),
-        (BOARD_OFFSET_X + CELL_SIZE * 12.5, BOARD_OFFSET_Y + CELL_SIZE * 11.5),
-        (BOARD_OFFSET_X + CELL_SIZE * 11.5, BOARD_OFFSET_Y + CELL_SIZE * 12.5),
-        (BOARD_OFFSET_X + CELL_SIZE * 12.5, BOARD_OFFSET_Y + CELL_SIZE * 12.5)
-    ],
-    "blue": [
-        (BOARD_OFFSET_X + CELL_SIZE * 2.5, BOARD_OFFSET_Y + CELL_SIZE * 11.5),
-        (BOARD_OFFSET_X + CELL_SIZE * 3.5, BOARD_OFFSET_Y + CELL_SIZE * 11.5),
-        (BOARD_OFFSET_X + CELL_SIZE * 2.5, BOARD_OFFSET_Y + CELL_SIZE * 12.5),
-        (BOARD_OFFSET_X + CELL_SIZE * 3.5, BOARD_OFFSET_Y + CELL_SIZE * 12.5)
-    ]
-}
-
-# Zonas seguras (casillas con estrella) - actualizadas según el tablero
-SAFE_POSITIONS = [1, 9, 14, 22, 27, 35, 40, 48, 53, 61, 66, 68]  # Posiciones donde están las estrellas
-
-# Posiciones de inicio en el camino principal (casillas de salida)
-START_POSITIONS = {
-    "yellow": 5,   # Sale por la casilla 5
-    "blue": 22,    # Sale por la casilla 22
-    "red": 39,     # Sale por la casilla 39
-    "green": 56    # Sale por la casilla 56
-}
+def generate_home_positions():
+    """Genera las posiciones de las fichas en las casas de inicio"""
+    return {
+        "red": [
+            (BOARD_OFFSET_X + CELL_SIZE * 2.5, BOARD_OFFSET_Y + CELL_SIZE * 2.5),
+            (BOARD_OFFSET_X + CELL_SIZE * 3.5, BOARD_OFFSET_Y + CELL_SIZE * 2.5),
+            (BOARD_OFFSET_X + CELL_SIZE * 2.5, BOARD_OFFSET_Y + CELL_SIZE * 3.5),
+            (BOARD_OFFSET_X + CELL_SIZE * 3.5, BOARD_OFFSET_Y + CELL_SIZE * 3.5)
+        ],
+        "green": [
+            (BOARD_OFFSET_X + CELL_SIZE * 11.5, BOARD_OFFSET_Y + CELL_SIZE * 2.5),
+            (BOARD_OFFSET_X + CELL_SIZE * 12.5, BOARD_OFFSET_Y + CELL_SIZE * 2.5),
+            (BOARD_OFFSET_X + CELL_SIZE * 11.5, BOARD_OFFSET_Y + CELL_SIZE * 3.5),
+            (BOARD_OFFSET_X + CELL_SIZE * 12.5, BOARD_OFFSET_Y + CELL_SIZE * 3.5)
+        ],
+        "yellow": [
+            (BOARD_OFFSET_X + CELL_SIZE * 11.5, BOARD_OFFSET_Y + CELL_SIZE * 11.5),
+            (BOARD_OFFSET_X + CELL_SIZE * 12.5, BOARD_OFFSET_Y + CELL_SIZE * 11.5),
+            (BOARD_OFFSET_X + CELL_SIZE * 11.5, BOARD_OFFSET_Y + CELL_SIZE * 12.5),
+            (BOARD_OFFSET_X + CELL_SIZE * 12.5, BOARD_OFFSET_Y + CELL_SIZE * 12.5)
+        ],
+        "blue": [
+            (BOARD_OFFSET_X + CELL_SIZE * 2.5, BOARD_OFFSET_Y + CELL_SIZE * 11.5),
+            (BOARD_OFFSET_X + CELL_SIZE * 3.5, BOARD_OFFSET_Y + CELL_SIZE * 11.5),
+            (BOARD_OFFSET_X + CELL_SIZE * 2.5, BOARD_OFFSET_Y + CELL_SIZE * 12.5),
+            (BOARD_OFFSET_X + CELL_SIZE * 3.5, BOARD_OFFSET_Y + CELL_SIZE * 12.5)
+        ]
+    }
 
-# Posiciones de entrada a las columnas de color (un paso antes de entrar)
-HOME_ENTRANCE_POSITIONS = {
-    "yellow": 68,   # Entra a la columna amarilla después de la casilla 68
-    "blue": 17,     # Entra a la columna azul después de la casilla 17
-    "red": 34,      # Entra a la columna roja después de la casilla 34
-    "green": 51     # Entra a la columna verde después de la casilla 51
-}
+HOME_POSITIONS = generate_home_positions()
 
 def generate_board_path():
     """Genera el camino completo del tablero de Ludo - 68 casillas"""
@@ -191,12 +217,37 @@ def generate_home_paths():
     
     return home_paths
 
+_geometry_cache: Dict[Tuple[int, int], tuple] = {}  # Tamaño de ventana -> geometría ya calculada
+
+def set_window_size(width: int, height: int):
+    """Ajusta la geometría del tablero y las tablas de coordenadas al tamaño de la ventana
+    
+    El tablero ocupa 7/9 del lado menor, centrado. Las tablas de cada tamaño se
+    calculan una sola vez: volver a un tamaño anterior solo las recupera.
+    """
+    global WINDOW_WIDTH, WINDOW_HEIGHT, BOARD_SIZE, BOARD_OFFSET_X, BOARD_OFFSET_Y, CELL_SIZE
+    global HOME_POSITIONS, MAIN_PATH, HOME_PATHS
+    geometry = _geometry_cache.get((width, height))
+    if geometry is None:
+        WINDOW_WIDTH, WINDOW_HEIGHT = width, height
+        BOARD_SIZE = min(width, height) * 7 // 9
+        BOARD_OFFSET_X = (width - BOARD_SIZE) // 2
+        BOARD_OFFSET_Y = (height - BOARD_SIZE) // 2
+        CELL_SIZE = BOARD_SIZE // 15
+        geometry = (width, height, BOARD_SIZE, BOARD_OFFSET_X, BOARD_OFFSET_Y, CELL_SIZE,
+                    generate_home_positions(), generate_board_path(), generate_home_paths())
+        _geometry_cache[(width, height)] = geometry
+    (WINDOW_WIDTH, WINDOW_HEIGHT, BOARD_SIZE, BOARD_OFFSET_X, BOARD_OFFSET_Y, CELL_SIZE,
+     HOME_POSITIONS, MAIN_PATH, HOME_PATHS) = geometry
+
 class Piece:
     """Representa una ficha del juego"""
-    def __init__(self, color: str, index: int):
+    def __init__(self, color: str, index: int, occupancy: Optional[ludo_engine.BoardOccupancy] = None):
         self.color = color
         self.index = index
+        self.occupancy = occupancy  # Índice de casillas compartido por toda la partida
         self.position = -1  # -1 significa en casa
+        self.progress = ludo_engine.IN_HOME
         self.is_home = True
         self.is_safe = False
         self.has_finished = False
@@ -206,22 +257,27 @@ class Piece:
         self.animation_offset = (0, 0)
         self.is_animating = False
         
-        # Cargar imagen de la ficha
+        self.resize()
+    
+    def resize(self):
+        """Toma la imagen del tamaño de casilla actual y se recoloca en el tablero"""
+        # Imagen de la ficha, compartida con las demás fichas del mismo color
         piece_size = int(CELL_SIZE * 0.6)  # Las fichas son 60% del tamaño de la casilla
-        try:
-            image_path = f"Icons/Ficha {self._get_spanish_color()}.png"
-            self.image = pygame.image.load(image_path)
-            self.image = pygame.transform.scale(self.image, (piece_size, piece_size))
-        except:
-            # Si no se puede cargar la imagen, usar un círculo
-            self.image = pygame.Surface((piece_size, piece_size), pygame.SRCALPHA)
-            radius = piece_size // 2
-            pygame.draw.circle(self.image, self._get_pygame_color(), (radius, radius), radius - 2)
-            pygame.draw.circle(self.image, BLACK, (radius, radius), radius - 2, 2)
+        self.image_key = (f"Ficha {self._get_spanish_color()}.png", (piece_size, piece_size))
+        self.image = ludo_assets.ASSETS.scaled(*self.image_key, lambda: self._create_piece_image(piece_size))
         
         self.rect = self.image.get_rect()
+        self.is_animating = False
         self.update_position()
     
+    def _create_piece_image(self, piece_size: int) -> pygame.Surface:
+        """Si no se puede cargar la imagen, usar un círculo"""
+        image = pygame.Surface((piece_size, piece_size), pygame.SRCALPHA)
+        radius = piece_size // 2
+        pygame.draw.circle(image, self._get_pygame_color(), (radius, radius), radius - 2)
+        pygame.draw.circle(image, BLACK, (radius, radius), radius - 2, 2)
+        return image
+    
     def _get_spanish_color(self):
         """Convierte el color a español para cargar las imágenes"""
         colors = {
@@ -275,114 +331,53 @@ class Piece:
             self.rect.x += self.animation_offset[0]
             self.rect.y += self.animation_offset[1]
     
+    def set_progress(self, progress: int):
+        """Coloca la ficha según su progreso en el motor de reglas"""
+        square = ludo_engine.main_square(self.color, progress)
+        if self.occupancy is not None:
+            self.occupancy.move(ludo_engine.main_square(self.color, self.progress), square, self)
+        self.progress = progress
+        self.is_home = progress == ludo_engine.IN_HOME
+        self.has_finished = progress == ludo_engine.FINISHED
+        self.on_home_path = progress >= ludo_engine.HOME_PATH_START
+        if square:
+            self.path_position = square - 1  # -1 porque el array empieza en 0
+            self.home_path_position = -1
+        else:
+            self.path_position = 0
+            self.home_path_position = progress - ludo_engine.HOME_PATH_START if self.on_home_path else -1
+        self.is_safe = self.is_home or ludo_engine.is_safe_square(square)
+        self.update_position()
+    
+    def glide_from(self, old_center: Tuple[int, int]):
+        """Corrige la posición suavemente: la ficha se desliza desde donde se veía"""
+        self.is_animating = False
+        self.update_position()
+        self.animation_offset = (old_center[0] - self.rect.centerx, old_center[1] - self.rect.centery)
+        self.is_animating = self.animation_offset != (0, 0)
+        self.update_position()
+    
+    def update_animation(self):
+        """Reduce el desplazamiento de la corrección en cada frame"""
+        if not self.is_animating:
+            return
+        dx, dy = self.animation_offset
+        self.animation_offset = (int(dx * 0.8), int(dy * 0.8))
+        self.is_animating = self.animation_offset != (0, 0)
+        self.update_position()
+    
     def can_move(self, steps: int) -> bool:
         """Verifica si la ficha puede moverse"""
-        if self.has_finished:
-            return False
-        
-        if self.is_home:
-            return steps == 6  # Solo puede salir con un 6
-        
-        if self.on_home_path:
-            # Verificar si puede moverse en el camino de casa
-            new_position = self.home_path_position + steps
-            return new_position <= 7  # Las columnas de color tienen 8 casillas (0-7)
-        else:
-            # En el camino principal
-            current_position = self.path_position
-            
-            # Verificar si llegará a la entrada de su columna de color
-            home_entrance = HOME_ENTRANCE_POSITIONS[self.color]
-            
-            # Calcular nueva posición considerando el ciclo de 68 casillas
-            new_position = current_position + steps
-            
-            # Verificar si pasará por la entrada a casa
-            if current_position < home_entrance:
-                if new_position >= home_entrance:
-                    # Entrará al camino de casa
-                    steps_to_entrance = home_entrance - current_position
-                    remaining_steps = steps - steps_to_entrance
-                    return remaining_steps <= 8  # No puede pasarse de las 8 casillas
-            elif current_position > home_entrance:
-                # Si está después de la entrada, verificar si dará la vuelta y llegará
-                if new_position > 68:
-                    wrapped_position = new_position - 68
-                    if wrapped_position >= home_entrance:
-                        # Dará la vuelta y pasará por la entrada
-                        steps_to_68 = 68 - current_position
-                        steps_from_1 = wrapped_position
-                        if steps_from_1 >= home_entrance:
-                            steps_to_entrance = steps_to_68 + home_entrance
-                            remaining_steps = steps - steps_to_entrance
-                            return remaining_steps <= 8
-            
-            return True
+        return ludo_engine.can_move(self.progress, steps)
     
     def move(self, steps: int):
         """Mueve la ficha"""
-        if self.is_home and steps == 6:
-            # Salir de casa
-            self.is_home = False
-            self.path_position = START_POSITIONS[self.color] - 1  # -1 porque el array empieza en 0
-            self.is_safe = (self.path_position + 1) in SAFE_POSITIONS
-        elif not self.is_home and not self.has_finished:
-            if self.on_home_path:
-                # Mover en el camino de casa
-                self.home_path_position += steps
-                if self.home_path_position >= 7:  # Llegó a la flecha (posición 7)
-                    self.has_finished = True
-                    self.home_path_position = 7
-            else:
-                # Mover en el camino principal
-                current_position = self.path_position
-                home_entrance = HOME_ENTRANCE_POSITIONS[self.color]
-                new_position = current_position + steps
-                
-                # Verificar si entrará al camino de casa
-                should_enter_home = False
-                steps_to_entrance = 0
-                
-                if current_position < home_entrance:
-                    if new_position >= home_entrance:
-                        should_enter_home = True
-                        steps_to_entrance = home_entrance - current_position
-                elif current_position > home_entrance:
-                    # Verificar si dará la vuelta y entrará
-                    if new_position > 68:
-                        wrapped_position = new_position - 68
-                        if wrapped_position >= home_entrance:
-                            should_enter_home = True
-                            steps_to_entrance = (68 - current_position) + home_entrance
-                
-                if should_enter_home:
-                    # Entrar al camino de casa
-                    remaining_steps = steps - steps_to_entrance
-                    self.on_home_path = True
-                    self.home_path_position = remaining_steps - 1
-                    if self.home_path_position >= 7:
-                        self.has_finished = True
-                        self.home_path_position = 7
-                else:
-                    # Movimiento normal en el camino principal
-                    if new_position > 68:
-                        self.path_position = new_position - 68
-                    else:
-                        self.path_position = new_position
-                    
-                    # Actualizar si está en posición segura
-                    self.is_safe = (self.path_position + 1) in SAFE_POSITIONS
-        
-        self.update_position()
+        if self.can_move(steps):
+            self.set_progress(ludo_engine.advance(self.progress, steps))
     
     def send_home(self):
         """Envía la ficha de vuelta a casa"""
-        self.is_home = True
-        self.path_position = 0
-        self.home_path_position = -1
-        self.on_home_path = False
-        self.is_safe = True
-        self.update_position()
+        self.set_progress(ludo_engine.IN_HOME)
     
     def draw(self, screen: pygame.Surface):
         """Dibuja la ficha"""
@@ -393,10 +388,25 @@ class Piece:
             pygame.draw.circle(screen, WHITE, self.rect.center, 8)
             pygame.draw.circle(screen, BLACK, self.rect.center, 8, 2)
 
+# Imágenes de cada cara del dado en Icons/
+DICE_IMAGES = {
+    1: "dado-uno",
+    2: "dados-dos", 
+    3: "dados-tres",
+    4: "dados-cuatro",
+    5: "dado",  # Asumiendo que dado.png es el 5
+    6: "dados-seis"
+}
+
 class Dice:
     """Representa el dado del juego"""
-    def __init__(self):
+    def __init__(self, source=None, rng: Optional[random.Random] = None):
+        self.source = source if source is not None else RandomDice()  # Decide el resultado
+        self.rng = rng if rng is not None else random.Random()         # Solo para la animación
         self.value = 1
+        self.previous_value = 1
+        self.result = None
+        self.hold = False
         self.rolling = False
         self.roll_timer = 0
         self.images = {}
@@ -410,23 +420,10 @@ class Dice:
         except:
             pass
         
-        # Cargar imágenes del dado
-        dice_names = {
-            1: "dado-uno",
-            2: "dados-dos", 
-            3: "dados-tres",
-            4: "dados-cuatro",
-            5: "dado",  # Asumiendo que dado.png es el 5
-            6: "dados-seis"
-        }
-        
-        for num, name in dice_names.items():
-            try:
-                self.images[num] = pygame.image.load(f"Icons/{name}.png")
-                self.images[num] = pygame.transform.scale(self.images[num], (100, 100))
-            except:
-                # Si no se puede cargar, crear una imagen simple
-                self.images[num] = self._create_dice_image(num)
+        # Imágenes del dado (compartidas); si no se puede cargar una, se crea una imagen simple
+        for num, name in DICE_IMAGES.items():
+            self.images[num] = ludo_assets.ASSETS.scaled(f"{name}.png", (100, 100),
+                                                         lambda num=num: self._create_dice_image(num))
         
         self.rect = pygame.Rect(WINDOW_WIDTH // 2 - 50, WINDOW_HEIGHT // 2 - 50, 100, 100)
     
@@ -452,27 +449,48 @@ class Dice:
         
         return surface
     
-    def roll(self):
-        """Inicia la animación de tirar el dado"""
+    def roll(self, result: Optional[int] = None, hold: bool = False):
+        """Inicia la animación de tirar el dado
+        
+        result: valor ya decidido (p. ej. por el servidor).
+        hold: seguir girando hasta recibir el valor con settle().
+        """
+        self.previous_value = self.value
+        self.result = result
+        self.hold = hold
         self.rolling = True
         self.roll_timer = 30  # 30 frames de animación
         
         if self.roll_sound:
             self.roll_sound.play()
     
+    def settle(self, result: int):
+        """Fija el valor de una tirada que ya está girando"""
+        self.result = result
+        self.hold = False
+        self.roll_timer = max(self.roll_timer, 8)  # Unos frames para frenar, no un salto
+    
+    def cancel(self):
+        """Detiene una tirada que no llegó a confirmarse"""
+        self.rolling = False
+        self.hold = False
+        self.value = self.previous_value
+        self.rect.center = (WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2)
+    
     def update(self):
         """Actualiza la animación del dado"""
         if self.rolling:
-            if self.roll_timer > 0:
-                self.value = random.randint(1, 6)
-                self.roll_timer -= 1
+            if self.roll_timer > 0 or self.hold:
+                self.value = self.rng.randint(1, 6)
+                self.roll_timer = max(self.roll_timer - 1, 0)
                 
                 # Efecto de rotación
                 if self.roll_timer % 2 == 0:
-                    self.rect.x += random.randint(-2, 2)
-                    self.rect.y += random.randint(-2, 2)
+                    self.rect.x += self.rng.randint(-2, 2)
+                    self.rect.y += self.rng.randint(-2, 2)
             else:
                 self.rolling = False
+                self.value = self.result if self.result is not None else self.source.roll()
                 # Centrar el dado
                 self.rect.center = (WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2)
                 return True  # Indica que terminó de rodar
@@ -492,10 +510,12 @@ class Dice:
 
 class Player:
     """Representa un jugador"""
-    def __init__(self, name: str, color: str, is_ai: bool = False):
+    def __init__(self, name: str, color: str, is_ai: bool = False,
+                 occupancy: Optional[ludo_engine.BoardOccupancy] = None):
         self.name = name
         self.color = color
-        self.pieces = [Piece(color, i) for i in range(4)]
+        self.occupancy = occupancy
+        self.pieces = [Piece(color, i, occupancy) for i in range(4)]
         self.finished_pieces = 0
         self.can_roll = True
         self.has_moved = False
@@ -516,18 +536,20 @@ class Player:
     
     def check_winner(self) -> bool:
         """Verifica si el jugador ganó"""
-        return all(piece.has_finished for piece in self.pieces)
+        return ludo_engine.has_won([piece.progress for piece in self.pieces])
     
     def get_pieces_at_position(self, position: int, on_home_path: bool = False) -> List[Piece]:
         """Obtiene las fichas en una posición específica"""
-        pieces = []
-        for piece in self.pieces:
-            if not piece.is_home and not piece.has_finished:
-                if on_home_path and piece.on_home_path and piece.home_path_position == position:
-                    pieces.append(piece)
-                elif not on_home_path and not piece.on_home_path and piece.path_position == position:
-                    pieces.append(piece)
-        return pieces
+        if on_home_path or self.occupancy is None:
+            pieces = []
+            for piece in self.pieces:
+                if not piece.is_home and not piece.has_finished:
+                    if on_home_path and piece.on_home_path and piece.home_path_position == position:
+                        pieces.append(piece)
+                    elif not on_home_path and not piece.on_home_path and piece.path_position == position:
+                        pieces.append(piece)
+            return pieces
+        return [piece for piece in self.occupancy.at(position + 1) if piece.color == self.color]
     
     def ai_select_piece(self, movable_pieces: List[Piece], all_players: List['Player'], dice_value: int) -> Optional[Piece]:
         """IA para seleccionar qué ficha mover"""
@@ -545,6 +567,11 @@ class Player:
             if piece.is_home:
                 return piece
         
+        occupancy = self.occupancy
+        if occupancy is None:
+            occupancy = ludo_engine.BoardOccupancy.from_pieces(
+                piece for player in all_players for piece in player.pieces)
+        
         # Evaluar cada pieza movible
         best_piece = None
         best_score = -1000
@@ -564,27 +591,15 @@ class Player:
                     distance_to_home = (68 - piece.path_position) + home_entrance
                 score += (68 - distance_to_home)
             
-            # Bonus por capturar oponentes
-            future_position = piece.path_position + dice_value
-            if future_position > 68:
-                future_position = future_position - 68
-            for player in all_players:
-                if player.color != self.color:
-                    for enemy_piece in player.pieces:
-                        if (not enemy_piece.is_home and not enemy_piece.has_finished and 
-                            not enemy_piece.on_home_path and enemy_piece.path_position == future_position and
-                            not enemy_piece.is_safe):
-                            score += 100  # Gran bonus por capturar
+            # Bonus por capturar oponentes en la casilla de destino
+            move = ludo_engine.transition(self.color, piece.progress, dice_value)
+            if move.square and not move.safe:
+                score += 100 * len(occupancy.enemies_at(move.square, self.color))  # Gran bonus por capturar
             
-            # Penalización por estar en peligro
+            # Penalización por tener rivales a 6 casillas o menos por detrás
             if not piece.is_safe:
-                for player in all_players:
-                    if player.color != self.color:
-                        for enemy_piece in player.pieces:
-                            if not enemy_piece.is_home and not enemy_piece.has_finished:
-                                distance = enemy_piece.path_position - piece.path_position
-                                if 0 < distance <= 6:
-                                    score -= 20  # Penalización por estar en peligro
+                square = ludo_engine.main_square(self.color, piece.progress)
+                score -= 20 * len(occupancy.enemies_behind(square, self.color))
             
             if score > best_score:
                 best_score = score
@@ -594,10 +609,24 @@ class Player:
 
 class Board:
     """Representa el tablero del juego"""
+    # Tableros ya dibujados por tamaño, compartidos y con descarte LRU
+    surfaces: "OrderedDict[int, pygame.Surface]" = OrderedDict()
+    
     def __init__(self):
-        # Siempre crear el tablero programáticamente
-        self.image = self._create_detailed_board()
-        self.rect = self.image.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2))
+        self.resize()
+    
+    def resize(self):
+        """Ajusta el tablero a la geometría actual; cada tamaño se dibuja una sola vez"""
+        self.image = Board.surfaces.get(BOARD_SIZE)
+        if self.image is None:
+            # Siempre crear el tablero programáticamente, ya en el formato de la pantalla
+            self.image = self._create_detailed_board().convert()
+            Board.surfaces[BOARD_SIZE] = self.image
+            if len(Board.surfaces) > BOARD_CACHE_SIZE:
+                Board.surfaces.popitem(last=False)
+        else:
+            Board.surfaces.move_to_end(BOARD_SIZE)
+        self.rect = self.image.get_rect(topleft=(BOARD_OFFSET_X, BOARD_OFFSET_Y))
     
     def _create_detailed_board(self) -> pygame.Surface:
         """Crea un tablero detallado de Ludo"""
@@ -814,23 +843,102 @@ class Board:
         """Dibuja el tablero"""
         screen.blit(self.image, self.rect)
 
+class LayerCache:
+    """Capas que casi nunca cambian (fondos, paneles, superposiciones) dibujadas una sola vez
+
+    Cada capa se guarda con las entradas con las que se construyó y se vuelve a
+    construir solo cuando cambian. Se guardan convertidas al formato de la
+    pantalla para que copiarlas en cada frame sea lo más barato posible.
+    """
+    def __init__(self):
+        self.layers: Dict[object, Tuple[object, pygame.Surface]] = {}
+        self.builds = 0
+
+    def get(self, name, inputs, build: Callable[..., pygame.Surface], *args) -> pygame.Surface:
+        """Devuelve la capa name; la construye con build(*args) si inputs cambió"""
+        cached = self.layers.get(name)
+        if cached is not None and cached[0] == inputs:
+            return cached[1]
+        surface = build(*args)
+        if surface.get_masks()[3]:  # Alfa por píxel (SRCALPHA); set_alpha también marca SRCALPHA en los flags
+            surface = surface.convert_alpha()
+        else:
+            # convert() pierde la opacidad de la superficie; copiarla con su alfa es
+            # más rápido que uno por píxel
+            alpha = surface.get_alpha()
+            surface.set_alpha(None)  # Con alfa, convert() daría un formato con canal alfa (más lento)
+            surface = surface.convert()
+            surface.set_alpha(alpha)
+        self.layers[name] = (inputs, surface)
+        self.builds += 1
+        return surface
+
+    def clear(self):
+        self.layers.clear()
+
+class TextCache:
+    """Textos ya renderizados por fuente, texto, suavizado y color, con descarte LRU
+
+    Los textos del HUD casi no cambian de un frame a otro: render() solo se
+    llama la primera vez. Las superficies devueltas son compartidas y no se
+    deben modificar (set_alpha, dibujar encima); para eso, hacer una copia.
+    """
+    def __init__(self, size: int = TEXT_CACHE_SIZE):
+        self.size = size
+        self.surfaces: "OrderedDict[tuple, pygame.Surface]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font: pygame.font.Font, text: str, antialias: bool, color: Tuple[int, int, int]) -> pygame.Surface:
+        """Como font.render(text, antialias, color), pero reutilizando lo ya renderizado"""
+        key = (font, text, antialias, color)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+        self.misses += 1
+        surface = font.render(text, antialias, color).convert_alpha()
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.size:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def stats(self) -> dict:
+        return {"text_hits": self.hits, "text_misses": self.misses, "text_cached": len(self.surfaces)}
+
 class LudoGame:
     """Clase principal del juego"""
-    def __init__(self):
-        self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    def __init__(self, seed: Optional[int] = None, window_size: Tuple[int, int] = (WINDOW_WIDTH, WINDOW_HEIGHT),
+                 fullscreen: bool = False):
+        # Ventana redimensionable; en pantalla completa toma el tamaño del escritorio
+        self.fullscreen = fullscreen
+        self.windowed_size = (max(window_size[0], MIN_WINDOW_SIZE[0]), max(window_size[1], MIN_WINDOW_SIZE[1]))
+        if fullscreen:
+            self.screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+        else:
+            self.screen = pygame.display.set_mode(self.windowed_size, pygame.RESIZABLE)
         pygame.display.set_caption("Ludo - Juego Interactivo")
         pygame.display.set_icon(pygame.Surface((32, 32)))  # Icono vacío por ahora
         self.clock = pygame.time.Clock()
+        self.resize_to = None       # Tamaño pedido por la ventana, pendiente de aplicar
+        self.resize_at = 0          # Momento en que se aplica (se retrasa mientras sigan llegando)
+        
+        # Generar los caminos del tablero para el tamaño de la ventana
+        set_window_size(*self.screen.get_size())
         
-        # Generar los caminos del tablero
-        global MAIN_PATH, HOME_PATHS
-        MAIN_PATH = generate_board_path()
-        HOME_PATHS = generate_home_paths()
+        # Flujos aleatorios con semilla: con la misma semilla y las mismas jugadas
+        # se repiten los mismos dados y las mismas decisiones de la IA
+        self.streams = MatchStreams(seed)
+        self.matches_played = 0
         
         # Componentes del juego
         self.board = Board()
-        self.dice = Dice()
+        self.dice = Dice(self.streams.dice(), self.streams.visual())
+        
+        self._pack_sprites()
         self.players = []
+        self.occupancy = ludo_engine.BoardOccupancy()
         self.current_player_index = 0
         self.state = GameState.MENU
         
@@ -840,19 +948,7 @@ class LudoGame:
         self.info_font = pygame.font.Font(None, 24)
         self.small_font = pygame.font.Font(None, 18)
         
-        # Botones del menú
-        self.menu_buttons = {
-            "2_players": pygame.Rect(350, 300, 200, 60),
-            "3_players": pygame.Rect(350, 380, 200, 60),
-            "4_players": pygame.Rect(350, 460, 200, 60),
-            "vs_ai": pygame.Rect(350, 540, 200, 60)
-        }
-        
-        # Botón para tirar el dado
-        self.roll_button = pygame.Rect(WINDOW_WIDTH // 2 - 80, WINDOW_HEIGHT - 100, 160, 50)
-        
-        # Botón de pausa
-        self.pause_button = pygame.Rect(WINDOW_WIDTH - 110, 10, 100, 40)
+        self._layout_buttons()
         
         self.winner = None
         self.selected_piece = None
@@ -862,6 +958,97 @@ class LudoGame:
         # Variables para animaciones
         self.animations = []
         self.messages = []
+        
+        # IA de búsqueda para los jugadores controlados por la computadora
+        self.search_ai = ludo_ai.MonteCarloAI(time_budget=AI_SEARCH_TIME) if AI_SEARCH_TIME else None
+        
+        # Juego en red: el hilo de ludo_client publica los mensajes del servidor como eventos
+        self.network: Optional[ludo_client.NetworkClient] = None
+        self.local_seat = -1
+        self.net_events = deque()   # Mensajes pendientes de mostrar, en orden
+        self.net_hold_until = 0     # Pausa tras una jugada rival para que se pueda seguir
+        self.pending_since = 0      # Momento en que se envió una acción aún sin respuesta
+        self.prediction = None      # [(ficha, progreso anterior), ...] de la jugada sin confirmar
+        self.corrections = 0        # Predicciones que el servidor corrigió
+        self.server_address = None
+        self.session = None         # (partida, asiento, ficha de sesión) para volver con RESUME
+        self.net_seq = 0            # Eventos de la partida recibidos
+        self.reconnect_attempts = 0
+        self.reconnect_at = 0       # Momento del próximo intento de reconexión (0 = ninguno)
+        self.resuming = False       # Se envió RESUME y falta RESUMED
+        
+        # Repintado por zonas: lo que se dibujó en el último frame, por elemento
+        self.scene: Optional[Dict[object, Tuple[pygame.Rect, object]]] = None  # None = repintar todo
+        self.frame_ticks = 0        # Momento del frame en curso (pulso de las fichas, mensajes)
+        self.layers = LayerCache()  # Fondos y paneles ya dibujados
+        self.text_cache = TextCache()  # Textos ya renderizados
+    
+    def _pack_sprites(self):
+        """Fichas de los cuatro colores y caras del dado en un solo atlas"""
+        sprites = [Piece(color, 0).image_key for color in ludo_engine.COLORS]
+        sprites += [(f"{name}.png", (100, 100)) for name in DICE_IMAGES.values()]
+        ludo_assets.ASSETS.pack_atlas(sprites)
+    
+    def _layout_buttons(self):
+        """Coloca los botones según el tamaño de la ventana"""
+        # Botones del menú, centrados
+        left = WINDOW_WIDTH // 2 - 100
+        top = WINDOW_HEIGHT // 2 - 150
+        self.menu_buttons = {
+            "2_players": pygame.Rect(left, top, 200, 60),
+            "3_players": pygame.Rect(left, top + 80, 200, 60),
+            "4_players": pygame.Rect(left, top + 160, 200, 60),
+            "vs_ai": pygame.Rect(left, top + 240, 200, 60)
+        }
+        
+        # Botón para tirar el dado
+        self.roll_button = pygame.Rect(WINDOW_WIDTH // 2 - 80, WINDOW_HEIGHT - 100, 160, 50)
+        
+        # Botón de pausa
+        self.pause_button = pygame.Rect(WINDOW_WIDTH - 110, 10, 100, 40)
+    
+    def request_resize(self, size: Tuple[int, int]):
+        """Anota el nuevo tamaño de la ventana; se aplica cuando deja de cambiar"""
+        self.resize_to = size
+        self.resize_at = pygame.time.get_ticks() + RESIZE_DEBOUNCE
+        self.scene = None  # Mientras tanto se repinta entera con la geometría anterior
+    
+    def apply_window_size(self, size: Tuple[int, int]):
+        """Ajusta la ventana (con su tamaño mínimo) y recoloca todo"""
+        self.resize_to = None
+        size = (max(size[0], MIN_WINDOW_SIZE[0]), max(size[1], MIN_WINDOW_SIZE[1]))
+        if not self.fullscreen:
+            self.windowed_size = size
+            if pygame.display.get_surface().get_size() != size:
+                pygame.display.set_mode(size, pygame.RESIZABLE)
+        self.screen = pygame.display.get_surface()
+        self.relayout(*self.screen.get_size())
+    
+    def relayout(self, width: int, height: int):
+        """Recoloca tablero, fichas, dado y botones para una ventana de width x height
+        
+        Todo lo caro (tablero, caminos, imágenes escaladas) sale de las cachés
+        si ese tamaño ya se usó antes.
+        """
+        set_window_size(width, height)
+        self.board.resize()
+        self._pack_sprites()
+        for player in self.players:
+            for piece in player.pieces:
+                piece.resize()
+        if not self.dice.rolling:
+            self.dice.rect.center = (WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2)
+        self._layout_buttons()
+        self.scene = None
+    
+    def toggle_fullscreen(self):
+        """Alterna entre pantalla completa y la ventana con su último tamaño"""
+        self.fullscreen = not self.fullscreen
+        if self.fullscreen:
+            pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+        else:
+            pygame.display.set_mode(self.windowed_size, pygame.RESIZABLE)
+        self.apply_window_size(pygame.display.get_surface().get_size())
     
     def add_message(self, text: str, duration: int = 2000):
         """Agrega un mensaje temporal a la pantalla"""
@@ -877,21 +1064,29 @@ class LudoGame:
         names = ["Jugador 1", "Jugador 2", "Jugador 3", "Jugador 4"]
         
         self.players = []
+        self.occupancy = ludo_engine.BoardOccupancy()
         
         if vs_ai:
             # Jugador humano siempre es rojo
-            self.players.append(Player("Jugador", colors[0], is_ai=False))
+            self.players.append(Player("Jugador", colors[0], is_ai=False, occupancy=self.occupancy))
             # Los demás son IA
             for i in range(1, num_players):
-                self.players.append(Player(f"IA {i}", colors[i], is_ai=True))
+                self.players.append(Player(f"IA {i}", colors[i], is_ai=True, occupancy=self.occupancy))
         else:
             for i in range(num_players):
-                self.players.append(Player(names[i], colors[i], is_ai=False))
+                self.players.append(Player(names[i], colors[i], is_ai=False, occupancy=self.occupancy))
+        
+        # Cada partida tiene sus propios flujos de dados y de IA
+        match_streams = self.streams.spawn("match", self.matches_played)
+        self.matches_played += 1
+        self.dice.source = match_streams.dice()
+        if self.search_ai is not None:
+            self.search_ai.rng = match_streams.ai()
         
         self.current_player_index = 0
         self.state = GameState.PLAYING
         self.turn_count = 0
-        self.game_history = []
+        self.game_history = []  # Tiradas de la partida (se pueden repetir con ludo_rng.ScriptedDice)
         self.add_message(f"¡Comienza {self.players[0].name}!", 2000)
     
     def handle_menu_click(self, pos: Tuple[int, int]):
@@ -909,17 +1104,44 @@ class LudoGame:
     
     def check_captures(self, piece: Piece):
         """Verifica si una ficha captura a otra"""
-        if piece.is_safe or piece.on_home_path:
+        square = ludo_engine.main_square(piece.color, piece.progress)
+        if square == 0 or ludo_engine.is_safe_square(square):
             return
         
-        for player in self.players:
-            if player.color != piece.color:
-                for enemy_piece in player.pieces:
-                    if (not enemy_piece.is_home and not enemy_piece.has_finished and 
-                        not enemy_piece.on_home_path and not enemy_piece.is_safe and
-                        enemy_piece.path_position == piece.path_position):
-                        enemy_piece.send_home()
-                        self.add_message(f"¡{piece.color} captura a {enemy_piece.color}!", 2000)
+        for enemy_piece in self.occupancy.enemies_at(square, piece.color):
+            enemy_piece.send_home()
+            self.add_message(f"¡{piece.color} captura a {enemy_piece.color}!", 2000)
+    
+    def play_move(self, piece: Piece) -> TurnOutcome:
+        """Mueve una ficha del jugador actual y resuelve capturas, victoria y turno"""
+        current_player = self.players[self.current_player_index]
+        piece.move(self.dice.value)
+        current_player.has_moved = True
+        
+        # Verificar capturas
+        self.check_captures(piece)
+        
+        # Actualizar fichas terminadas
+        current_player.update_finished_pieces()
+        
+        # Verificar si ganó
+        if current_player.check_winner():
+            self.winner = current_player
+            self.state = GameState.GAME_OVER
+            self.add_message(f"¡{current_player.name} ha ganado!", 5000)
+            return TurnOutcome.NEXT_PLAYER
+        
+        # Regla de los tres 6
+        outcome, current_player.consecutive_sixes = ludo_engine.turn_outcome(
+            self.dice.value, current_player.consecutive_sixes)
+        if outcome == TurnOutcome.ROLL_AGAIN:
+            current_player.can_roll = True
+            current_player.has_moved = False
+        else:
+            if outcome == TurnOutcome.THREE_SIXES:
+                self.add_message("¡Tres 6 seguidos! Pierde el turno", 2000)
+            self.next_turn()
+        return outcome
     
     def handle_game_click(self, pos: Tuple[int, int]):
         """Maneja los clicks durante el juego"""
@@ -932,9 +1154,7 @@ class LudoGame:
         
         # Click en el botón de tirar dado
         if self.roll_button.collidepoint(pos) and current_player.can_roll and not self.dice.rolling:
-            self.dice.roll()
-            self.state = GameState.ROLLING_DICE
-            current_player.can_roll = False
+            self.roll_dice(current_player)
             return
         
         # Click en una ficha
@@ -943,39 +1163,254 @@ class LudoGame:
             
             for piece in movable_pieces:
                 if piece.rect.collidepoint(pos):
-                    old_position = piece.path_position
-                    piece.move(self.dice.value)
-                    current_player.has_moved = True
-                    
-                    # Verificar capturas
-                    self.check_captures(piece)
-                    
-                    # Actualizar fichas terminadas
-                    current_player.update_finished_pieces()
-                    
-                    # Verificar si ganó
-                    if current_player.check_winner():
-                        self.winner = current_player
-                        self.state = GameState.GAME_OVER
-                        self.add_message(f"¡{current_player.name} ha ganado!", 5000)
-                    else:
-                        # Siguiente turno
-                        if self.dice.value == 6:
-                            current_player.consecutive_sixes += 1
-                            if current_player.consecutive_sixes >= 3:
-                                # Tres 6 seguidos, pierde el turno
-                                self.add_message("¡Tres 6 seguidos! Pierdes el turno", 2000)
-                                self.next_turn()
-                            else:
-                                # Puede tirar de nuevo
-                                current_player.can_roll = True
-                                current_player.has_moved = False
-                                self.add_message("¡Sacaste un 6! Tira de nuevo", 1500)
-                        else:
-                            current_player.consecutive_sixes = 0
-                            self.next_turn()
+                    if self.network is not None:
+                        # En red el servidor confirma la jugada; con predicción se ve ya
+                        current_player.has_moved = True
+                        if CLIENT_PREDICTION:
+                            self.predict_move(piece)
+                        self.send_action(ludo_protocol.encode_move(piece.index))
+                    elif self.play_move(piece) == TurnOutcome.ROLL_AGAIN:
+                        self.add_message("¡Sacaste un 6! Tira de nuevo", 1500)
                     break
     
+    def roll_dice(self, player: Player):
+        """Tira el dado del jugador local (en red se lo pide al servidor)"""
+        player.can_roll = False
+        if self.network is not None:
+            if CLIENT_PREDICTION:
+                # El dado gira ya; el valor llega del servidor
+                self.dice.roll(hold=True)
+                self.state = GameState.ROLLING_DICE
+            self.send_action(ludo_protocol.encode_roll())
+            return
+        self.dice.roll()
+        self.state = GameState.ROLLING_DICE
+    
+    def start_online(self, host: str, port: int, num_players: int = 2, ai_seats: int = 0):
+        """Se conecta al servidor y pide una partida; el tablero aparece cuando empieza"""
+        self.stop_online()
+        self.server_address = (host, port)
+        self.network = ludo_client.NetworkClient(host, port)
+        self.network.start()
+        self.network.send(ludo_protocol.encode_join(num_players, ai_seats))
+        self.net_events.clear()
+        self.pending_since = 0
+        self.state = GameState.WAITING
+        self.add_message(f"Conectando con {host}:{port}...", 3000)
+    
+    def stop_online(self):
+        """Cierra la conexión con el servidor (si la hay)"""
+        if self.network is not None:
+            self.network.close()
+            self.network = None
+        self.session = None
+        self.reconnect_at = 0
+        self.reconnect_attempts = 0
+        self.resuming = False
+    
+    def reconnect(self):
+        """Abre otra conexión y pide al servidor los eventos perdidos desde el último recibido"""
+        host, port = self.server_address
+        match_id, seat, token = self.session
+        self.network.close()
+        self.network = ludo_client.NetworkClient(host, port)
+        self.network.start()
+        self.network.send(ludo_protocol.encode_resume(match_id, seat, token, self.net_seq))
+        self.resuming = True
+    
+    def track_network_message(self, message: tuple):
+        """Cuenta los eventos al recibirlos (aunque aún no se hayan mostrado) para poder volver con RESUME"""
+        kind = message[0]
+        if kind in ludo_protocol.EVENTS:
+            self.net_seq += 1
+        elif kind == ludo_protocol.SNAPSHOT:
+            self.net_seq = message[4]
+            if message[2] != ludo_protocol.SPECTATOR:
+                self.session = (message[1], message[2], message[5])
+    
+    def send_action(self, frame: bytes):
+        """Envía una acción sin esperar: la respuesta llega después como evento"""
+        self.network.send(frame)
+        self.pending_since = pygame.time.get_ticks()
+    
+    def predict_move(self, piece: Piece):
+        """Aplica en el acto la jugada local, incluidas las capturas, hasta que el servidor responda"""
+        self.prediction = [(piece, piece.progress)]
+        piece.move(self.dice.value)
+        square = ludo_engine.main_square(piece.color, piece.progress)
+        if square and not ludo_engine.is_safe_square(square):
+            for enemy in list(self.occupancy.enemies_at(square, piece.color)):
+                self.prediction.append((enemy, enemy.progress))
+                enemy.send_home()
+    
+    def undo_prediction(self, glide: bool = True):
+        """Devuelve las fichas de la predicción a su sitio"""
+        for piece, progress in reversed(self.prediction):
+            old_center = piece.rect.center
+            piece.set_progress(progress)
+            if glide:
+                piece.glide_from(old_center)
+        self.prediction = None
+    
+    def reconcile_move(self, piece: Piece, progress: int):
+        """Compara la jugada confirmada por el servidor con la predicha"""
+        predicted, _ = self.prediction[0]
+        if predicted is piece and piece.progress == progress:
+            # Acierto: las capturas se deshacen sin animación porque el servidor
+            # envía CAPTURED justo después y se aplican en el mismo frame
+            del self.prediction[0]
+            self.undo_prediction(glide=False)
+            return
+        self.corrections += 1
+        self.undo_prediction()
+        old_center = piece.rect.center
+        piece.set_progress(progress)
+        piece.glide_from(old_center)
+    
+    def handle_connection_event(self, event):
+        """Cambios en la conexión publicados por el hilo de red"""
+        if event.connected:
+            if self.resuming:
+                self.add_message("Reconectado. Recuperando la partida...", 2000)
+            else:
+                self.add_message("Conectado. Esperando rivales...", 3000)
+            return
+        if (self.session is not None and self.state != GameState.GAME_OVER
+                and self.reconnect_attempts < RECONNECT_ATTEMPTS):
+            # La conexión muerta se queda hasta el próximo intento: lo que se envíe se pierde y
+            # RESUMED deshace lo que se predijo sin respuesta
+            self.reconnect_attempts += 1
+            self.reconnect_at = pygame.time.get_ticks() + RECONNECT_DELAY * self.reconnect_attempts
+            self.add_message(f"Conexión perdida. Reconectando ({self.reconnect_attempts}/{RECONNECT_ATTEMPTS})...",
+                             RECONNECT_DELAY * self.reconnect_attempts)
+            return
+        self.network = None
+        self.session = None
+        self.add_message(f"Sin conexión con el servidor: {event.error or 'cerrada'}", 4000)
+        if self.state != GameState.GAME_OVER:
+            self.state = GameState.MENU
+    
+    def process_network(self):
+        """Aplica en orden los mensajes del servidor sin cortar la animación del dado"""
+        now = pygame.time.get_ticks()
+        if self.reconnect_at and now >= self.reconnect_at:
+            self.reconnect_at = 0
+            self.reconnect()
+        while self.net_events and (not self.dice.rolling or self.dice.hold) and now >= self.net_hold_until:
+            self.apply_server_message(self.net_events.popleft())
+        for player in self.players:
+            for piece in player.pieces:
+                piece.update_animation()
+        
+        # El bucle nunca se bloquea: si el servidor no contesta solo se avisa
+        if self.pending_since and now - self.pending_since > 1000:
+            self.add_message("Esperando al servidor...", 1000)
+            self.pending_since = now
+    
+    def apply_server_message(self, message: tuple):
+        """Refleja en la interfaz un mensaje del servidor"""
+        kind = message[0]
+        if kind == ludo_protocol.JOINED:
+            self.add_message(f"Esperando {message[1]} rival(es)...", 3000)
+        elif kind == ludo_protocol.SNAPSHOT:
+            _, match_id, seat, state, _, _ = message
+            self.local_seat = seat
+            self.occupancy = ludo_engine.BoardOccupancy()
+            # Los asientos de los demás los controla el servidor (otros clientes o su IA)
+            self.players = [Player(f"Jugador {i + 1}" + (" (tú)" if i == seat else ""), ludo_engine.COLORS[i],
+                                   is_ai=i != seat, occupancy=self.occupancy)
+                            for i in range(state.num_players)]
+            state.apply_to_players(self.players)
+            for player in self.players:
+                player.can_roll = False
+            # Las instantáneas son siempre de antes de tirar: si es el turno local, toca tirar
+            self.players[seat].can_roll = state.current_player == seat
+            self.current_player_index = state.current_player
+            self.winner = None
+            self.turn_count = 0
+            self.game_history = []
+            self.state = GameState.PLAYING
+            self.add_message(f"Partida {match_id}: juegas con {self.players[seat].color}", 2000)
+        elif kind == ludo_protocol.TURN:
+            seat = message[1]
+            if seat != self.current_player_index:
+                self.turn_count += 1
+            self.current_player_index = seat
+            player = self.players[seat]
+            player.can_roll = seat == self.local_seat
+            player.has_moved = False
+            player.consecutive_sixes = 0
+            self.add_message(f"Turno de {player.name}", 1500)
+        elif kind == ludo_protocol.ROLLED:
+            _, seat, value, mask = message
+            player = self.players[seat]
+            player.can_roll = False
+            player.has_moved = False
+            if seat == self.local_seat:
+                self.pending_since = 0
+            if self.dice.hold:
+                self.dice.settle(value)  # Tirada predicha: solo falta el valor
+            else:
+                self.dice.roll(result=value)
+            self.state = GameState.ROLLING_DICE
+            if not mask:
+                self.add_message("No puede mover ninguna ficha", 1500)
+                # Con un 6 se vuelve a tirar aunque no se mueva
+                player.can_roll = value == 6 and seat == self.local_seat
+        elif kind == ludo_protocol.MOVED:
+            _, seat, index, progress, again = message
+            player = self.players[seat]
+            if seat == self.local_seat and self.prediction is not None:
+                self.reconcile_move(player.pieces[index], progress)
+            else:
+                player.pieces[index].set_progress(progress)
+            player.update_finished_pieces()
+            player.has_moved = not again
+            if again:
+                player.consecutive_sixes += 1
+                player.can_roll = seat == self.local_seat
+                self.add_message(f"¡{player.name} sacó un 6! Tira de nuevo", 1500)
+            if seat == self.local_seat:
+                self.pending_since = 0
+            else:
+                self.net_hold_until = pygame.time.get_ticks() + 500
+        elif kind == ludo_protocol.CAPTURED:
+            victim = self.players[message[1]].pieces[message[2]]
+            victim.send_home()
+            self.add_message(f"¡{self.players[self.current_player_index].color} captura a {victim.color}!", 2000)
+        elif kind == ludo_protocol.GAME_OVER:
+            if message[1] >= 0:
+                self.winner = self.players[message[1]]
+                self.state = GameState.GAME_OVER
+        elif kind == ludo_protocol.RESUMED:
+            self.resuming = False
+            self.reconnect_attempts = 0
+            self.pending_since = 0
+            # Lo enviado sin conexión no llegó (si hubiera llegado, su respuesta venía antes)
+            local = self.players[self.local_seat]
+            if self.dice.hold:
+                self.dice.cancel()
+                self.state = GameState.PLAYING
+                local.can_roll = self.current_player_index == self.local_seat
+            if self.prediction is not None:
+                self.undo_prediction()
+                local.has_moved = False
+            self.add_message("Partida recuperada", 1500)
+        elif kind == ludo_protocol.ERROR and self.resuming:
+            self.stop_online()
+            self.state = GameState.MENU
+            self.add_message(f"No se pudo volver a la partida: {message[1]}", 3000)
+        elif kind == ludo_protocol.ERROR:
+            self.pending_since = 0
+            self.add_message(message[1], 2000)
+            # El servidor rechazó la acción predicha: volver atrás
+            if self.dice.hold:
+                self.dice.cancel()
+                self.state = GameState.PLAYING
+            if self.prediction is not None:
+                self.undo_prediction()
+                self.players[self.local_seat].has_moved = False
+    
     def next_turn(self):
         """Pasa al siguiente turno"""
         self.turn_count += 1
@@ -994,7 +1429,7 @@ class LudoGame:
         """Ejecuta el turno de la IA"""
         current_player = self.players[self.current_player_index]
         
-        if not current_player.is_ai:
+        if not current_player.is_ai or self.network is not None:
             return
         
         if current_player.can_roll and not self.dice.rolling:
@@ -1005,37 +1440,11 @@ class LudoGame:
         elif not current_player.can_roll and not current_player.has_moved:
             # Seleccionar y mover ficha
             movable_pieces = current_player.get_movable_pieces(self.dice.value)
-            selected_piece = current_player.ai_select_piece(movable_pieces, self.players, self.dice.value)
+            selected_piece = self.select_ai_piece(current_player, movable_pieces)
             
             if selected_piece:
-                selected_piece.move(self.dice.value)
-                current_player.has_moved = True
-                
-                # Verificar capturas
-                self.check_captures(selected_piece)
-                
-                # Actualizar fichas terminadas
-                current_player.update_finished_pieces()
-                
-                # Verificar si ganó
-                if current_player.check_winner():
-                    self.winner = current_player
-                    self.state = GameState.GAME_OVER
-                    self.add_message(f"¡{current_player.name} ha ganado!", 5000)
-                else:
-                    # Siguiente turno
-                    if self.dice.value == 6:
-                        current_player.consecutive_sixes += 1
-                        if current_player.consecutive_sixes >= 3:
-                            self.add_message("¡Tres 6 seguidos! Pierde el turno", 2000)
-                            self.next_turn()
-                        else:
-                            current_player.can_roll = True
-                            current_player.has_moved = False
-                            pygame.time.set_timer(pygame.USEREVENT + 1, 1500)  # Programar siguiente tirada
-                    else:
-                        current_player.consecutive_sixes = 0
-                        self.next_turn()
+                if self.play_move(selected_piece) == TurnOutcome.ROLL_AGAIN:
+                    pygame.time.set_timer(pygame.USEREVENT + 1, 1500)  # Programar siguiente tirada
             else:
                 # No puede mover ninguna ficha
                 if self.dice.value != 6:
@@ -1044,6 +1453,16 @@ class LudoGame:
                     current_player.can_roll = True
                     pygame.time.set_timer(pygame.USEREVENT + 1, 1500)
     
+    def select_ai_piece(self, player: Player, movable_pieces: List[Piece]) -> Optional[Piece]:
+        """Elige la ficha de la IA con la búsqueda Monte Carlo o, si está desactivada, con la heurística"""
+        if self.search_ai is None or len(movable_pieces) <= 1:
+            return player.ai_select_piece(movable_pieces, self.players, self.dice.value)
+        
+        state = ludo_engine.MatchState.from_players(self.players, self.current_player_index, self.dice.value)
+        engine = ludo_engine.LudoEngine([p.color for p in self.players], state=state)
+        index = self.search_ai.select(engine, [piece.index for piece in movable_pieces])
+        return player.pieces[index]
+    
     def handle_events(self):
         """Maneja los eventos del juego"""
         for event in pygame.event.get():
@@ -1057,6 +1476,7 @@ class LudoGame:
                     self.handle_game_click(event.pos)
                 elif self.state == GameState.GAME_OVER:
                     # Volver al menú
+                    self.stop_online()
                     self.state = GameState.MENU
                 elif self.state == GameState.PAUSED:
                     # Click para resumir
@@ -1069,14 +1489,32 @@ class LudoGame:
                     elif self.state == GameState.PAUSED:
                         self.state = GameState.PLAYING
                     else:
+                        self.stop_online()
                         self.state = GameState.MENU
+                elif event.key == pygame.K_F11:
+                    self.toggle_fullscreen()
                 elif event.key == pygame.K_SPACE and self.state == GameState.PLAYING:
                     # Atajo para tirar el dado
                     current_player = self.players[self.current_player_index]
                     if current_player.can_roll and not self.dice.rolling and not current_player.is_ai:
-                        self.dice.roll()
-                        self.state = GameState.ROLLING_DICE
-                        current_player.can_roll = False
+                        self.roll_dice(current_player)
+            
+            elif event.type == ludo_client.NETWORK_EVENT:
+                if event.client is self.network:
+                    self.track_network_message(event.message)
+                    self.net_events.append(event.message)
+            
+            elif event.type == ludo_client.CONNECTION_EVENT:
+                if event.client is self.network:
+                    self.handle_connection_event(event)
+            
+            elif event.type == pygame.VIDEORESIZE:
+                if not self.fullscreen:
+                    self.request_resize(event.size)
+            
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                # El sistema borró la ventana: el próximo frame se repinta entera
+                self.scene = None
             
             elif event.type == pygame.USEREVENT + 1:
                 # Evento para la IA
@@ -1088,34 +1526,45 @@ class LudoGame:
     
     def update(self):
         """Actualiza la lógica del juego"""
+        if self.resize_to is not None and pygame.time.get_ticks() >= self.resize_at:
+            self.apply_window_size(self.resize_to)
+        
         if self.state == GameState.ROLLING_DICE:
             if self.dice.update():
                 self.state = GameState.PLAYING
-                
-                # Si no hay fichas que mover, manejar el turno
-                current_player = self.players[self.current_player_index]
-                movable_pieces = current_player.get_movable_pieces(self.dice.value)
-                
-                if not movable_pieces:
-                    self.add_message("No puedes mover ninguna ficha", 1500)
-                    if self.dice.value != 6:
-                        self.next_turn()
-                    else:
-                        current_player.can_roll = True
-                        if current_player.is_ai:
-                            pygame.time.set_timer(pygame.USEREVENT + 1, 1500)
-                elif current_player.is_ai:
-                    # Si es IA, programar su movimiento
-                    pygame.time.set_timer(pygame.USEREVENT + 1, 1000)
+                self.game_history.append(self.dice.value)
+                if self.network is None:
+                    self.resolve_roll()
+        
+        if self.network is not None:
+            self.process_network()
         
         # Actualizar mensajes
         current_time = pygame.time.get_ticks()
         self.messages = [msg for msg in self.messages 
                         if current_time - msg['time'] < msg['duration']]
     
-    def draw_menu(self):
-        """Dibuja el menú principal"""
-        self.screen.fill(WHITE)
+    def resolve_roll(self):
+        """Después de la animación del dado: pasar el turno o preparar a la IA"""
+        # Si no hay fichas que mover, manejar el turno
+        current_player = self.players[self.current_player_index]
+        movable_pieces = current_player.get_movable_pieces(self.dice.value)
+        
+        if not movable_pieces:
+            self.add_message("No puedes mover ninguna ficha", 1500)
+            if self.dice.value != 6:
+                self.next_turn()
+            else:
+                current_player.can_roll = True
+                if current_player.is_ai:
+                    pygame.time.set_timer(pygame.USEREVENT + 1, 1500)
+        elif current_player.is_ai:
+            # Si es IA, programar su movimiento
+            pygame.time.set_timer(pygame.USEREVENT + 1, 1000)
+    
+    def _build_menu_background(self) -> pygame.Surface:
+        """Fondo del menú: gradiente, título e instrucciones"""
+        surface = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
         
         # Fondo con gradiente
         for i in range(WINDOW_HEIGHT):
@@ -1124,21 +1573,43 @@ class LudoGame:
                 255 - i * 30 // WINDOW_HEIGHT,
                 255
             )
-            pygame.draw.line(self.screen, color, (0, i), (WINDOW_WIDTH, i))
+            pygame.draw.line(surface, color, (0, i), (WINDOW_WIDTH, i))
         
         # Título con sombra
-        shadow = self.title_font.render("LUDO", True, GRAY)
+        shadow = self.text_cache.render(self.title_font, "LUDO", True, GRAY)
         shadow_rect = shadow.get_rect(center=(WINDOW_WIDTH // 2 + 5, 100 + 5))
-        self.screen.blit(shadow, shadow_rect)
+        surface.blit(shadow, shadow_rect)
         
-        title = self.title_font.render("LUDO", True, BLACK)
+        title = self.text_cache.render(self.title_font, "LUDO", True, BLACK)
         title_rect = title.get_rect(center=(WINDOW_WIDTH // 2, 100))
-        self.screen.blit(title, title_rect)
+        surface.blit(title, title_rect)
         
         # Subtítulo
-        subtitle = self.menu_font.render("Juego Interactivo", True, DARK_GRAY)
+        subtitle = self.text_cache.render(self.menu_font, "Juego Interactivo", True, DARK_GRAY)
         subtitle_rect = subtitle.get_rect(center=(WINDOW_WIDTH // 2, 170))
-        self.screen.blit(subtitle, subtitle_rect)
+        surface.blit(subtitle, subtitle_rect)
+        
+        # Instrucciones
+        instructions = [
+            "Reglas del juego:",
+            "• Saca un 6 para sacar una ficha",
+            "• Si sacas un 6, tiras de nuevo",
+            "• Captura las fichas enemigas",
+            "• Las estrellas son zonas seguras",
+            "• Gana llevando todas tus fichas al centro"
+        ]
+        
+        y_pos = WINDOW_HEIGHT - 200
+        for instruction in instructions:
+            text = self.text_cache.render(self.small_font, instruction, True, DARK_GRAY)
+            text_rect = text.get_rect(center=(WINDOW_WIDTH // 2, y_pos))
+            surface.blit(text, text_rect)
+            y_pos += 25
+        return surface
+    
+    def draw_menu(self):
+        """Dibuja el menú principal"""
+        self.screen.blit(self.layers.get("menu", (WINDOW_WIDTH, WINDOW_HEIGHT), self._build_menu_background), (0, 0))
         
         # Botones con efecto hover
         mouse_pos = pygame.mouse.get_pos()
@@ -1168,34 +1639,14 @@ class LudoGame:
             else:
                 text = "Contra IA"
             
-            text_surface = self.menu_font.render(text, True, BLACK)
+            text_surface = self.text_cache.render(self.menu_font, text, True, BLACK)
             text_rect = text_surface.get_rect(center=rect.center)
             self.screen.blit(text_surface, text_rect)
-        
-        # Instrucciones
-        instructions = [
-            "Reglas del juego:",
-            "• Saca un 6 para sacar una ficha",
-            "• Si sacas un 6, tiras de nuevo",
-            "• Captura las fichas enemigas",
-            "• Las estrellas son zonas seguras",
-            "• Gana llevando todas tus fichas al centro"
-        ]
-        
-        y_pos = WINDOW_HEIGHT - 200
-        for instruction in instructions:
-            text = self.small_font.render(instruction, True, DARK_GRAY)
-            text_rect = text.get_rect(center=(WINDOW_WIDTH // 2, y_pos))
-            self.screen.blit(text, text_rect)
-            y_pos += 25
     
     def draw_game(self):
         """Dibuja el juego"""
-        # Fondo
-        self.screen.fill((240, 240, 240))
-        
-        # Dibujar tablero
-        self.board.draw(self.screen)
+        # Fondo y tablero, ya juntos en una capa
+        self.screen.blit(self.layers.get("partida", (WINDOW_WIDTH, WINDOW_HEIGHT), self._build_game_background), (0, 0))
         
         # Dibujar fichas
         for player in self.players:
@@ -1206,43 +1657,19 @@ class LudoGame:
         if not self.dice.rolling or self.state == GameState.ROLLING_DICE:
             self.dice.draw(self.screen)
         
-        # Panel de información
-        info_panel = pygame.Surface((200, 300))
-        info_panel.fill(WHITE)
-        info_panel.set_alpha(230)
-        self.screen.blit(info_panel, (10, 10))
-        
-        # Información de los jugadores
-        y_pos = 20
-        for i, player in enumerate(self.players):
-            # Indicador de turno actual
-            if i == self.current_player_index:
-                pygame.draw.circle(self.screen, player._get_pygame_color() if hasattr(player, '_get_pygame_color') else BLACK, 
-                                 (25, y_pos + 10), 8)
-            
-            # Nombre del jugador
-            text = self.info_font.render(f"{player.name}", True, BLACK)
-            self.screen.blit(text, (40, y_pos))
-            
-            # Fichas terminadas
-            finished_text = self.small_font.render(f"Fichas en meta: {player.finished_pieces}/4", True, GRAY)
-            self.screen.blit(finished_text, (40, y_pos + 20))
-            
-            y_pos += 60
-        
-        # Información del turno
-        turn_info = pygame.Surface((300, 80))
-        turn_info.fill(WHITE)
-        turn_info.set_alpha(230)
-        self.screen.blit(turn_info, (WINDOW_WIDTH - 310, 10))
+        # Paneles de información y de turno. El texto va en su propia capa: sobre el fondo
+        # semitransparente quedaría mezclado distinto; se rehace solo si cambia lo que muestra
+        self.screen.blit(self.layers.get("panel_info", (200, 300), self._build_panel, (200, 300)), (10, 10))
+        info_text = self.layers.get("info", (tuple((player.name, player.finished_pieces) for player in self.players),
+                                             self.current_player_index), self._build_info_text)
+        self.screen.blit(info_text, (10, 10))
         
         current_player = self.players[self.current_player_index]
-        turn_text = self.menu_font.render(f"Turno: {current_player.name}", True, current_player._get_pygame_color() if hasattr(current_player, '_get_pygame_color') else BLACK)
-        self.screen.blit(turn_text, (WINDOW_WIDTH - 300, 20))
-        
-        # Número de turno
-        turn_count_text = self.small_font.render(f"Turno #{self.turn_count + 1}", True, GRAY)
-        self.screen.blit(turn_count_text, (WINDOW_WIDTH - 300, 55))
+        self.screen.blit(self.layers.get("panel_turno", (300, 80), self._build_panel, (300, 80)),
+                         (WINDOW_WIDTH - 310, 10))
+        turn_text = self.layers.get("turno", (current_player.name, current_player.color, self.turn_count),
+                                    self._build_turn_text)
+        self.screen.blit(turn_text, (WINDOW_WIDTH - 310, 10))
         
         # Dibujar botón de tirar dado
         if current_player.can_roll and not self.dice.rolling and not current_player.is_ai:
@@ -1260,127 +1687,316 @@ class LudoGame:
             pygame.draw.rect(self.screen, button_color, self.roll_button, border_radius=25)
             pygame.draw.rect(self.screen, BLACK, self.roll_button, 3, border_radius=25)
             
-            text = self.menu_font.render("Tirar Dado", True, WHITE)
+            text = self.text_cache.render(self.menu_font, "Tirar Dado", True, WHITE)
             text_rect = text.get_rect(center=self.roll_button.center)
             self.screen.blit(text, text_rect)
             
             # Texto de atajo
-            shortcut_text = self.small_font.render("(Espacio)", True, GRAY)
+            shortcut_text = self.text_cache.render(self.small_font, "(Espacio)", True, GRAY)
             shortcut_rect = shortcut_text.get_rect(center=(self.roll_button.centerx, self.roll_button.bottom + 15))
             self.screen.blit(shortcut_text, shortcut_rect)
         
         # Botón de pausa
         pygame.draw.rect(self.screen, WHITE, self.pause_button, border_radius=5)
         pygame.draw.rect(self.screen, BLACK, self.pause_button, 2, border_radius=5)
-        pause_text = self.info_font.render("Pausa", True, BLACK)
+        pause_text = self.text_cache.render(self.info_font, "Pausa", True, BLACK)
         pause_rect = pause_text.get_rect(center=self.pause_button.center)
         self.screen.blit(pause_text, pause_rect)
         
         # Mostrar valor del dado
         if not self.dice.rolling:
-            dice_text = self.menu_font.render(f"Dado: {self.dice.value}", True, BLACK)
+            dice_text = self.text_cache.render(self.menu_font, f"Dado: {self.dice.value}", True, BLACK)
             dice_rect = dice_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 + 80))
             self.screen.blit(dice_text, dice_rect)
         
-        # Resaltar fichas movibles
-        if not current_player.can_roll and not current_player.has_moved and not current_player.is_ai:
-            movable_pieces = current_player.get_movable_pieces(self.dice.value)
-            for piece in movable_pieces:
-                # Dibujar un círculo pulsante alrededor de las fichas movibles
-                radius = 25 + math.sin(pygame.time.get_ticks() * 0.005) * 5
-                pygame.draw.circle(self.screen, current_player._get_pygame_color() if hasattr(current_player, '_get_pygame_color') else BLACK, 
-                                 piece.rect.center, int(radius), 3)
+        # Resaltar fichas movibles con un círculo pulsante
+        radius = self._highlight_radius()
+        for piece in self._highlighted_pieces():
+            pygame.draw.circle(self.screen, current_player._get_pygame_color() if hasattr(current_player, '_get_pygame_color') else BLACK, 
+                             piece.rect.center, radius, 3)
         
-        # Mostrar mensajes
-        y_pos = WINDOW_HEIGHT // 2 - 150
-        for msg in self.messages:
-            alpha = 255
-            elapsed = pygame.time.get_ticks() - msg['time']
-            if elapsed > msg['duration'] - 500:
-                # Desvanecer en los últimos 500ms
-                alpha = 255 * (msg['duration'] - elapsed) // 500
-            
-            text_surface = self.menu_font.render(msg['text'], True, BLACK)
+        # Mostrar mensajes: fondo y texto guardados por posición; al desvanecerse solo cambia su opacidad
+        for i, (text, alpha, bg_rect) in enumerate(self._message_layout()):
+            text_surface = self.layers.get(("mensaje", i), text, self.text_cache.render, self.menu_font, text, True, BLACK)
             text_surface.set_alpha(alpha)
-            text_rect = text_surface.get_rect(center=(WINDOW_WIDTH // 2, y_pos))
+            text_rect = text_surface.get_rect(center=bg_rect.center)
             
             # Fondo del mensaje
-            bg_surface = pygame.Surface((text_rect.width + 40, text_rect.height + 20))
-            bg_surface.fill(WHITE)
+            bg_surface = self.layers.get(("fondo_mensaje", i), bg_rect.size, self._build_message_background, bg_rect.size)
             bg_surface.set_alpha(alpha * 0.8)
-            bg_rect = bg_surface.get_rect(center=(WINDOW_WIDTH // 2, y_pos))
             self.screen.blit(bg_surface, bg_rect)
             
             self.screen.blit(text_surface, text_rect)
-            y_pos += 60
         
         # Si es turno de la IA, mostrar indicador
         if current_player.is_ai:
-            ai_text = self.info_font.render("IA pensando...", True, GRAY)
+            ai_text = self.text_cache.render(self.info_font, "IA pensando...", True, GRAY)
             ai_rect = ai_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT - 80))
             self.screen.blit(ai_text, ai_rect)
     
-    def draw_game_over(self):
-        """Dibuja la pantalla de fin de juego"""
-        # Fondo semitransparente sobre el juego
-        overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
-        overlay.fill(BLACK)
-        overlay.set_alpha(128)
-        self.screen.blit(overlay, (0, 0))
+    def _build_game_background(self) -> pygame.Surface:
+        """Fondo de la partida con el tablero"""
+        surface = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
+        surface.fill((240, 240, 240))
+        self.board.draw(surface)
+        return surface
+    
+    def _build_panel(self, size: Tuple[int, int]) -> pygame.Surface:
+        """Fondo blanco semitransparente de los paneles"""
+        panel = pygame.Surface(size)
+        panel.fill(WHITE)
+        panel.set_alpha(230)
+        return panel
+    
+    def _build_info_text(self) -> pygame.Surface:
+        """Jugadores y fichas en meta, sobre fondo transparente para ponerlos encima del panel"""
+        layer = pygame.Surface((200, 300), pygame.SRCALPHA)
         
-        # Panel de victoria
+        y_pos = 10
+        for i, player in enumerate(self.players):
+            # Indicador de turno actual
+            if i == self.current_player_index:
+                pygame.draw.circle(layer, player._get_pygame_color() if hasattr(player, '_get_pygame_color') else BLACK, 
+                                 (15, y_pos + 10), 8)
+            
+            # Nombre del jugador
+            text = self.text_cache.render(self.info_font, f"{player.name}", True, BLACK)
+            layer.blit(text, (30, y_pos))
+            
+            # Fichas terminadas
+            finished_text = self.text_cache.render(self.small_font, f"Fichas en meta: {player.finished_pieces}/4", True, GRAY)
+            layer.blit(finished_text, (30, y_pos + 20))
+            
+            y_pos += 60
+        return layer
+    
+    def _build_turn_text(self) -> pygame.Surface:
+        """Jugador en turno y número de turno, sobre fondo transparente"""
+        layer = pygame.Surface((300, 80), pygame.SRCALPHA)
+        
+        current_player = self.players[self.current_player_index]
+        turn_text = self.text_cache.render(self.menu_font, f"Turno: {current_player.name}", True, current_player._get_pygame_color() if hasattr(current_player, '_get_pygame_color') else BLACK)
+        layer.blit(turn_text, (10, 10))
+        
+        # Número de turno
+        turn_count_text = self.text_cache.render(self.small_font, f"Turno #{self.turn_count + 1}", True, GRAY)
+        layer.blit(turn_count_text, (10, 45))
+        return layer
+    
+    def _build_message_background(self, size: Tuple[int, int]) -> pygame.Surface:
+        """Fondo blanco de un mensaje; su opacidad se fija al dibujarlo"""
+        background = pygame.Surface(size)
+        background.fill(WHITE)
+        return background
+    
+    def _build_shade(self) -> pygame.Surface:
+        """Velo negro semitransparente sobre toda la ventana"""
+        shade = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
+        shade.fill(BLACK)
+        shade.set_alpha(128)
+        return shade
+    
+    def _build_game_over_panel(self) -> pygame.Surface:
+        """Panel de victoria con el ganador y las estadísticas"""
         panel_width = 600
         panel_height = 400
         panel = pygame.Surface((panel_width, panel_height))
         panel.fill(WHITE)
-        panel_rect = panel.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2))
+        winner_color = self.winner._get_pygame_color() if hasattr(self.winner, '_get_pygame_color') else BLACK
         
         # Borde del panel
-        pygame.draw.rect(panel, self.winner._get_pygame_color() if hasattr(self.winner, '_get_pygame_color') else BLACK, 
-                        panel.get_rect(), 10)
-        
-        self.screen.blit(panel, panel_rect)
+        pygame.draw.rect(panel, winner_color, panel.get_rect(), 10)
         
         # Mensaje de victoria
-        win_text = self.title_font.render("¡Victoria!", True, self.winner._get_pygame_color() if hasattr(self.winner, '_get_pygame_color') else BLACK)
-        win_rect = win_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 - 100))
-        self.screen.blit(win_text, win_rect)
+        win_text = self.text_cache.render(self.title_font, "¡Victoria!", True, winner_color)
+        panel.blit(win_text, win_text.get_rect(center=(panel_width // 2, panel_height // 2 - 100)))
         
         # Nombre del ganador
-        winner_text = self.menu_font.render(f"{self.winner.name} ha ganado", True, BLACK)
-        winner_rect = winner_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2))
-        self.screen.blit(winner_text, winner_rect)
+        winner_text = self.text_cache.render(self.menu_font, f"{self.winner.name} ha ganado", True, BLACK)
+        panel.blit(winner_text, winner_text.get_rect(center=(panel_width // 2, panel_height // 2)))
         
         # Estadísticas
-        stats_text = self.info_font.render(f"Turnos jugados: {self.turn_count}", True, GRAY)
-        stats_rect = stats_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 + 50))
-        self.screen.blit(stats_text, stats_rect)
+        stats_text = self.text_cache.render(self.info_font, f"Turnos jugados: {self.turn_count}", True, GRAY)
+        panel.blit(stats_text, stats_text.get_rect(center=(panel_width // 2, panel_height // 2 + 50)))
         
         # Instrucción para continuar
-        cont_text = self.menu_font.render("Haz clic para volver al menú", True, GRAY)
-        cont_rect = cont_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 + 120))
-        self.screen.blit(cont_text, cont_rect)
+        cont_text = self.text_cache.render(self.menu_font, "Haz clic para volver al menú", True, GRAY)
+        panel.blit(cont_text, cont_text.get_rect(center=(panel_width // 2, panel_height // 2 + 120)))
+        return panel
+    
+    def _build_paused_text(self) -> pygame.Surface:
+        """Textos de la pausa sobre fondo transparente, en una franja centrada de 160 px de alto"""
+        width = WINDOW_WIDTH
+        layer = pygame.Surface((width, 160), pygame.SRCALPHA)
+        
+        # Mensaje de pausa
+        pause_text = self.text_cache.render(self.title_font, "PAUSA", True, WHITE)
+        layer.blit(pause_text, pause_text.get_rect(center=(width // 2, 80 - 50)))
+        
+        # Instrucciones
+        resume_text = self.text_cache.render(self.menu_font, "Presiona ESC o haz clic para continuar", True, WHITE)
+        layer.blit(resume_text, resume_text.get_rect(center=(width // 2, 80 + 50)))
+        return layer
+    
+    def draw_game_over(self):
+        """Dibuja la pantalla de fin de juego"""
+        # Fondo semitransparente sobre el juego
+        self.screen.blit(self.layers.get("sombra", (WINDOW_WIDTH, WINDOW_HEIGHT), self._build_shade), (0, 0))
+        
+        # Panel de victoria
+        panel = self.layers.get("fin", (self.winner.name, self.winner.color, self.turn_count),
+                                self._build_game_over_panel)
+        self.screen.blit(panel, panel.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2)))
     
     def draw_paused(self):
         """Dibuja la pantalla de pausa"""
         # Fondo semitransparente
-        overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
-        overlay.fill(BLACK)
-        overlay.set_alpha(128)
-        self.screen.blit(overlay, (0, 0))
+        self.screen.blit(self.layers.get("sombra", (WINDOW_WIDTH, WINDOW_HEIGHT), self._build_shade), (0, 0))
+        self.screen.blit(self.layers.get("pausa", WINDOW_WIDTH, self._build_paused_text),
+                         (0, WINDOW_HEIGHT // 2 - 80))
+    
+    def draw_waiting(self):
+        """Dibuja la pantalla de espera mientras se forma la partida en red"""
+        self.screen.fill(WHITE)
         
-        # Mensaje de pausa
-        pause_text = self.title_font.render("PAUSA", True, WHITE)
-        pause_rect = pause_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 - 50))
-        self.screen.blit(pause_text, pause_rect)
+        title = self.text_cache.render(self.title_font, "LUDO EN RED", True, BLACK)
+        title_rect = title.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 - 80))
+        self.screen.blit(title, title_rect)
         
-        # Instrucciones
-        resume_text = self.menu_font.render("Presiona ESC o haz clic para continuar", True, WHITE)
-        resume_rect = resume_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 + 50))
-        self.screen.blit(resume_text, resume_rect)
+        # Puntos animados: la pantalla sigue viva aunque el servidor no conteste
+        dots = "." * (self.frame_ticks // 400 % 4)
+        waiting_text = self.text_cache.render(self.menu_font, f"Esperando rivales{dots}", True, DARK_GRAY)
+        self.screen.blit(waiting_text, waiting_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2)))
+        
+        back_text = self.text_cache.render(self.info_font, "ESC para volver al menú", True, GRAY)
+        self.screen.blit(back_text, back_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 + 60)))
+        
+        y_pos = WINDOW_HEIGHT // 2 + 120
+        for msg in self.messages:
+            text_surface = self.text_cache.render(self.info_font, msg['text'], True, BLACK)
+            self.screen.blit(text_surface, text_surface.get_rect(center=(WINDOW_WIDTH // 2, y_pos)))
+            y_pos += 30
     
-    def draw(self):
+    def _highlighted_pieces(self) -> List[Piece]:
+        """Fichas que el jugador local puede elegir en este momento"""
+        current_player = self.players[self.current_player_index]
+        if not current_player.can_roll and not current_player.has_moved and not current_player.is_ai:
+            return current_player.get_movable_pieces(self.dice.value)
+        return []
+    
+    def _highlight_radius(self) -> int:
+        """Radio del círculo pulsante de las fichas movibles en el frame en curso"""
+        return int(25 + math.sin(self.frame_ticks * 0.005) * 5)
+    
+    def _message_layout(self) -> List[Tuple[str, int, pygame.Rect]]:
+        """Mensajes de la partida: (texto, opacidad, zona del fondo)"""
+        layout = []
+        y_pos = WINDOW_HEIGHT // 2 - 150
+        for msg in self.messages:
+            alpha = 255
+            elapsed = self.frame_ticks - msg['time']
+            if elapsed > msg['duration'] - 500:
+                # Desvanecer en los últimos 500ms
+                alpha = 255 * (msg['duration'] - elapsed) // 500
+            width, height = self.menu_font.size(msg['text'])
+            bg_rect = pygame.Rect(0, 0, width + 40, height + 20)
+            bg_rect.center = (WINDOW_WIDTH // 2, y_pos)
+            layout.append((msg['text'], alpha, bg_rect))
+            y_pos += 60
+        return layout
+    
+    def _text_rect(self, font: pygame.font.Font, text: str, center: Tuple[int, int]) -> pygame.Rect:
+        """Zona que ocupa un texto centrado, sin llegar a dibujarlo"""
+        rect = pygame.Rect((0, 0), font.size(text))
+        rect.center = center
+        return rect
+    
+    def describe_frame(self) -> Dict[object, Tuple[pygame.Rect, object]]:
+        """Qué muestra cada elemento de la pantalla y qué zona ocupa
+        
+        Debe cubrir todo lo que dibuja draw_screen y cambia de un frame a otro:
+        si un elemento cambia de aspecto o de sitio se repintan su zona vieja y la nueva.
+        """
+        screen_rect = self.screen.get_rect()
+        if self.state == GameState.MENU:
+            mouse_pos = pygame.mouse.get_pos()
+            scene = {"pantalla": (screen_rect, "menu")}
+            for button_name, rect in self.menu_buttons.items():
+                scene[("boton", button_name)] = (rect.union(rect.move(5, 5)), rect.collidepoint(mouse_pos))
+            return scene
+        if self.state == GameState.WAITING:
+            return {"pantalla": (screen_rect, ("espera", self.frame_ticks // 400 % 4,
+                                              tuple(msg['text'] for msg in self.messages)))}
+        
+        if self.state == GameState.GAME_OVER:
+            look = ("fin", self.winner.name, self.turn_count)
+        elif self.state == GameState.PAUSED:
+            look = "pausa"
+        else:
+            look = "partida"  # Tirar el dado o mover no cambia el fondo
+        scene = {"pantalla": (screen_rect, look)}
+        
+        current_player = self.players[self.current_player_index]
+        highlighted = self._highlighted_pieces()
+        radius = self._highlight_radius()
+        for player in self.players:
+            for piece in player.pieces:
+                safe_mark = piece.is_safe and not piece.is_home and not piece.has_finished
+                rect = piece.rect.copy()  # update_position cambia el Rect de la ficha en el sitio
+                if piece in highlighted:
+                    rect = rect.union(pygame.Rect(0, 0, 2 * radius + 2, 2 * radius + 2).move(
+                        piece.rect.centerx - radius - 1, piece.rect.centery - radius - 1))
+                    scene[("ficha", player.color, piece.index)] = (rect, (safe_mark, radius))
+                else:
+                    scene[("ficha", player.color, piece.index)] = (rect, (safe_mark, 0))
+        
+        # Lo que no se ve no ensucia nada aunque cambie (el valor del dado mientras gira)
+        dice_visible = not self.dice.rolling or self.state == GameState.ROLLING_DICE
+        scene["dado"] = (self.dice.rect.union(self.dice.rect.move(5, 5)), dice_visible and self.dice.value)
+        dice_text = f"Dado: {self.dice.value}" if not self.dice.rolling else ""
+        scene["texto_dado"] = (self._text_rect(self.menu_font, dice_text, (WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 + 80)),
+                               dice_text)
+        
+        scene["info"] = (pygame.Rect(10, 10, 200, 300),
+                         (self.current_player_index,
+                          tuple((player.name, player.finished_pieces) for player in self.players)))
+        scene["turno"] = (pygame.Rect(WINDOW_WIDTH - 310, 10, 300, 80),
+                          (current_player.name, current_player.color, self.turn_count))
+        
+        show_roll = current_player.can_roll and not self.dice.rolling and not current_player.is_ai
+        roll_rect = self.roll_button
+        scene["boton_dado"] = (pygame.Rect(roll_rect.x, roll_rect.y, roll_rect.width + 3, roll_rect.height + 25),
+                               (show_roll, show_roll and roll_rect.collidepoint(pygame.mouse.get_pos())))
+        scene["ia"] = (self._text_rect(self.info_font, "IA pensando...", (WINDOW_WIDTH // 2, WINDOW_HEIGHT - 80)),
+                       current_player.is_ai)
+        
+        for i, (text, alpha, bg_rect) in enumerate(self._message_layout()):
+            scene[("mensaje", i)] = (bg_rect, (text, alpha))
+        return scene
+    
+    def dirty_rects(self, scene: Dict[object, Tuple[pygame.Rect, object]]) -> List[pygame.Rect]:
+        """Zonas que hay que repintar para pasar del último frame dibujado a scene"""
+        screen_rect = self.screen.get_rect()
+        if self.scene is None:
+            return [screen_rect]
+        dirty = []
+        for key, (rect, look) in scene.items():
+            old = self.scene.get(key)
+            if old is None:
+                dirty.append(rect)
+            elif old[1] != look or old[0] != rect:
+                dirty.append(old[0])
+                dirty.append(rect)
+        for key, (rect, _) in self.scene.items():
+            if key not in scene:
+                dirty.append(rect)
+        return merge_dirty_rects(dirty, screen_rect)
+    
+    def draw_screen(self):
         """Dibuja la pantalla según el estado del juego"""
+        if self.screen.get_size() != (WINDOW_WIDTH, WINDOW_HEIGHT):
+            # Redimensionando: la geometría anterior no cubre la ventana nueva
+            self.screen.fill((240, 240, 240))
         if self.state == GameState.MENU:
             self.draw_menu()
         elif self.state in [GameState.PLAYING, GameState.ROLLING_DICE, GameState.MOVING_PIECE]:
@@ -1391,8 +2007,32 @@ class LudoGame:
         elif self.state == GameState.PAUSED:
             self.draw_game()
             self.draw_paused()
+        elif self.state == GameState.WAITING:
+            self.draw_waiting()
+    
+    def draw(self):
+        """Muestra el frame; con DIRTY_RENDERING solo se repinta lo que cambió
+        
+        Cada zona sucia se repinta con la escena completa recortada a esa zona,
+        así que las superposiciones (sombras, capas semitransparentes) salen igual
+        que al repintar la ventana entera. Sin cambios no se dibuja nada.
+        """
+        self.frame_ticks = pygame.time.get_ticks()
+        if not DIRTY_RENDERING:
+            self.draw_screen()
+            pygame.display.flip()
+            return
         
-        pygame.display.flip()
+        scene = self.describe_frame()
+        dirty = self.dirty_rects(scene)
+        self.scene = scene
+        if not dirty:
+            return
+        for rect in dirty:
+            self.screen.set_clip(rect)
+            self.draw_screen()
+        self.screen.set_clip(None)
+        pygame.display.update(dirty)
     
     def run(self):
         """Bucle principal del juego"""
@@ -1408,5 +2048,21 @@ class LudoGame:
         sys.exit()
 
 if __name__ == "__main__":
-    game = LudoGame()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Ludo - Juego Interactivo")
+    parser.add_argument("seed", type=int, nargs="?", help="semilla para repetir una partida")
+    parser.add_argument("--connect", metavar="HOST:PORT", help="jugar en red contra un servidor")
+    parser.add_argument("--players", type=int, default=2, choices=[2, 3, 4])
+    parser.add_argument("--ai", type=int, default=0, help="asientos ocupados por la IA del servidor")
+    parser.add_argument("--size", default=f"{WINDOW_WIDTH}x{WINDOW_HEIGHT}", metavar="ANCHOxALTO",
+                        help="tamaño inicial de la ventana (se puede cambiar arrastrando el borde)")
+    parser.add_argument("--fullscreen", action="store_true", help="pantalla completa (F11 alterna)")
+    args = parser.parse_args()
+    
+    width, height = (int(n) for n in args.size.lower().split("x"))
+    game = LudoGame(args.seed, (width, height), args.fullscreen)
+    if args.connect:
+        host, port = args.connect.rsplit(":", 1)
+        game.start_online(host, int(port), args.players, args.ai)
     game.run() 
\ No newline at end of file
@@ -0,0 +1,755 @@
+import argparse
+import asyncio
+import multiprocessing
+import json
+import math
+import os
+import platform
+import random
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+import ludo_ai
+import ludo_lobby
+import ludo_protocol as proto
+import ludo_server
+from ludo_engine import COLORS, LudoEngine
+
+# Test de carga del servidor: muchos clientes bot en localhost que juegan
+# partidas completas y miden cuánto tarda el servidor en confirmar cada acción.
+# Con --spectators, además, miles de espectadores miran una misma partida.
+# Con --resync mide cuánto cuesta volver a una partida tras perder la conexión.
+# El informe (-o) guarda latencias por tipo de mensaje, errores y la CPU y memoria
+# del servidor a lo largo de la prueba, y -c lo compara con uno anterior.
+
+CONNECT_BATCH = 500  # Conexiones abiertas a la vez (no desbordar la cola de accept del servidor)
+STALL_TIMEOUT = 5.0  # Segundos sin respuesta a una acción que cuentan como error
+BUCKETS_PER_DECADE = 20
+TIMED = (proto.JOIN, proto.ROLL, proto.MOVE)  # Acciones cuya confirmación se mide
+ERROR_KINDS = ("server", "connect", "closed", "stalled")
+AI_STATS = ("ai_decisions", "ai_overloaded", "ai_late", "ai_cancelled", "ai_failed")
+
+
+class LatencyHistogram:
+    """Histograma de latencias con cubetas logarítmicas (unos 12 % de ancho)
+
+    Ocupa lo mismo con diez muestras que con diez millones, y los de varios
+    procesos se suman cubeta a cubeta.
+    """
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.max_ns = 0
+
+    def add(self, ns: int):
+        bucket = int(math.log10(ns) * BUCKETS_PER_DECADE) if ns > 0 else 0
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def merge(self, other: "LatencyHistogram"):
+        for bucket, count in other.buckets.items():
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+        self.count += other.count
+        self.max_ns = max(self.max_ns, other.max_ns)
+
+    def percentile(self, fraction: float) -> float:
+        """Límite superior (en ns) de la cubeta donde cae el percentil"""
+        if not self.count:
+            return 0.0
+        rank = min(self.count - 1, int(fraction * self.count))
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen > rank:
+                return min(10 ** ((bucket + 1) / BUCKETS_PER_DECADE), self.max_ns)
+        return float(self.max_ns)
+
+    def to_dict(self) -> dict:
+        return {"count": self.count, "p50_ms": self.percentile(0.50) / 1e6, "p95_ms": self.percentile(0.95) / 1e6,
+                "p99_ms": self.percentile(0.99) / 1e6, "max_ms": self.max_ns / 1e6,
+                "buckets": {str(bucket): count for bucket, count in sorted(self.buckets.items())}}
+
+
+class BotClient:
+    """Cliente automático que juega partidas seguidas hasta la hora límite (y abandona la que esté jugando)
+
+    Con policy elige la ficha con esa política de ludo_ai (la "heuristic" es la de
+    Player.ai_select_piece) sobre su copia del estado; sin ella, una al azar.
+    """
+    def __init__(self, players: int, deadline: float, seed: int, ai: int = 0, think: float = 0.0,
+                 on_match=None, policy: Optional[str] = None):
+        self.players = players
+        self.ai = ai
+        self.deadline = deadline
+        self.think = think          # Segundos que "piensa" antes de cada acción
+        self.on_match = on_match    # on_match(partida) al empezar cada partida
+        self.rng = random.Random(seed)
+        self.policy = ludo_ai.get_policy(policy) if policy else None
+        self.state = None
+        self.engine = None
+        self.seat = -1
+        self.sent_at = 0
+        self.pending = 0            # Tipo de la acción que espera respuesta (0 = ninguna)
+        self.latencies: Dict[int, LatencyHistogram] = {kind: LatencyHistogram() for kind in TIMED}
+        self.games = 0
+        self.sent = 0
+        self.received = 0
+        self.errors: Dict[str, int] = dict.fromkeys(ERROR_KINDS, 0)
+
+    def _send(self, writer: asyncio.StreamWriter, frame: bytes):
+        if self.think:
+            # Con algo de variación, para que miles de bots no actúen al compás
+            delay = self.think * self.rng.uniform(0.5, 1.5)
+            asyncio.get_running_loop().call_later(delay, self._write, writer, frame)
+        else:
+            self._write(writer, frame)
+
+    def _write(self, writer: asyncio.StreamWriter, frame: bytes):
+        self.sent_at = time.perf_counter_ns()
+        self.pending = frame[2]
+        if not writer.is_closing():
+            writer.write(frame)
+            self.sent += 1
+
+    def _ack(self, kind: int):
+        if self.pending == kind:
+            self.latencies[kind].add(time.perf_counter_ns() - self.sent_at)
+            self.pending = 0
+
+    def _check_stall(self):
+        if self.pending and time.perf_counter_ns() - self.sent_at > STALL_TIMEOUT * 1e9:
+            self.errors["stalled"] += 1
+            self.pending = 0  # Se cuenta una vez; si la respuesta llega después no se mide
+
+    async def run(self, host: str, port: int, connecting: Optional[asyncio.Semaphore] = None):
+        try:
+            if connecting is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            else:
+                async with connecting:
+                    reader, writer = await asyncio.open_connection(host, port)
+        except OSError:
+            self.errors["connect"] += 1
+            return
+        frames = proto.FrameReader()
+        self._send(writer, proto.encode_join(self.players, self.ai))
+        try:
+            while time.time() < self.deadline:
+                try:
+                    data = await asyncio.wait_for(reader.read(65536), 1.0)
+                except asyncio.TimeoutError:
+                    self._check_stall()
+                    continue
+                if not data:
+                    self.errors["closed"] += 1
+                    break
+                for message in frames.feed(data):
+                    self.received += 1
+                    self.handle(writer, message)
+        except OSError:
+            self.errors["closed"] += 1
+        finally:
+            writer.close()
+
+    def handle(self, writer: asyncio.StreamWriter, message: tuple):
+        self.track(message)
+        self.react(writer, message)
+
+    def track(self, message: tuple):
+        """Mantiene la copia local del estado de la partida"""
+        kind = message[0]
+        if kind == proto.SNAPSHOT:
+            self.state = message[3]
+            if self.policy is not None:
+                self.engine = LudoEngine(COLORS[:self.players], state=self.state)
+        elif kind in proto.EVENTS and self.state is not None:
+            proto.apply_message(self.state, message)
+
+    def choose(self, moves: List[int]) -> int:
+        if self.engine is None or len(moves) == 1:
+            return self.rng.choice(moves)
+        return self.policy(self.engine, list(moves))
+
+    def react(self, writer: asyncio.StreamWriter, message: tuple):
+        """Responde a un mensaje como lo haría un jugador"""
+        kind = message[0]
+        if kind == proto.SNAPSHOT:
+            self.seat = message[2]
+            self._ack(proto.JOIN)
+            if self.on_match is not None:
+                self.on_match(message[1])
+        elif kind == proto.GAME_OVER:
+            self.games += 1
+            self.seat = -1
+            self.state = self.engine = None
+            self._send(writer, proto.encode_join(self.players, self.ai))
+        elif kind == proto.ERROR:
+            self.errors["server"] += 1
+            self.pending = 0
+        elif kind in (proto.TURN, proto.ROLLED, proto.MOVED) and message[1] == self.seat:
+            if kind == proto.TURN:
+                self._send(writer, proto.encode_roll())
+            elif kind == proto.ROLLED:
+                self._ack(proto.ROLL)
+                moves = proto.MASK_MOVES[message[3]]
+                if moves:
+                    self._send(writer, proto.encode_move(self.choose(moves)))
+                elif message[2] == 6:
+                    self._send(writer, proto.encode_roll())
+            else:
+                self._ack(proto.MOVE)
+                if message[4]:
+                    self._send(writer, proto.encode_roll())
+
+
+async def _run_bots(host: str, port: int, bots: int, players: int, deadline: float, seed: int,
+                    think: float = 0.0, policy: Optional[str] = None, ai: int = 0) -> dict:
+    connecting = asyncio.Semaphore(CONNECT_BATCH)
+    clients = [BotClient(players, deadline, seed + i, ai, think, policy=policy) for i in range(bots)]
+    await asyncio.gather(*(client.run(host, port, connecting) for client in clients))
+    latencies = {kind: LatencyHistogram() for kind in TIMED}
+    for client in clients:
+        for kind in TIMED:
+            latencies[kind].merge(client.latencies[kind])
+    return {
+        "games": sum(c.games for c in clients),
+        "sent": sum(c.sent for c in clients),
+        "received": sum(c.received for c in clients),
+        "errors": {key: sum(c.errors[key] for c in clients) for key in ERROR_KINDS},
+        "latencies": latencies,
+    }
+
+
+def run_bots(args) -> dict:
+    """Punto de entrada de un proceso de clientes"""
+    return asyncio.run(_run_bots(*args))
+
+
+class SpectatorClient:
+    """Espectador: mira una partida hasta que termina y sigue el estado con los mensajes"""
+    def __init__(self, match_id: int, deadline: float):
+        self.match_id = match_id
+        self.deadline = deadline
+        self.state = None
+        self.frames = 0
+        self.bytes = 0
+        self.errors = 0
+        self.finished = False
+
+    async def run(self, host: str, port: int, connecting: asyncio.Semaphore):
+        async with connecting:
+            reader, writer = await asyncio.open_connection(host, port)
+        writer.write(proto.encode_watch(self.match_id))
+        frames = proto.FrameReader()
+        try:
+            while not self.finished and time.time() < self.deadline:
+                try:
+                    data = await asyncio.wait_for(reader.read(65536), 1.0)
+                except asyncio.TimeoutError:
+                    continue
+                if not data:
+                    break
+                self.bytes += len(data)
+                for message in frames.feed(data):
+                    self.handle(message)
+        finally:
+            writer.close()
+
+    def handle(self, message: tuple):
+        kind = message[0]
+        self.frames += 1
+        if kind == proto.ERROR:
+            self.errors += 1
+            self.finished = True
+        elif self.state is not None or kind == proto.SNAPSHOT:
+            self.state = proto.apply_message(self.state, message)
+            self.finished = self.state.winner is not None
+
+
+async def _run_spectators(host: str, port: int, match_id: int, count: int, deadline: float) -> dict:
+    connecting = asyncio.Semaphore(CONNECT_BATCH)
+    clients = [SpectatorClient(match_id, deadline) for _ in range(count)]
+    outcomes = await asyncio.gather(*(client.run(host, port, connecting) for client in clients),
+                                    return_exceptions=True)
+    return {
+        "spectators": count,
+        "failed": sum(isinstance(outcome, Exception) for outcome in outcomes),
+        "finished": sum(c.finished and not c.errors for c in clients),
+        "frames": sum(c.frames for c in clients),
+        "bytes": sum(c.bytes for c in clients),
+        "errors": sum(c.errors for c in clients),
+    }
+
+
+def run_spectators(args) -> dict:
+    """Punto de entrada de un proceso de espectadores"""
+    return asyncio.run(_run_spectators(*args))
+
+
+class TrackingBot(BotClient):
+    """Bot que además sigue el estado de la partida y el número del último evento"""
+    def __init__(self, deadline: float, seed: int, think: float = 0.0):
+        super().__init__(2, deadline, seed, think=think)
+        self.seq = 0
+        self.session = None      # (partida, asiento, ficha de sesión)
+        self.actions = 0
+        self.replaying = False   # Recibiendo lo perdido: se aplica sin responder
+        self.resumed = asyncio.Event()
+        self.over = False
+
+    def _write(self, writer: asyncio.StreamWriter, frame: bytes):
+        self.actions += 1
+        super()._write(writer, frame)
+
+    def track(self, message: tuple):
+        super().track(message)
+        kind = message[0]
+        if kind == proto.SNAPSHOT:
+            self.seq = message[4]
+            self.session = message[1], message[2], message[5]
+        elif kind in proto.EVENTS:
+            self.seq += 1
+
+    def react(self, writer: asyncio.StreamWriter, message: tuple):
+        kind = message[0]
+        if kind == proto.RESUMED:
+            self.replaying = False
+            self.resumed.set()
+        elif kind == proto.GAME_OVER:
+            self.over = True  # Una sola partida: no pide otra
+        elif not self.replaying:
+            super().react(writer, message)
+
+
+async def _read_until(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, bot: TrackingBot,
+                      frames: proto.FrameReader, done) -> int:
+    """Pasa los mensajes al bot hasta que done() se cumpla; devuelve los bytes recibidos"""
+    received = 0
+    while not done():
+        data = await asyncio.wait_for(reader.read(65536), 10.0)
+        if not data:
+            raise ConnectionError("El servidor cerró la conexión")
+        received += len(data)
+        for message in frames.feed(data):
+            bot.handle(writer, message)
+    return received
+
+
+async def _probe_resync(host: str, port: int, offline: float, drop_after: int, think: float, seed: int) -> dict:
+    """Dos bots empiezan una partida; uno corta la conexión, espera offline segundos y vuelve con RESUME"""
+    deadline = time.time() + offline + 60
+    dropped, partner = TrackingBot(deadline, seed), TrackingBot(deadline, seed + 1, think)
+    partner_task = asyncio.ensure_future(partner.run(host, port))
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+        dropped._send(writer, proto.encode_join(2))
+        await _read_until(reader, writer, dropped, proto.FrameReader(),
+                          lambda: dropped.actions > drop_after or dropped.over)
+        writer.transport.abort()  # Corte brusco, como al perder la red
+        last_seq = dropped.seq
+        await asyncio.sleep(offline)
+        if partner.over:
+            return {"over": True}
+
+        started = time.perf_counter()
+        reader, writer = await asyncio.open_connection(host, port)
+        match_id, seat, token = dropped.session
+        dropped.replaying = True
+        writer.write(proto.encode_resume(match_id, seat, token, last_seq))
+        frames = proto.FrameReader()
+        snapshots, errors = [], []
+        handle = dropped.handle
+
+        def watch_resync(writer, message):
+            if message[0] == proto.SNAPSHOT:
+                snapshots.append(message[4])
+            elif message[0] == proto.ERROR:
+                errors.append(message[1])
+                dropped.resumed.set()
+            handle(writer, message)
+
+        dropped.handle = watch_resync
+        received = await _read_until(reader, writer, dropped, frames, dropped.resumed.is_set)
+        if errors:
+            await asyncio.sleep(0.1)  # El GAME_OVER puede llegar al compañero justo después
+            if partner.over:
+                return {"over": True}
+            raise ConnectionError(errors[0])
+        seconds = time.perf_counter() - started
+        # Sin responder más, la partida se para en su turno: los dos deben llegar al mismo evento y estado
+        dropped.replaying = True
+        try:
+            await asyncio.wait_for(_read_until(reader, writer, dropped, frames,
+                                               lambda: partner.seq == dropped.seq or partner.over), 2.0)
+        except asyncio.TimeoutError:
+            pass
+        writer.close()
+        return {"over": False, "seconds": seconds, "bytes": received, "missed": dropped.seq - last_seq,
+                "snapshot": bool(snapshots), "in_sync": partner.seq == dropped.seq and partner.state == dropped.state}
+    finally:
+        partner_task.cancel()
+        await asyncio.gather(partner_task, return_exceptions=True)
+
+
+def measure_resync(host: str, port: int, offlines: List[float], samples: int, drop_after: int, think: float,
+                   seed: int):
+    print(f"{'Corte':>7} {'Muestras':>9} {'Eventos perdidos':>17} {'Instantánea':>12} {'Bytes':>7} "
+          f"{'p50':>8} {'máx':>8} {'Desincronizados':>16}")
+    for offline in offlines:
+        results = [asyncio.run(_probe_resync(host, port, offline, drop_after, think, seed + 2 * i))
+                   for i in range(samples)]
+        done = [r for r in results if not r["over"]]
+        if not done:
+            print(f"{offline:>6.2f}s  todas las partidas terminaron durante el corte")
+            continue
+        times = [r["seconds"] * 1e9 for r in done]
+        print(f"{offline:>6.2f}s {len(done):>9} {sum(r['missed'] for r in done) / len(done):>17.1f} "
+              f"{sum(r['snapshot'] for r in done):>7}/{len(done):<4} {sum(r['bytes'] for r in done) / len(done):>7.0f} "
+              f"{percentile(times, 0.5) / 1e6:>6.2f}ms {max(times) / 1e6:>6.2f}ms "
+              f"{sum(not r['in_sync'] for r in done):>16}")
+
+
+def start_featured(host: str, port: int, deadline: float, think: float, seed: int) -> int:
+    """Un bot con think time juega contra la IA del servidor la partida que miran los espectadores
+
+    Corre en un hilo de este proceso; devuelve el número de la partida en cuanto empieza.
+    """
+    started = threading.Event()
+    match_ids = []
+
+    def on_match(match_id: int):
+        if not match_ids:
+            match_ids.append(match_id)
+            started.set()
+
+    bot = BotClient(2, deadline, seed, ai=1, think=think, on_match=on_match)
+    threading.Thread(target=lambda: asyncio.run(bot.run(host, port)), name="ludo-featured", daemon=True).start()
+    if not started.wait(10.0):
+        raise RuntimeError("La partida de los espectadores no empezó")
+    return match_ids[0]
+
+
+async def _query_stats(host: str, port: int) -> dict:
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(proto.encode_stats_request())
+    message = await proto.read_message(reader)
+    writer.close()
+    return message[1]
+
+
+def query_stats(host: str, port: int, timeout: float = 10.0) -> dict:
+    """Pide las estadísticas al servidor (esperando a que arranque)"""
+    give_up = time.time() + timeout
+    while True:
+        try:
+            return asyncio.run(_query_stats(host, port))
+        except OSError:
+            if time.time() > give_up:
+                raise
+            time.sleep(0.05)
+
+
+class ServerSampler:
+    """Pide las estadísticas al servidor cada interval segundos desde un hilo
+
+    Cada muestra guarda la CPU usada en el intervalo (en % de un núcleo), la
+    memoria y el ritmo de movimientos y partidas.
+    """
+    def __init__(self, host: str, port: int, interval: float):
+        self.host = host
+        self.port = port
+        self.interval = interval
+        self.timeline: List[dict] = []
+        self.failures = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="ludo-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        started = time.perf_counter()
+        previous, previous_at = None, started
+        while not self._stop.wait(self.interval if previous is not None else 0):
+            try:
+                stats = asyncio.run(_query_stats(self.host, self.port))
+            except OSError:
+                self.failures += 1
+                continue
+            now = time.perf_counter()
+            if previous is not None:
+                elapsed = now - previous_at
+                self.timeline.append({
+                    "t": round(now - started, 2),
+                    "cpu_percent": round((stats["cpu"] - previous["cpu"]) / elapsed * 100, 1),
+                    "rss_mib": round(stats["rss"] / 2**20, 1),
+                    "moves_per_s": round((stats["moves"] - previous["moves"]) / elapsed),
+                    "finished_per_s": round((stats["matches_finished"] - previous["matches_finished"]) / elapsed, 1),
+                    "connections": stats["connections"],
+                    "matches": stats["matches"],
+                })
+            previous, previous_at = stats, now
+
+
+def build_report(args, seconds: float, before: dict, after: dict, results: List[dict],
+                 timeline: List[dict]) -> dict:
+    """Informe en JSON del test de carga, comparable entre ejecuciones con --compare"""
+    latencies = {kind: LatencyHistogram() for kind in TIMED}
+    for result in results:
+        for kind in TIMED:
+            latencies[kind].merge(result["latencies"][kind])
+    finished = after["matches_finished"] - before["matches_finished"]
+    moves = after["moves"] - before["moves"]
+    cpu = after["cpu"] - before["cpu"]
+    acks = sum(latencies[kind].count for kind in TIMED)
+    rss_peak = max([sample["rss_mib"] for sample in timeline] + [after["rss"] / 2**20])
+    connections = max([sample["connections"] for sample in timeline] + [after["connections"]])
+    send = {}
+    if "send_writes" in after:
+        writes = after["send_writes"] - before["send_writes"]
+        frames = after["send_frames"] - before["send_frames"]
+        send = {
+            "send_frames_per_move": frames / moves if moves else 0.0,
+            "send_writes_per_move": writes / moves if moves else 0.0,
+            "send_bytes_per_write": (after["send_bytes"] - before["send_bytes"]) / writes if writes else 0.0,
+            "send_buffered_max": after["send_buffered_max"],
+            "slow_downgraded": after["slow_downgraded"] - before["slow_downgraded"],
+            "slow_disconnected": after["slow_disconnected"] - before["slow_disconnected"],
+        }
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        },
+        "summary": {
+            "seconds": seconds,
+            "bots": args.matches * (args.players - args.ai_seats),
+            "matches_finished": finished,
+            "finished_per_s": finished / seconds,
+            "moves": moves,
+            "moves_per_s": moves / seconds,
+            "actions_per_s": acks / seconds,
+            "client_sent": sum(r["sent"] for r in results),
+            "client_received": sum(r["received"] for r in results),
+            "server_cpu_s": cpu,
+            "server_cpu_us_per_move": cpu / moves * 1e6 if moves else 0.0,
+            "server_rss_mib": after["rss"] / 2**20,
+            "server_rss_peak_mib": rss_peak,
+            # Memoria que añade cada cliente conectado (respecto al servidor en reposo de antes de empezar)
+            "server_kib_per_connection": (rss_peak - before["rss"] / 2**20) * 1024 / connections if connections else 0.0,
+            **send,
+        },
+        "errors": {key: sum(r["errors"][key] for r in results) for key in ERROR_KINDS},
+        "server_ai": {key: after[key] - before.get(key, 0) for key in AI_STATS if key in after},
+        "latency": {proto.NAMES[kind]: latencies[kind].to_dict() for kind in TIMED},
+        "timeline": timeline,
+    }
+
+
+def print_report(report: dict, after: dict):
+    summary, args = report["summary"], report["meta"]["args"]
+    seconds, cpu, moves = summary["seconds"], summary["server_cpu_s"], summary["moves"]
+    finished = summary["matches_finished"]
+    print(f"{args['matches']} partidas simultáneas de {args['players']} jugadores durante {seconds:.1f} s "
+          f"(bots con IA {args['bot_ai']}, piensan {args['bot_think']:.2f} s)")
+    print(f"Partidas terminadas: {finished} ({finished / seconds:.1f}/s), movimientos: {moves} ({moves / seconds:.0f}/s), "
+          f"acciones confirmadas: {summary['actions_per_s']:.0f}/s")
+    print(f"CPU del servidor: {cpu:.2f} s -> {finished / cpu if cpu else 0:.1f} partidas por segundo de núcleo, "
+          f"{moves / cpu if cpu else 0:.0f} movimientos por segundo de núcleo")
+    errors = report["errors"]
+    print(f"Memoria del servidor: {summary['server_rss_mib']:.1f} MiB (máx. {summary['server_rss_peak_mib']:.1f}), "
+          f"errores: {sum(errors.values())} ({', '.join(f'{key} {count}' for key, count in errors.items())})")
+    if "send_writes_per_move" in summary:
+        print(f"Envíos por movimiento: {summary['send_frames_per_move']:.2f} tramas en "
+              f"{summary['send_writes_per_move']:.2f} escrituras al socket ({summary['send_bytes_per_write']:.0f} bytes "
+              f"por escritura), {summary['server_kib_per_connection']:.1f} KiB por conexión, "
+              f"cola máxima {summary['send_buffered_max']} bytes, clientes lentos: "
+              f"{summary['slow_downgraded']} recuperados del registro, {summary['slow_disconnected']} desconectados")
+    if "workers" in after:
+        print(ludo_lobby.format_load(after))
+    ai = report["server_ai"]
+    if ai:
+        print(f"IA del servidor ({args['ai_policy']}, {args['ai_workers']} procesos): {ai['ai_decisions']} en el pool, "
+              f"heurística por pool lleno {ai['ai_overloaded']}, por plazo vencido {ai['ai_late']}, "
+              f"canceladas {ai['ai_cancelled']}, fallos {ai['ai_failed']}")
+    for name, latency in report["latency"].items():
+        print(f"Confirmación de {name:<5} p50 {latency['p50_ms']:7.2f} ms  p95 {latency['p95_ms']:7.2f} ms  "
+              f"p99 {latency['p99_ms']:7.2f} ms  máx {latency['max_ms']:7.2f} ms  ({latency['count']} muestras)")
+    if report["timeline"]:
+        print(f"{'t':>6} {'CPU':>7} {'RSS':>9} {'mov/s':>8} {'partidas/s':>11} {'conexiones':>11}")
+        for sample in report["timeline"]:
+            print(f"{sample['t']:>5.1f}s {sample['cpu_percent']:>6.1f}% {sample['rss_mib']:>5.1f} MiB "
+                  f"{sample['moves_per_s']:>8} {sample['finished_per_s']:>11.1f} {sample['connections']:>11}")
+
+
+def _comparable(report: dict) -> Dict[str, tuple]:
+    """Métricas que se comparan: nombre -> (valor, True si más es mejor)"""
+    summary = report["summary"]
+    metrics = {
+        "moves_per_s": (summary["moves_per_s"], True),
+        "finished_per_s": (summary["finished_per_s"], True),
+        "server_cpu_us_per_move": (summary["server_cpu_us_per_move"], False),
+        "send_writes_per_move": (summary.get("send_writes_per_move", 0.0), False),
+        "server_kib_per_connection": (summary.get("server_kib_per_connection", 0.0), False),
+        "server_rss_peak_mib": (summary["server_rss_peak_mib"], False),
+        "errors": (sum(report["errors"].values()), False),
+    }
+    for name, latency in report["latency"].items():
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            metrics[f"{name}_{key}"] = (latency[key], False)
+    return metrics
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> int:
+    """Muestra la diferencia con un informe guardado; devuelve el número de regresiones"""
+    regressions = 0
+    old_metrics = _comparable(baseline)
+    changed = [key for key, value in current["meta"]["args"].items()
+               if key not in ("port", "connect") and baseline["meta"]["args"].get(key) != value]
+    if changed:
+        print(f"Aviso: la base se midió con otros parámetros ({', '.join(changed)})")
+    print(f"{'Métrica':<24} {'Base':>10} {'Actual':>10} {'Cambio':>9}")
+    for name, (value, higher_is_better) in _comparable(current).items():
+        old = old_metrics.get(name, (None,))[0]
+        if old is None:
+            print(f"{name:<24} {'-':>10} {value:>10.2f} {'nueva':>9}")
+            continue
+        change = (value - old) / old if old else (0.0 if value == old else math.inf)
+        worse = -change if higher_is_better else change
+        mark = ""
+        if worse > threshold:
+            mark = "  REGRESIÓN"
+            regressions += 1
+        elif worse < -threshold:
+            mark = "  mejora"
+        print(f"{name:<24} {old:>10.2f} {value:>10.2f} {change:>+8.1%}{mark}")
+    return regressions
+
+
+def percentile(values: List[int], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de carga del servidor de Ludo")
+    parser.add_argument("--matches", type=int, default=1000, help="partidas simultáneas")
+    parser.add_argument("--players", type=int, default=2, choices=[2, 3, 4])
+    parser.add_argument("--duration", type=float, default=10.0, help="segundos de carga")
+    parser.add_argument("--client-procs", type=int, default=1, help="procesos de clientes bot")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="arrancar un lobby con N procesos de partidas en vez de un solo servidor")
+    parser.add_argument("--connect", metavar="HOST:PORT", help="usar un servidor ya arrancado")
+    parser.add_argument("--port", type=int, default=ludo_server.DEFAULT_PORT + 1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--spectators", type=int, default=0, help="espectadores mirando una misma partida")
+    parser.add_argument("--think", type=float, default=0.1,
+                        help="segundos que piensa el bot de la partida con espectadores (o el rival en --resync)")
+    parser.add_argument("--resync", nargs="+", type=float, metavar="SEGUNDOS",
+                        help="medir la vuelta a la partida tras cortes de esta duración")
+    parser.add_argument("--samples", type=int, default=10, help="cortes por duración con --resync")
+    parser.add_argument("--drop-after", type=int, default=10, help="acciones antes del corte con --resync")
+    parser.add_argument("--grace", type=float, default=ludo_server.RECONNECT_GRACE,
+                        help="segundos que el servidor guarda el asiento de un jugador desconectado")
+    parser.add_argument("--bot-ai", default="heuristic",
+                        help="política de ludo_ai con la que eligen ficha los bots (random = al azar)")
+    parser.add_argument("--bot-think", type=float, default=0.0,
+                        help="segundos que piensan los bots antes de cada acción (±50 %%)")
+    parser.add_argument("--ai-seats", type=int, default=0, help="asientos de cada partida que juega la IA del servidor")
+    parser.add_argument("--ai-policy", default="heuristic", help="IA del servidor para esos asientos")
+    parser.add_argument("--ai-workers", type=int, default=0,
+                        help="procesos del servidor para las decisiones de la IA (0 = en su bucle)")
+    parser.add_argument("--interval", type=float, default=1.0,
+                        help="segundos entre muestras de CPU y memoria del servidor")
+    parser.add_argument("--output", "-o", help="guardar el informe en un archivo JSON")
+    parser.add_argument("--compare", "-c", metavar="BASE", help="comparar con un informe guardado")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="cambio relativo que cuenta como regresión (por defecto 0.10)")
+    args = parser.parse_args()
+
+    host, port, server = "127.0.0.1", args.port, None
+    if args.connect:
+        host, port = args.connect.rsplit(":", 1)
+        port = int(port)
+    elif args.workers:
+        # Sin daemon: el lobby arranca sus propios procesos (terminan al cerrarse el lobby)
+        server = multiprocessing.Process(target=ludo_lobby.run_lobby,
+                                         args=(host, port, args.workers, args.seed, args.ai_policy, 0.0, args.grace,
+                                               args.ai_workers))
+        server.start()
+    else:
+        server = multiprocessing.Process(target=ludo_server.run_server,
+                                         args=(host, port, args.seed, args.ai_policy, args.grace, args.ai_workers),
+                                         daemon=not args.ai_workers)  # Con pool de IA tiene procesos hijos
+        server.start()
+
+    before = query_stats(host, port)
+    if args.resync:
+        measure_resync(host, port, args.resync, args.samples, args.drop_after, args.think, args.seed)
+        if server is not None:
+            server.terminate()
+            server.join()
+        return
+    bots = args.matches * (args.players - args.ai_seats)
+    deadline = time.time() + args.duration
+    shares = [bots // args.client_procs + (i < bots % args.client_procs) for i in range(args.client_procs)]
+    jobs = [(host, port, share, args.players, deadline, args.seed + i * bots, args.bot_think, args.bot_ai,
+             args.ai_seats)
+            for i, share in enumerate(shares)]
+    watchers = []
+    if args.spectators:
+        match_id = start_featured(host, port, deadline, args.think, args.seed - 1)
+        watchers = [(host, port, match_id, args.spectators // args.client_procs + (i < args.spectators % args.client_procs),
+                     deadline) for i in range(args.client_procs)]
+    sampler = ServerSampler(host, port, args.interval)
+    sampler.start()
+    started = time.perf_counter()
+    with multiprocessing.Pool(args.client_procs * (2 if watchers else 1)) as pool:
+        watching = pool.map_async(run_spectators, watchers)
+        results = pool.map(run_bots, jobs)
+        watched = watching.get()
+    seconds = time.perf_counter() - started
+    sampler.stop()
+    after = query_stats(host, port)
+    if server is not None:
+        server.terminate()
+        server.join()
+
+    report = build_report(args, seconds, before, after, results, sampler.timeline)
+    print_report(report, after)
+    if watched:
+        events = after["fanout_events"] - before["fanout_events"]
+        writes = after["fanout_writes"] - before["fanout_writes"]
+        fanout_ns = after["fanout_ns"] - before["fanout_ns"]
+        print(f"Espectadores: {sum(w['spectators'] for w in watched)}, vieron el final "
+              f"{sum(w['finished'] for w in watched)}, fallaron {sum(w['failed'] for w in watched)}, "
+              f"errores {sum(w['errors'] for w in watched)}, "
+              f"{sum(w['bytes'] for w in watched) / 2**20:.1f} MiB en {sum(w['frames'] for w in watched)} mensajes")
+        print(f"Reparto a espectadores: {events} acciones, {fanout_ns / events / 1e3 if events else 0:.0f} µs por acción, "
+              f"{fanout_ns / writes if writes else 0:.0f} ns por envío, "
+              f"{after['coalesced'] - before['coalesced']} resúmenes a espectadores atrasados")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,502 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import signal
+import socket
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from ludo_engine import MAX_PLAYERS
+from ludo_rng import MatchStreams
+from ludo_server import (DEFAULT_PORT, RECONNECT_GRACE, SEND_STATS, Connection, LudoServer, _current_rss,
+                         exit_with_pool)
+import ludo_protocol as proto
+
+# Lobby con varios procesos de partidas en la misma máquina.
+# El lobby acepta a los clientes y forma las partidas (los asientos que faltan
+# los ocupa la IA); cuando una partida se completa pasa los sockets de sus
+# jugadores al proceso menos cargado (SCM_RIGHTS por un socket Unix), que la
+# juega entera sin volver a pasar por el lobby. Al terminar, el JOIN de la
+# siguiente partida devuelve el socket al lobby.
+# No se usa SO_REUSEPORT porque el kernel repartiría conexiones, no partidas:
+# los jugadores de una misma partida acabarían en procesos distintos.
+# Lo que un cliente envíe entre su JOIN y el SNAPSHOT se descarta, igual que
+# en un solo proceso (ahí recibiría un error por no estar en una partida).
+# Un WATCH o un RESUME también llevan el socket al proceso que juega esa partida.
+
+REPORT_INTERVAL = 0.5     # Segundos entre informes de carga de cada proceso
+CONTROL_SIZE = 64 * 1024
+# Contadores de LudoServer.stats() que el lobby suma entre todos los procesos
+SUMMED = ("connections", "matches_finished", "moves", "spectators", "fanout_events", "fanout_writes",
+          "fanout_ns", "coalesced", "ai_decisions", "ai_overloaded", "ai_late", "ai_cancelled", "ai_failed",
+          "send_frames", "send_writes", "send_bytes", "slow_downgraded", "slow_disconnected")
+# Campos de cada proceso que viajan en la respuesta a STATS (los que usa format_load)
+LOAD_FIELDS = ("worker", "alive", "matches", "connections", "moves", "cpu_load")
+
+
+class ControlChannel:
+    """Mensajes JSON entre el lobby y un proceso, con sockets de clientes adjuntos
+
+    Usa un socket Unix SOCK_SEQPACKET: cada envío llega como un mensaje entero.
+    """
+    def __init__(self, sock: socket.socket, on_message, on_close):
+        self.sock = sock
+        self.on_message = on_message   # on_message(mensaje, descriptores)
+        self.on_close = on_close
+        self.closed = False
+        self._outgoing = deque()       # (datos, sockets que viajan con ellos)
+        self._loop = asyncio.get_running_loop()
+        sock.setblocking(False)
+        self._loop.add_reader(sock.fileno(), self._read)
+
+    def send(self, message: dict, socks: List[socket.socket] = ()):
+        """Encola un mensaje; los sockets adjuntos se cierran aquí en cuanto salen"""
+        self._outgoing.append((json.dumps(message).encode(), socks))
+        if len(self._outgoing) == 1:
+            self._flush()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self._loop.remove_reader(self.sock.fileno())
+        self._loop.remove_writer(self.sock.fileno())
+        self.sock.close()
+        for _, socks in self._outgoing:
+            for sock in socks:
+                sock.close()
+        self._outgoing.clear()
+        self.on_close()
+
+    def _flush(self):
+        outgoing = self._outgoing
+        while outgoing:
+            data, socks = outgoing[0]
+            try:
+                socket.send_fds(self.sock, [data], [sock.fileno() for sock in socks])
+            except BlockingIOError:
+                self._loop.add_writer(self.sock.fileno(), self._flush)
+                return
+            except OSError:
+                return self.close()
+            outgoing.popleft()
+            for sock in socks:
+                sock.close()
+        self._loop.remove_writer(self.sock.fileno())
+
+    def _read(self):
+        while not self.closed:
+            try:
+                data, fds, _, _ = socket.recv_fds(self.sock, CONTROL_SIZE, MAX_PLAYERS)
+            except BlockingIOError:
+                return
+            except OSError:
+                data, fds = b"", []
+            if not data:
+                return self.close()
+            self.on_message(json.loads(data), fds)
+
+
+async def detach(connection: Connection) -> Optional[socket.socket]:
+    """Termina de enviar lo pendiente y devuelve una copia del socket del cliente
+
+    El transporte de asyncio se cierra; la copia sigue abierta para pasarla a otro
+    proceso. Devuelve None si el cliente se desconectó mientras tanto.
+    """
+    connection.detached = True
+    connection.flush()
+    writer = connection.writer
+    transport = writer.transport
+    sock = None
+    if not transport.is_closing():
+        transport.pause_reading()
+        transport.set_write_buffer_limits(0)  # drain() espera a que no quede nada
+        try:
+            await writer.drain()
+            raw = writer.get_extra_info("socket")
+            sock = socket.fromfd(raw.fileno(), raw.family, raw.type)
+        except (ConnectionError, OSError):
+            sock = None
+    writer.close()
+    return sock
+
+
+async def adopt(fd: int) -> tuple:
+    """Abre un stream de asyncio sobre un socket recibido de otro proceso"""
+    sock = socket.socket(fileno=fd)
+    sock.setblocking(False)
+    reader, writer = await asyncio.open_connection(sock=sock)
+    return reader, Connection(writer)
+
+
+def hand_over(channel: ControlChannel, connection: Connection, pending: List[tuple]):
+    """Cede un cliente al otro lado del canal, que empezará atendiendo los mensajes de pending"""
+    connection.detached = True  # Dejar de leerlo ya: lo que llegue lo leerá el otro proceso
+    leftover = connection.frames.buffer.hex()
+    asyncio.ensure_future(_hand_over(channel, connection, pending, leftover))
+
+
+async def _hand_over(channel: ControlChannel, connection: Connection, pending: List[tuple], leftover: str):
+    sock = await detach(connection)
+    if sock is not None:
+        channel.send({"type": "connection", "pending": pending, "leftover": leftover}, [sock])
+
+
+async def take_over(message: dict, fd: int) -> tuple:
+    """Recibe un cliente cedido con hand_over: (conexión, reader, mensajes por atender)"""
+    reader, connection = await adopt(fd)
+    pending = [tuple(item) for item in message["pending"]]
+    pending += connection.frames.feed(bytes.fromhex(message["leftover"]))
+    return connection, reader, pending
+
+
+class MatchWorker(LudoServer):
+    """Proceso de partidas: recibe partidas completas del lobby y las juega"""
+    def __init__(self, index: int, control: socket.socket, ai_policy: str = "heuristic",
+                 reconnect_grace: float = RECONNECT_GRACE, ai_workers: int = 0):
+        super().__init__(None, ai_policy, reconnect_grace, ai_workers)
+        self.index = index
+        self.received = 0   # Partidas recibidas (el lobby lo compara con las enviadas)
+        self.ended: List[int] = []  # Partidas terminadas desde el último informe
+        self.done = asyncio.get_running_loop().create_future()
+        self.channel = ControlChannel(control, self.on_control, self._on_control_closed)
+
+    def _on_control_closed(self):
+        if not self.done.done():
+            self.done.set_result(None)  # Sin lobby no llegarán más partidas
+
+    def on_control(self, message: dict, fds: List[int]):
+        if message["type"] == "match":
+            asyncio.ensure_future(self._start(message, fds))
+        elif message["type"] == "connection":
+            asyncio.ensure_future(self._take_over(message, fds[0]))
+        elif message["type"] == "report":
+            self.report()
+
+    async def _start(self, message: dict, fds: List[int]):
+        opened = [await adopt(fd) for fd in fds]
+        humans = iter(connection for _, connection in opened)
+        seats = [next(humans) if human else None for human in message["seats"]]
+        self.received += 1
+        self.start_match(message["match_id"], seats, MatchStreams(message["seed"]))
+        for (reader, connection), leftover in zip(opened, message["leftover"]):
+            pending = connection.frames.feed(bytes.fromhex(leftover))
+            asyncio.ensure_future(self.serve_connection(connection, reader, pending))
+
+    async def _take_over(self, message: dict, fd: int):
+        """Un espectador o un jugador que vuelve a una partida de este proceso"""
+        await self.serve_connection(*await take_over(message, fd))
+
+    def _check_finished(self, match):
+        hosted = match.match_id in self.matches
+        super()._check_finished(match)
+        if hosted and match.match_id not in self.matches:
+            self.ended.append(match.match_id)
+
+    def join(self, connection: Connection, players, ai):
+        """Nueva partida: el socket vuelve al lobby para que la forme"""
+        if connection.match is not None and not connection.match.is_over:
+            return connection.error("Ya estás en una partida")
+        hand_over(self.channel, connection, [(proto.JOIN, proto.PROTOCOL_VERSION, players, ai)])
+
+    def report(self):
+        stats = self.stats()
+        stats.update(type="load", worker=self.index, received=self.received, ended=self.ended)
+        self.ended = []
+        self.channel.send(stats)
+
+    async def run(self):
+        while not self.done.done():
+            self.report()
+            await asyncio.wait([self.done], timeout=REPORT_INTERVAL)
+
+
+def run_worker(index: int, control: socket.socket, ai_policy: str = "heuristic",
+               reconnect_grace: float = RECONNECT_GRACE, ai_workers: int = 0):
+    """Punto de entrada de un proceso de partidas"""
+    async def main():
+        worker = MatchWorker(index, control, ai_policy, reconnect_grace, ai_workers)
+        if worker.ai_pool is not None:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, exit_with_pool, worker.ai_pool)
+        try:
+            await worker.run()
+        finally:
+            if worker.ai_pool is not None:
+                worker.ai_pool.shutdown()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+
+
+class WorkerHandle:
+    """Lo que el lobby sabe de un proceso de partidas"""
+    def __init__(self, index: int, process, control: socket.socket):
+        self.index = index
+        self.process = process
+        self.control = control        # Extremo del lobby del socket de control
+        self.channel: Optional[ControlChannel] = None
+        self.alive = True
+        self.sent = 0                 # Partidas enviadas
+        self.load: dict = {}          # Último informe del proceso
+        self.cpu_load = 0.0           # Fracción de un núcleo usada entre los dos últimos informes
+        self._reports: List[asyncio.Future] = []
+
+    @property
+    def matches(self) -> int:
+        """Partidas activas, contando las enviadas que el proceso aún no ha recibido"""
+        return self.load.get("matches", 0) + self.sent - self.load.get("received", 0)
+
+    def update(self, load: dict):
+        now = time.monotonic()
+        if self.load:
+            elapsed = now - self.load["at"]
+            if elapsed > 0:
+                self.cpu_load = (load["cpu"] - self.load["cpu"]) / elapsed
+        load["at"] = now
+        self.load = load
+        for future in self._reports:
+            if not future.done():
+                future.set_result(None)
+        self._reports.clear()
+
+    def next_report(self) -> asyncio.Future:
+        """Pide un informe al proceso; el futuro se completa al recibirlo"""
+        future = asyncio.get_running_loop().create_future()
+        self._reports.append(future)
+        self.channel.send({"type": "report"})
+        return future
+
+    def summary(self) -> dict:
+        summary = {"worker": self.index, "alive": self.alive, "matches": self.matches,
+                   "cpu": self.load.get("cpu", 0.0), "cpu_load": round(self.cpu_load, 3),
+                   "rss": self.load.get("rss", 0), "send_buffered_max": self.load.get("send_buffered_max", 0)}
+        summary.update((key, self.load.get(key, 0)) for key in SUMMED)
+        return summary
+
+
+class Lobby(LudoServer):
+    """Forma las partidas y las reparte entre los procesos; no juega ninguna"""
+    def __init__(self, workers: List[WorkerHandle], seed: Optional[int] = None, ai_policy: str = "heuristic"):
+        super().__init__(seed, ai_policy)
+        self.workers = workers
+        self.tasks: Dict[Connection, asyncio.Task] = {}
+        self.placement: Dict[int, WorkerHandle] = {}  # Partida en curso -> proceso que la juega
+        for worker in workers:
+            worker.channel = ControlChannel(worker.control,
+                                            lambda message, fds, worker=worker: self.on_control(worker, message, fds),
+                                            lambda worker=worker: self._on_worker_closed(worker))
+
+    def _on_worker_closed(self, worker: WorkerHandle):
+        worker.alive = False  # No recibe más partidas; las que tenía se perdieron con él
+
+    def on_control(self, worker: WorkerHandle, message: dict, fds: List[int]):
+        if message["type"] == "load":
+            for match_id in message.pop("ended"):
+                self.placement.pop(match_id, None)
+            worker.update(message)
+        elif message["type"] == "connection":
+            asyncio.ensure_future(self._take_over(message, fds[0]))
+
+    async def _take_over(self, message: dict, fd: int):
+        """Un cliente vuelve de un proceso (terminó su partida y pide otra)"""
+        await self._serve(*await take_over(message, fd))
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        await self._serve(Connection(writer), reader)
+
+    async def _serve(self, connection: Connection, reader: asyncio.StreamReader, pending: List[tuple] = ()):
+        self.tasks[connection] = asyncio.current_task()
+        try:
+            await self.serve_connection(connection, reader, pending)
+        except asyncio.CancelledError:
+            if not connection.detached:
+                raise
+        finally:
+            del self.tasks[connection]
+
+    def pick_worker(self) -> Optional[WorkerHandle]:
+        """El proceso con menos partidas (y, a igualdad, el que menos CPU usa)"""
+        alive = [worker for worker in self.workers if worker.alive]
+        return min(alive, key=lambda worker: (worker.matches, worker.cpu_load)) if alive else None
+
+    def start_match(self, match_id: int, seats: List[Optional[Connection]], streams: MatchStreams):
+        """La partida está completa: deja de leer a sus jugadores y la manda a un proceso"""
+        current = asyncio.current_task()
+        leftovers = []
+        for connection in seats:
+            if connection is not None:
+                connection.detached = True
+                leftovers.append(connection.frames.buffer.hex())
+                task = self.tasks.get(connection)
+                if task is not None and task is not current:
+                    task.cancel()  # Estaba esperando datos del cliente
+        asyncio.ensure_future(self._hand_off(match_id, seats, streams.seed, leftovers))
+
+    async def _hand_off(self, match_id: int, seats: List[Optional[Connection]], seed: int, leftovers: List[str]):
+        worker = self.pick_worker()
+        if worker is None:
+            for connection in seats:
+                if connection is not None:
+                    connection.error("No hay procesos de partidas disponibles")
+                    connection.writer.close()
+            return
+        worker.sent += 1  # Cuenta ya para el reparto de las siguientes partidas
+        socks, flags, sent_leftovers = [], [], []
+        leftovers = iter(leftovers)
+        for connection in seats:
+            sock = await detach(connection) if connection is not None else None
+            leftover = next(leftovers) if connection is not None else ""
+            flags.append(sock is not None)
+            if sock is not None:
+                socks.append(sock)
+                sent_leftovers.append(leftover)
+        if not socks:
+            worker.sent -= 1  # Se fueron todos: la partida se descarta
+            return
+        self.placement[match_id] = worker
+        worker.channel.send({"type": "match", "match_id": match_id, "seed": seed, "seats": flags,
+                             "leftover": sent_leftovers}, socks)
+
+    def watch(self, connection: Connection, match_id: int):
+        """El espectador se va al proceso que juega la partida"""
+        self._route(connection, match_id, (proto.WATCH, match_id))
+
+    def resume(self, connection: Connection, match_id: int, seat: int, token: int, seq: int):
+        """El jugador que vuelve se va al proceso que juega su partida (allí se comprueba la ficha)"""
+        self._route(connection, match_id, (proto.RESUME, match_id, seat, token, seq))
+
+    def _route(self, connection: Connection, match_id: int, message: tuple):
+        worker = self.placement.get(match_id)
+        if worker is None or not worker.alive:
+            return connection.error(f"Partida no encontrada: {match_id}")
+        self.leave_queue(connection)  # Se va a otro proceso: no puede seguir esperando aquí
+        hand_over(worker.channel, connection, [message])
+
+    def dispatch(self, connection: Connection, message: tuple):
+        if message[0] == proto.STATS:
+            asyncio.ensure_future(self._send_stats(connection))
+        else:
+            super().dispatch(connection, message)
+
+    async def _send_stats(self, connection: Connection):
+        alive = [worker for worker in self.workers if worker.alive]
+        if alive:
+            await asyncio.wait([worker.next_report() for worker in alive], timeout=1.0)
+        self.send_stats(connection, self.wire_stats())
+
+    def wire_stats(self) -> dict:
+        """stats() recortado para que quepa en una trama de STATS
+
+        De cada proceso solo van los campos de LOAD_FIELDS; si ni así caben,
+        se quitan los últimos y workers_omitted dice cuántos faltan.
+        """
+        stats = self.stats()
+        workers = [{key: w[key] for key in LOAD_FIELDS} for w in stats["workers"]]
+        stats["workers"] = workers
+        size = len(json.dumps(stats, separators=(",", ":"))) + 1
+        kept = len(workers)
+        while size > proto.MAX_FRAME - 32 and kept:  # 32: margen para workers_omitted
+            kept -= 1
+            size -= len(json.dumps(workers[kept], separators=(",", ":"))) + 1
+        if kept < len(workers):
+            stats["workers"] = workers[:kept]
+            stats["workers_omitted"] = len(workers) - kept
+        return stats
+
+    def stats(self) -> dict:
+        """Totales de todos los procesos y la carga de cada uno"""
+        workers = [worker.summary() for worker in self.workers]
+        stats = {key: sum(w[key] for w in workers) for key in SUMMED}
+        stats["connections"] += self.connections
+        for key, value in SEND_STATS.as_dict().items():
+            if key in stats:
+                stats[key] += value  # Lo que envió el propio lobby (joined, errores)
+        stats["send_buffered_max"] = max([SEND_STATS.buffered_max]
+                                         + [w.get("send_buffered_max", 0) for w in workers])
+        return {
+            **stats,
+            "matches": sum(w["matches"] for w in workers),
+            "cpu": time.process_time() + sum(w["cpu"] for w in workers),
+            "rss": _current_rss() + sum(w["rss"] for w in workers),
+            "lobby_cpu": time.process_time(),
+            "workers": workers,
+        }
+
+
+def format_load(stats: dict) -> str:
+    """Una línea por proceso con su carga"""
+    lines = [f"proceso {w['worker']}: {w['matches']:5d} partidas {w['connections']:6d} conexiones "
+             f"{w['moves']:9d} movimientos  CPU {w['cpu_load'] * 100:5.1f} %"
+             + ("" if w["alive"] else "  (caído)") for w in stats["workers"]]
+    if stats.get("workers_omitted"):
+        lines.append(f"(otros {stats['workers_omitted']} procesos no caben en la respuesta)")
+    return "\n".join(lines)
+
+
+async def serve(host: str, port: int, workers: List[WorkerHandle], seed: Optional[int] = None,
+                ai_policy: str = "heuristic", report: float = 0.0):
+    lobby = Lobby(workers, seed, ai_policy)
+    await lobby.start(host, port)
+    async with lobby.server:
+        if report > 0:
+            asyncio.ensure_future(_print_load(lobby, report))
+        await lobby.server.serve_forever()
+
+
+async def _print_load(lobby: Lobby, interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        print(format_load(lobby.stats()), flush=True)
+
+
+def run_lobby(host: str = "127.0.0.1", port: int = DEFAULT_PORT, workers: int = 0, seed: Optional[int] = None,
+              ai_policy: str = "heuristic", report: float = 0.0, reconnect_grace: float = RECONNECT_GRACE,
+              ai_workers: int = 0):
+    """Arranca los procesos de partidas y el lobby (bloqueante)
+
+    Con ai_workers cada proceso de partidas tiene su propio pool para la IA.
+    """
+    context = multiprocessing.get_context("spawn")
+    handles = []
+    for index in range(workers or multiprocessing.cpu_count()):
+        lobby_end, worker_end = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        # Un proceso daemon no puede tener hijos: con pool de IA se terminan a mano al salir
+        process = context.Process(target=run_worker,
+                                  args=(index, worker_end, ai_policy, reconnect_grace, ai_workers),
+                                  daemon=not ai_workers)
+        process.start()
+        worker_end.close()
+        handles.append(WorkerHandle(index, process, lobby_end))
+    try:
+        asyncio.run(serve(host, port, handles, seed, ai_policy, report))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for handle in handles:
+            handle.process.terminate()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lobby de Ludo con varios procesos de partidas")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=0, help="procesos de partidas (por defecto uno por núcleo)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--ai-policy", default="heuristic", help="IA de los asientos sin cliente")
+    parser.add_argument("--report", type=float, default=0.0, help="mostrar la carga de cada proceso cada N segundos")
+    parser.add_argument("--reconnect-grace", type=float, default=RECONNECT_GRACE,
+                        help="segundos que se guarda el asiento de un jugador desconectado")
+    parser.add_argument("--ai-workers", type=int, default=0,
+                        help="procesos para las decisiones de la IA en cada proceso de partidas")
+    args = parser.parse_args()
+    print(f"Lobby en {args.host}:{args.port} con {args.workers or multiprocessing.cpu_count()} procesos")
+    run_lobby(args.host, args.port, args.workers, args.seed, args.ai_policy, args.report, args.reconnect_grace,
+              args.ai_workers)
+
+
+if __name__ == "__main__":
+    main()
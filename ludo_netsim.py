@@ -0,0 +1,208 @@
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import statistics
+import threading
+import time
+from typing import Dict, List, Optional
+
+# Simulador de latencia: un proxy TCP local que retrasa cada dirección de la
+# conexión (con variación aleatoria) sin desordenar los bytes, como haría una
+# red lenta. Con --measure arranca servidor, proxy y un cliente sin ventana y
+# mide lo que tarda el juego en responder a cada RTT.
+
+READ_SIZE = 64 * 1024
+
+
+class LatencyProxy:
+    """Reenvía conexiones al servidor añadiendo retardo y variación"""
+    def __init__(self, target_host: str, target_port: int, rtt: float = 0.1, jitter: float = 0.0,
+                 seed: Optional[int] = None):
+        self.target_host = target_host
+        self.target_port = target_port
+        self.delay = rtt / 2         # Retardo en cada sentido
+        self.jitter = jitter         # Variación máxima (+/-) en cada sentido
+        self.rng = random.Random(seed)
+        self.server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """Empieza a escuchar; devuelve el puerto"""
+        self.server = await asyncio.start_server(self._handle, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def _handle(self, client_reader: asyncio.StreamReader, client_writer: asyncio.StreamWriter):
+        try:
+            server_reader, server_writer = await asyncio.open_connection(self.target_host, self.target_port)
+        except OSError:
+            client_writer.close()
+            return
+        await asyncio.gather(self._pipe(client_reader, server_writer),
+                             self._pipe(server_reader, client_writer))
+
+    async def _pipe(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        loop = asyncio.get_running_loop()
+        last_due = 0.0
+        try:
+            while True:
+                data = await reader.read(READ_SIZE)
+                if not data:
+                    break
+                due = loop.time() + max(0.0, self.delay + self.rng.uniform(-self.jitter, self.jitter))
+                # TCP no desordena: un paquete no puede adelantar al anterior
+                last_due = max(due, last_due)
+                loop.call_at(last_due, self._deliver, writer, data)
+        except ConnectionError:
+            pass
+        loop.call_at(max(last_due, loop.time()), writer.close)
+
+    @staticmethod
+    def _deliver(writer: asyncio.StreamWriter, data: bytes):
+        if not writer.is_closing():
+            writer.write(data)
+
+
+def start_proxy_thread(proxy: LatencyProxy) -> int:
+    """Arranca el proxy en un hilo con su propio bucle de eventos; devuelve el puerto"""
+    ready = threading.Event()
+    result = {}
+
+    def run():
+        loop = asyncio.new_event_loop()
+        result["port"] = loop.run_until_complete(proxy.start())
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, name="ludo-netsim", daemon=True).start()
+    ready.wait()
+    return result["port"]
+
+
+def measure(port: int, actions: int, prediction: bool, timeout: float = 120.0) -> Dict[str, float]:
+    """Juega contra la IA del servidor a través del proxy y mide la respuesta a cada acción
+
+    - respuesta: desde el clic hasta que algo cambia en pantalla (dado girando o ficha movida)
+    - confirmación: desde el clic hasta que el servidor responde
+    """
+    import pygame
+    import ludo_game_improved as ludo
+
+    ludo.CLIENT_PREDICTION = prediction
+    game = ludo.LudoGame(1)
+    game.start_online("127.0.0.1", port, 2, 1)
+    feedback: List[float] = []
+    confirm: List[float] = []
+    frames: List[float] = []
+    pending = None  # (momento del clic, estado visible antes del clic, respuesta ya vista)
+
+    def visible(player):
+        return game.dice.rolling, [piece.progress for piece in player.pieces]
+
+    give_up = time.perf_counter() + timeout
+    while len(confirm) < actions and time.perf_counter() < give_up and game.state != ludo.GameState.MENU:
+        started = time.perf_counter()
+        game.handle_events()
+        game.update()
+        if pending is not None:
+            clicked, before, seen = pending
+            elapsed = time.perf_counter() - clicked
+            if not seen and visible(game.players[game.local_seat]) != before:
+                feedback.append(elapsed)
+                seen = True
+            if not game.pending_since:
+                if not seen:
+                    feedback.append(elapsed)
+                confirm.append(elapsed)
+                pending = None
+            else:
+                pending = (clicked, before, seen)
+        elif (game.state == ludo.GameState.PLAYING and game.current_player_index == game.local_seat
+              and not game.dice.rolling):
+            player = game.players[game.local_seat]
+            before = visible(player)
+            clicked = time.perf_counter()
+            if player.can_roll:
+                game.roll_dice(player)
+            elif not player.has_moved and player.get_movable_pieces(game.dice.value):
+                game.handle_game_click(player.get_movable_pieces(game.dice.value)[0].rect.center)
+            if game.pending_since:
+                seen = visible(player) != before
+                if seen:
+                    feedback.append(time.perf_counter() - clicked)
+                pending = (clicked, before, seen)
+        if game.state == ludo.GameState.GAME_OVER:
+            game.start_online("127.0.0.1", port, 2, 1)
+        game.draw()
+        frames.append(time.perf_counter() - started)
+        game.clock.tick(ludo.FPS)
+    game.stop_online()
+    pygame.display.quit()
+    frames.sort()
+    return {
+        "feedback_ms": statistics.median(feedback) * 1000 if feedback else float("nan"),
+        "confirm_ms": statistics.median(confirm) * 1000 if confirm else float("nan"),
+        "frame_p99_ms": frames[int(0.99 * (len(frames) - 1))] * 1000 if frames else float("nan"),
+        "corrections": game.corrections,
+        "actions": len(confirm),
+    }
+
+
+def run_measurements(rtts: List[int], jitter: int, actions: int):
+    import ludo_server
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    # El servidor se lanza con "spawn": un hijo creado con fork heredaría el estado de SDL
+    context = multiprocessing.get_context("spawn")
+    server_port = 8765 + 7
+    server = context.Process(target=ludo_server.run_server, args=("127.0.0.1", server_port, 0), daemon=True)
+    server.start()
+    time.sleep(1.0)
+
+    print(f"{'RTT':>6} {'Predicción':>11} {'Respuesta':>10} {'Confirmación':>13} {'Frame p99':>10} {'Correcciones':>13}")
+    try:
+        for rtt in rtts:
+            proxy = LatencyProxy("127.0.0.1", server_port, rtt / 1000, jitter / 1000, seed=rtt)
+            port = start_proxy_thread(proxy)
+            for prediction in (False, True):
+                result = measure(port, actions, prediction)
+                print(f"{rtt:>4}ms {'sí' if prediction else 'no':>11} {result['feedback_ms']:>8.0f}ms "
+                      f"{result['confirm_ms']:>11.0f}ms {result['frame_p99_ms']:>8.1f}ms {result['corrections']:>13}")
+    finally:
+        server.terminate()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Proxy TCP con latencia para probar el juego en red")
+    parser.add_argument("--target", default="127.0.0.1:8765", metavar="HOST:PORT", help="servidor real")
+    parser.add_argument("--listen", type=int, default=8766, help="puerto del proxy")
+    parser.add_argument("--rtt", type=float, default=150, help="latencia de ida y vuelta en ms")
+    parser.add_argument("--jitter", type=float, default=20, help="variación en ms en cada sentido")
+    parser.add_argument("--measure", nargs="*", type=int, metavar="RTT",
+                        help="medir la respuesta del juego con estos RTT (por defecto 0 50 100 200 300)")
+    parser.add_argument("--actions", type=int, default=20, help="acciones por medición")
+    args = parser.parse_args()
+
+    if args.measure is not None:
+        run_measurements(args.measure or [0, 50, 100, 200, 300], int(args.jitter), args.actions)
+        return
+
+    host, port = args.target.rsplit(":", 1)
+    proxy = LatencyProxy(host, int(port), args.rtt / 1000, args.jitter / 1000)
+
+    async def serve():
+        await proxy.start("127.0.0.1", args.listen)
+        print(f"Proxy en 127.0.0.1:{args.listen} -> {args.target} (RTT {args.rtt:.0f} ms ± {args.jitter:.0f} ms)")
+        async with proxy.server:
+            await proxy.server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
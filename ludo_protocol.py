@@ -0,0 +1,282 @@
+import asyncio
+import json
+from struct import Struct
+from typing import List, Optional, Sequence
+
+from ludo_engine import MatchState, PIECES_PER_PLAYER
+
+# Protocolo binario entre el servidor y los clientes.
+# Cada mensaje va en una trama: longitud (u16, little endian) + tipo (u8) + campos
+# de tamaño fijo empaquetados con struct. Los mensajes decodificados son tuplas
+# cuyo primer elemento es el tipo: (MOVED, asiento, ficha, progreso, otra_vez).
+# Después de cada acción el servidor solo envía las fichas que cambiaron
+# (MOVED, CAPTURED o DELTA); el estado completo (SNAPSHOT) ocupa 37 bytes.
+# Los espectadores (WATCH) reciben los mismos mensajes que los jugadores.
+# Los mensajes de EVENTS se numeran implícitamente: el SNAPSHOT lleva el número
+# del último evento que incluye y cada evento posterior suma uno. Un jugador que
+# pierde la conexión envía RESUME con ese número y recibe solo lo que le falta.
+
+PROTOCOL_VERSION = 3
+MAX_FRAME = 0xFFFF
+
+# Cliente -> servidor
+JOIN = 1         # (JOIN, versión, jugadores, asientos de IA)
+ROLL = 2         # (ROLL,)
+MOVE = 3         # (MOVE, ficha)
+STATS = 4        # (STATS, dict) -- petición vacía, respuesta en JSON
+WATCH = 5        # (WATCH, partida) -- mirar una partida como espectador
+RESUME = 6       # (RESUME, partida, asiento, ficha_de_sesión, último_evento)
+
+# Servidor -> cliente
+JOINED = 16      # (JOINED, rivales que faltan)
+SNAPSHOT = 17    # (SNAPSHOT, partida, asiento, MatchState, evento, ficha_de_sesión)
+ROLLED = 18      # (ROLLED, asiento, dado, máscara de fichas movibles)
+MOVED = 19       # (MOVED, asiento, ficha, progreso, otra_vez)
+CAPTURED = 20    # (CAPTURED, asiento, ficha) -- la ficha vuelve a casa
+TURN = 21        # (TURN, asiento)
+GAME_OVER = 22   # (GAME_OVER, ganador)
+DELTA = 23       # (DELTA, turno, dado, seises, ganador, ((casilla_de_estado, progreso), ...))
+RESUMED = 24     # (RESUMED, evento) -- fin de lo reenviado tras un RESUME
+ERROR = 31       # (ERROR, texto)
+
+SPECTATOR = 255  # Asiento del SNAPSHOT que recibe un espectador
+
+# Mensajes que cuentan como eventos numerados de la partida
+EVENTS = frozenset({ROLLED, MOVED, CAPTURED, TURN, GAME_OVER})
+
+NAMES = {JOIN: "join", ROLL: "roll", MOVE: "move", STATS: "stats", WATCH: "watch", RESUME: "resume",
+         JOINED: "joined", SNAPSHOT: "snapshot", ROLLED: "rolled", MOVED: "moved", CAPTURED: "captured",
+         TURN: "turn", GAME_OVER: "game_over", DELTA: "delta", RESUMED: "resumed", ERROR: "error"}
+
+_LENGTH = Struct("<H")
+
+# Mensajes de tamaño fijo: struct del cuerpo (tipo incluido) y de la trama completa
+_BODIES = {
+    JOIN: Struct("<BBBB"),
+    ROLL: Struct("<B"),
+    MOVE: Struct("<BB"),
+    WATCH: Struct("<BI"),
+    RESUME: Struct("<BIBII"),
+    JOINED: Struct("<BB"),
+    ROLLED: Struct("<BBBB"),
+    MOVED: Struct("<BBBbB"),
+    CAPTURED: Struct("<BBB"),
+    TURN: Struct("<BB"),
+    GAME_OVER: Struct("<Bb"),
+    RESUMED: Struct("<BI"),
+}
+_FRAMES = {kind: Struct("<H" + body.format[1:]) for kind, body in _BODIES.items()}
+
+_SNAPSHOT_HEADER = Struct("<BIBII")
+_DELTA_HEADER = Struct("<BBBBbB")
+_DELTA_HEADER_FRAME = Struct("<HBBBBbB")
+_CHANGE = Struct("<Bb")
+
+# Máscara de fichas movibles -> tupla de índices (precalculado, sin crear listas al decodificar)
+MASK_MOVES = tuple(tuple(i for i in range(PIECES_PER_PLAYER) if mask >> i & 1)
+                   for mask in range(1 << PIECES_PER_PLAYER))
+
+# Tabla por tipo para decodificar sin buscar en diccionarios
+_BODY_TABLE = [_BODIES.get(kind) for kind in range(256)]
+
+# pack ligado de cada trama (evita buscar el struct en cada mensaje)
+_pack_join = _FRAMES[JOIN].pack
+_pack_move = _FRAMES[MOVE].pack
+_pack_watch = _FRAMES[WATCH].pack
+_pack_resume = _FRAMES[RESUME].pack
+_pack_joined = _FRAMES[JOINED].pack
+_pack_rolled = _FRAMES[ROLLED].pack
+_pack_moved = _FRAMES[MOVED].pack
+_pack_captured = _FRAMES[CAPTURED].pack
+_pack_turn = _FRAMES[TURN].pack
+_pack_game_over = _FRAMES[GAME_OVER].pack
+_pack_resumed = _FRAMES[RESUMED].pack
+
+_ROLL_FRAME = _FRAMES[ROLL].pack(1, ROLL)
+_STATS_FRAME = _LENGTH.pack(1) + bytes([STATS])
+
+
+def encode_join(players: int, ai: int = 0) -> bytes:
+    return _pack_join(4, JOIN, PROTOCOL_VERSION, players, ai)
+
+
+def encode_roll() -> bytes:
+    return _ROLL_FRAME
+
+
+def encode_move(piece: int) -> bytes:
+    return _pack_move(2, MOVE, piece)
+
+
+def encode_watch(match_id: int) -> bytes:
+    return _pack_watch(5, WATCH, match_id)
+
+
+def encode_resume(match_id: int, seat: int, token: int, seq: int) -> bytes:
+    return _pack_resume(14, RESUME, match_id, seat, token, seq)
+
+
+def encode_stats_request() -> bytes:
+    return _STATS_FRAME
+
+
+def encode_stats(stats: dict) -> bytes:
+    body = bytes([STATS]) + json.dumps(stats, separators=(",", ":")).encode("utf-8")
+    if len(body) > MAX_FRAME:
+        raise ValueError(f"Estadísticas demasiado grandes para una trama: {len(body)} bytes")
+    return _LENGTH.pack(len(body)) + body
+
+
+def encode_joined(waiting: int) -> bytes:
+    return _pack_joined(2, JOINED, waiting)
+
+
+def encode_snapshot(match_id: int, seat: int, state: MatchState, seq: int = 0, token: int = 0) -> bytes:
+    raw = state.to_bytes()
+    return (_LENGTH.pack(_SNAPSHOT_HEADER.size + len(raw))
+            + _SNAPSHOT_HEADER.pack(SNAPSHOT, match_id, seat, seq, token) + raw)
+
+
+def moves_mask(moves: Sequence[int]) -> int:
+    mask = 0
+    for piece in moves:
+        mask |= 1 << piece
+    return mask
+
+
+def encode_rolled(seat: int, value: int, moves: Sequence[int]) -> bytes:
+    return _pack_rolled(4, ROLLED, seat, value, moves_mask(moves))
+
+
+def encode_moved(seat: int, piece: int, progress: int, again: bool) -> bytes:
+    return _pack_moved(5, MOVED, seat, piece, progress, again)
+
+
+def encode_captured(seat: int, piece: int) -> bytes:
+    return _pack_captured(3, CAPTURED, seat, piece)
+
+
+def encode_turn(seat: int) -> bytes:
+    return _pack_turn(2, TURN, seat)
+
+
+def encode_game_over(winner: int) -> bytes:
+    return _pack_game_over(2, GAME_OVER, winner)
+
+
+def encode_resumed(seq: int) -> bytes:
+    return _pack_resumed(5, RESUMED, seq)
+
+
+def encode_delta(state: MatchState, slots: Sequence[int]) -> bytes:
+    """Cabecera del estado y solo las fichas indicadas (índices en MatchState.data)"""
+    data = state.data
+    parts = [_DELTA_HEADER_FRAME.pack(_DELTA_HEADER.size + _CHANGE.size * len(slots), DELTA,
+                                      data[MatchState.CURRENT_PLAYER], data[MatchState.DICE_VALUE],
+                                      data[MatchState.CONSECUTIVE_SIXES], data[MatchState.WINNER], len(slots))]
+    for slot in slots:
+        parts.append(_CHANGE.pack(slot, data[slot]))
+    return b"".join(parts)
+
+
+def changed_slots(old: MatchState, new: MatchState) -> List[int]:
+    """Fichas cuyo progreso es distinto entre dos estados"""
+    old_data, new_data = old.data, new.data
+    return [slot for slot in range(MatchState.CURRENT_PLAYER) if old_data[slot] != new_data[slot]]
+
+
+def encode_error(text: str) -> bytes:
+    body = bytes([ERROR]) + text.encode("utf-8")[:MAX_FRAME - 1]
+    return _LENGTH.pack(len(body)) + body
+
+
+def decode(buffer, offset: int = 0, length: Optional[int] = None) -> tuple:
+    """Decodifica el cuerpo de una trama (sin el prefijo de longitud)"""
+    if length is None:
+        length = len(buffer) - offset
+    if length < 1:
+        raise ValueError("Mensaje vacío")
+    kind = buffer[offset]
+    body = _BODY_TABLE[kind]
+    if body is not None:
+        if length != body.size:
+            raise ValueError(f"Tamaño incorrecto para {NAMES[kind]}: {length}")
+        return body.unpack_from(buffer, offset)
+    if kind == SNAPSHOT:
+        _, match_id, seat, seq, token = _SNAPSHOT_HEADER.unpack_from(buffer, offset)
+        start = offset + _SNAPSHOT_HEADER.size
+        return SNAPSHOT, match_id, seat, MatchState.from_bytes(bytes(buffer[start:offset + length])), seq, token
+    if kind == DELTA:
+        _, current, dice, sixes, winner, count = _DELTA_HEADER.unpack_from(buffer, offset)
+        if length != _DELTA_HEADER.size + count * _CHANGE.size:
+            raise ValueError(f"Tamaño incorrecto para delta: {length}")
+        start = offset + _DELTA_HEADER.size
+        changes = tuple(_CHANGE.unpack_from(buffer, start + i * _CHANGE.size) for i in range(count))
+        return DELTA, current, dice, sixes, winner, changes
+    if kind == ERROR:
+        return ERROR, bytes(buffer[offset + 1:offset + length]).decode("utf-8", "replace")
+    if kind == STATS:
+        raw = bytes(buffer[offset + 1:offset + length])
+        return STATS, json.loads(raw) if raw else {}
+    raise ValueError(f"Tipo de mensaje desconocido: {kind}")
+
+
+def apply_message(state: MatchState, message: tuple) -> MatchState:
+    """Actualiza la copia local del estado con un mensaje del servidor; devuelve el estado vigente"""
+    kind = message[0]
+    if kind == SNAPSHOT:
+        return message[3]
+    data = state.data
+    if kind == MOVED:
+        data[message[1] * PIECES_PER_PLAYER + message[2]] = message[3]
+    elif kind == CAPTURED:
+        data[message[1] * PIECES_PER_PLAYER + message[2]] = -1
+    elif kind == ROLLED:
+        data[MatchState.DICE_VALUE] = message[2]
+    elif kind == TURN:
+        data[MatchState.CURRENT_PLAYER] = message[1]
+        data[MatchState.CONSECUTIVE_SIXES] = 0
+    elif kind == GAME_OVER:
+        data[MatchState.WINNER] = message[1]
+    elif kind == DELTA:
+        _, current, dice, sixes, winner, changes = message
+        data[MatchState.CURRENT_PLAYER] = current
+        data[MatchState.DICE_VALUE] = dice
+        data[MatchState.CONSECUTIVE_SIXES] = sixes
+        data[MatchState.WINNER] = winner
+        for slot, progress in changes:
+            data[slot] = progress
+    return state
+
+
+class FrameReader:
+    """Separa en mensajes los bytes recibidos (pueden llegar tramas partidas o varias juntas)"""
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def feed(self, data: bytes) -> List[tuple]:
+        buffer = self.buffer
+        buffer += data
+        messages = []
+        offset = 0
+        size = len(buffer)
+        while size - offset >= 2:
+            length = buffer[offset] | buffer[offset + 1] << 8
+            end = offset + 2 + length
+            if end > size:
+                break
+            messages.append(decode(buffer, offset + 2, length))
+            offset = end
+        if offset:
+            del buffer[:offset]
+        return messages
+
+
+async def read_message(reader: asyncio.StreamReader) -> Optional[tuple]:
+    """Lee el siguiente mensaje; devuelve None si se cerró la conexión"""
+    try:
+        header = await reader.readexactly(2)
+        length = _LENGTH.unpack(header)[0]
+        return decode(await reader.readexactly(length))
+    except asyncio.IncompleteReadError:
+        return None
@@ -0,0 +1,100 @@
+import hashlib
+import random
+from typing import Iterable, List, Optional
+
+# Fuentes de dados y flujos aleatorios con semilla.
+# Cada partida tiene su propio flujo para los dados y otro para la IA, así las
+# partidas se pueden repetir y los procesos en paralelo no comparten estado.
+
+
+def derive_seed(*keys) -> int:
+    """Deriva una semilla de 64 bits estable (igual en todos los procesos) a partir de claves"""
+    digest = hashlib.blake2b(repr(keys).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class RandomDice:
+    """Dado que tira con un random.Random"""
+    def __init__(self, rng: Optional[random.Random] = None):
+        self.rng = rng if rng is not None else random.Random()
+
+    def roll(self) -> int:
+        return self.rng.randint(1, 6)
+
+
+# Traducción de un byte aleatorio a una cara del dado; los bytes 252-255 se descartan
+# para que las seis caras tengan exactamente la misma probabilidad.
+_DICE_FACES = bytes(b % 6 + 1 for b in range(256))
+_DICE_REJECT = bytes(range(252, 256))
+
+
+class BlockDice:
+    """Dado con semilla que genera las tiradas por bloques (ruta rápida para simulaciones)"""
+    def __init__(self, seed: Optional[int] = None, block_size: int = 4096):
+        self.rng = random.Random(seed)
+        self.block_size = block_size
+        self._block = b""
+        self._index = 0
+
+    def _refill(self):
+        raw = self.rng.getrandbits(8 * self.block_size).to_bytes(self.block_size, "little")
+        self._block = raw.translate(_DICE_FACES, _DICE_REJECT)
+        self._index = 0
+
+    def roll(self) -> int:
+        while self._index >= len(self._block):  # Un bloque puede quedar vacío tras descartar
+            self._refill()
+        value = self._block[self._index]
+        self._index += 1
+        return value
+
+    def rolls(self, count: int) -> bytes:
+        """Devuelve las siguientes tiradas de golpe"""
+        values = bytearray()
+        while len(values) < count:
+            if self._index >= len(self._block):
+                self._refill()
+            take = min(count - len(values), len(self._block) - self._index)
+            values += self._block[self._index:self._index + take]
+            self._index += take
+        return bytes(values)
+
+
+class ScriptedDice:
+    """Dado que repite una secuencia grabada (para reproducir partidas)"""
+    def __init__(self, values: Iterable[int]):
+        self.values: List[int] = list(values)
+        self._index = 0
+
+    @property
+    def remaining(self) -> int:
+        return len(self.values) - self._index
+
+    def roll(self) -> int:
+        if self._index >= len(self.values):
+            raise ValueError("Se acabaron las tiradas grabadas")
+        value = self.values[self._index]
+        self._index += 1
+        return value
+
+
+class MatchStreams:
+    """Flujos aleatorios independientes de una partida, derivados de una sola semilla"""
+    def __init__(self, seed: Optional[int] = None):
+        self.seed = seed if seed is not None else random.getrandbits(64)
+
+    def dice(self, block_size: int = 4096) -> BlockDice:
+        """Flujo de dados de la partida"""
+        return BlockDice(derive_seed(self.seed, "dice"), block_size)
+
+    def ai(self, seat: int = 0) -> random.Random:
+        """Flujo para las decisiones de la IA de un asiento"""
+        return random.Random(derive_seed(self.seed, "ai", seat))
+
+    def visual(self) -> random.Random:
+        """Flujo para efectos que no afectan a la partida (animaciones)"""
+        return random.Random(derive_seed(self.seed, "visual"))
+
+    def spawn(self, *keys) -> "MatchStreams":
+        """Subflujo independiente (una partida de un torneo, un proceso, ...)"""
+        return MatchStreams(derive_seed(self.seed, "spawn", *keys))
@@ -0,0 +1,700 @@
+import argparse
+import asyncio
+import itertools
+import os
+import resource
+import secrets
+import signal
+import time
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from ludo_engine import COLORS, MAX_PLAYERS, LudoEngine, MatchState, TurnOutcome
+from ludo_rng import MatchStreams
+from ludo_aipool import AIPool
+import ludo_ai
+import ludo_protocol as proto
+
+# Servidor autoritativo de partidas en red con asyncio.
+# El servidor tira los dados, valida los movimientos y resuelve capturas con
+# LudoEngine; los clientes solo envían "tirar" y "mover ficha".
+# Un proceso aloja miles de partidas: todas comparten el mismo bucle de eventos.
+# Si un jugador pierde la conexión su asiento le espera RECONNECT_GRACE segundos
+# (después juega la IA) y con RESUME recupera lo que se perdió del registro de
+# eventos de la partida. Con --ai-workers las IAs de búsqueda deciden en otros
+# procesos (ludo_aipool.py) y el bucle sigue atendiendo al resto de partidas.
+
+DEFAULT_PORT = 8765
+READ_SIZE = 64 * 1024
+BACKLOG = 1024
+SPECTATOR_BUFFER = 64 * 1024  # Bytes sin enviar a partir de los que un espectador pasa a recibir resúmenes
+RECONNECT_GRACE = 30.0        # Segundos que se guarda el asiento de un jugador desconectado
+SNAPSHOT_INTERVAL = 64        # Eventos entre instantáneas del registro de la partida
+SEND_QUEUE_LIMIT = 64 * 1024  # Bytes sin enviar a partir de los que un jugador deja de recibir eventos
+SLOW_TIMEOUT = 10.0           # Segundos que se espera a un cliente atascado antes de desconectarlo
+
+
+class SendStats:
+    """Envíos del proceso: tramas, escrituras al socket y clientes lentos"""
+    def __init__(self):
+        self.frames = 0
+        self.writes = 0         # transport.write: como mucho un send() cada una
+        self.bytes = 0
+        self.buffered_max = 0   # Mayor cola sin enviar vista en una conexión
+        self.downgraded = 0     # Jugadores que pasaron a recuperar lo perdido del registro
+        self.disconnected = 0   # Clientes desconectados por no leer en SLOW_TIMEOUT
+
+    def as_dict(self) -> dict:
+        return {"send_frames": self.frames, "send_writes": self.writes, "send_bytes": self.bytes,
+                "send_buffered_max": self.buffered_max, "slow_downgraded": self.downgraded,
+                "slow_disconnected": self.disconnected}
+
+
+SEND_STATS = SendStats()
+
+
+class Connection:
+    """Un cliente conectado
+
+    Las tramas de una vuelta del bucle de eventos se juntan y se escriben de una vez
+    al final. Un jugador que no lee pasa por tres etapas: mientras su cola no llega a
+    SEND_QUEUE_LIMIT las tramas se siguen juntando; al pasarla deja de recibir
+    eventos y, cuando vacía el buffer, recibe de una vez lo que se perdió (la cola
+    del registro o la última instantánea y lo posterior); si en SLOW_TIMEOUT no lo
+    vacía, se le desconecta y su asiento le espera como en cualquier corte.
+    """
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.match: Optional["Match"] = None
+        self.seat = -1
+        self.watching: Optional["Match"] = None
+        self.frames = proto.FrameReader()
+        self.detached = False  # El socket pasó a otro proceso (ludo_lobby): no se cierra aquí
+        self.outbox: List[bytes] = []      # Tramas de esta vuelta del bucle
+        self.behind: Optional[int] = None  # Último evento que recibió antes de atascarse
+
+    def send(self, frame: bytes):
+        if self.behind is not None:
+            return  # Lo recibirá del registro de la partida al ponerse al día
+        if not self.outbox:
+            asyncio.get_running_loop().call_soon(self.flush)
+        self.outbox.append(frame)
+
+    def error(self, text: str):
+        self.send(proto.encode_error(text))
+
+    def flush(self):
+        """Escribe lo acumulado en la vuelta del bucle con una sola llamada"""
+        frames = self.outbox
+        if not frames:
+            return
+        self.outbox = []
+        transport = self.writer.transport
+        if transport.is_closing():
+            return
+        data = frames[0] if len(frames) == 1 else b"".join(frames)
+        transport.write(data)
+        stats = SEND_STATS
+        stats.frames += len(frames)
+        stats.writes += 1
+        stats.bytes += len(data)
+        buffered = transport.get_write_buffer_size()
+        if buffered > stats.buffered_max:
+            stats.buffered_max = buffered
+        if buffered > SEND_QUEUE_LIMIT and self.match is not None:
+            self._fall_behind(self.match)
+
+    def _fall_behind(self, match: "Match"):
+        self.behind = match.log.seq  # Todo lo anterior ya está en el buffer del socket
+        SEND_STATS.downgraded += 1
+        asyncio.ensure_future(self._catch_up(match, self.seat))
+
+    async def _catch_up(self, match: "Match", seat: int):
+        if not await drain_or_drop(self.writer):
+            return
+        seq, self.behind = self.behind, None
+        if match.seats[seat] is self:
+            self.send(match.missed(seat, seq))
+
+
+async def drain_or_drop(writer: asyncio.StreamWriter) -> bool:
+    """Espera a que el cliente vacíe su buffer; si no lo hace en SLOW_TIMEOUT, lo desconecta"""
+    try:
+        await asyncio.wait_for(writer.drain(), SLOW_TIMEOUT)
+    except asyncio.TimeoutError:
+        SEND_STATS.disconnected += 1
+        writer.transport.abort()
+        return False
+    except ConnectionError:
+        return False
+    return True
+
+
+class EventLog:
+    """Eventos numerados de una partida con instantáneas periódicas
+
+    Guarda las tramas desde la penúltima instantánea: quien se quedó un poco atrás
+    recibe solo los eventos que le faltan; quien se quedó más, la última instantánea
+    y los eventos posteriores.
+    """
+    def __init__(self, state: MatchState, interval: int = SNAPSHOT_INTERVAL):
+        self.interval = interval
+        self.seq = 0                         # Eventos emitidos
+        self.start = 0                       # Número del primer evento guardado
+        self.frames = bytearray()            # Tramas de los eventos guardados, seguidas
+        self.offsets = array("I", [0])       # Dónde empieza cada evento en frames (y dónde acaba el último)
+        self.checkpoint_seq = 0
+        self.checkpoint = state.copy()
+
+    def append(self, frame: bytes):
+        self.frames += frame
+        self.offsets.append(len(self.frames))
+        self.seq += 1
+
+    def take_checkpoint(self, state: MatchState):
+        """Guarda una instantánea si toca y olvida los eventos anteriores a la previa"""
+        if self.seq - self.checkpoint_seq < self.interval:
+            return
+        drop = self.checkpoint_seq - self.start
+        if drop:
+            cut = self.offsets[drop]
+            del self.frames[:cut]
+            self.offsets = array("I", [offset - cut for offset in self.offsets[drop:]])
+            self.start = self.checkpoint_seq
+        self.checkpoint_seq = self.seq
+        self.checkpoint = state.copy()
+
+    def since(self, seq: int) -> Optional[bytes]:
+        """Tramas de los eventos posteriores a seq (None si ya no están guardados)"""
+        if not self.start <= seq <= self.seq:
+            return None
+        return bytes(self.frames[self.offsets[seq - self.start]:])
+
+
+class FanoutStats:
+    """Coste de enviar las acciones a los espectadores"""
+    def __init__(self):
+        self.events = 0       # Acciones enviadas
+        self.writes = 0       # Envíos (una acción a un espectador)
+        self.ns = 0
+        self.coalesced = 0    # Resúmenes DELTA a espectadores atrasados
+
+    def add(self, writes: int, ns: int):
+        self.events += 1
+        self.writes += writes
+        self.ns += ns
+
+    def merge(self, other: "FanoutStats"):
+        self.events += other.events
+        self.writes += other.writes
+        self.ns += other.ns
+        self.coalesced += other.coalesced
+
+
+class Match:
+    """Una partida: el motor de reglas y quién ocupa cada asiento (None = IA)"""
+    def __init__(self, match_id: int, seats: List[Optional[Connection]], streams: MatchStreams,
+                 ai_policy: ludo_ai.Policy, ai_pool: Optional[AIPool] = None, on_ai_move=None):
+        self.match_id = match_id
+        self.seats = seats
+        self.colors = COLORS[:len(seats)]
+        self.engine = LudoEngine(self.colors, streams.ai(), dice=streams.dice())
+        self.ai_policy = ai_policy
+        self.ai_pool = ai_pool      # Con pool, la IA elige ficha en otro proceso sin parar el bucle
+        self.on_ai_move = on_ai_move  # on_ai_move(partida) tras cada jugada resuelta por el pool
+        self.thinking: Optional[asyncio.Task] = None  # Decisión de la IA en curso
+        self.awaiting_move = False  # Se tiró el dado y falta elegir ficha
+        self.moves = 0
+        self.tokens = [secrets.randbits(32) for _ in seats]  # Para recuperar el asiento con RESUME
+        self.reserved: Dict[int, asyncio.TimerHandle] = {}   # Asientos esperando a que vuelva su jugador
+        self.log = EventLog(self.engine.state)
+        # Espectadores: lo que cambia en cada acción se codifica una vez y se envía a todos
+        self.spectators: Dict[Connection, None] = {}
+        self.lagging: Dict[Connection, MatchState] = {}  # Atrasados -> último estado que recibieron
+        self._outbox: List[bytes] = []                    # Tramas de la acción en curso
+        self._published = self.engine.state.copy()       # Estado que tienen los espectadores al día
+        self.fanout = FanoutStats()
+        for seat, connection in enumerate(seats):
+            if connection is not None:
+                connection.match = self
+                connection.seat = seat
+
+    @property
+    def is_over(self) -> bool:
+        return self.engine.is_over
+
+    @property
+    def has_players(self) -> bool:
+        """Queda algún cliente conectado o esperando para volver"""
+        return any(self.seats) or bool(self.reserved)
+
+    def broadcast(self, frame: bytes):
+        """Envía la misma trama (codificada una sola vez) a todos los clientes de la partida"""
+        for connection in self.seats:
+            if connection is not None:
+                connection.send(frame)
+        self.log.append(frame)
+        if self.spectators:
+            self._outbox.append(frame)
+
+    def start(self):
+        for seat, connection in enumerate(self.seats):
+            if connection is not None:
+                connection.send(proto.encode_snapshot(self.match_id, seat, self.engine.state, self.log.seq,
+                                                      self.tokens[seat]))
+        self.broadcast(proto.encode_turn(self.engine.current_player))
+        self._play_ai()
+        self._end_action()
+
+    def roll(self, connection: Connection):
+        """Petición de tirar el dado de un cliente"""
+        if self.is_over or connection.seat != self.engine.current_player:
+            return connection.error("No es tu turno")
+        if self.awaiting_move:
+            return connection.error("Ya tiraste, elige una ficha")
+        self._roll()
+        self._play_ai()
+        self._end_action()
+
+    def move(self, connection: Connection, piece):
+        """Petición de mover una ficha de un cliente"""
+        if self.is_over or connection.seat != self.engine.current_player:
+            return connection.error("No es tu turno")
+        if not self.awaiting_move:
+            return connection.error("Primero tira el dado")
+        if piece not in self.engine.legal_moves():
+            return connection.error(f"Movimiento ilegal: ficha {piece} con dado {self.engine.dice_value}")
+        self._move(piece)
+        self._play_ai()
+        self._end_action()
+
+    def leave(self, connection: Connection, hold: Optional[asyncio.TimerHandle] = None):
+        """Un cliente se desconecta: la IA ocupa su asiento (o se le guarda hasta que venza hold)"""
+        self.seats[connection.seat] = None
+        connection.match = None
+        if hold is not None:
+            self.reserved[connection.seat] = hold
+        self._play_ai()
+        self._end_action()
+
+    def release(self, seat: int):
+        """Venció la espera de un asiento: desde ahora lo juega la IA"""
+        if self.reserved.pop(seat, None) is not None:
+            self._play_ai()
+            self._end_action()
+
+    def resume(self, connection: Connection, seat: int, seq: int):
+        """Un jugador vuelve a su asiento: recibe los eventos que se perdió y RESUMED"""
+        previous = self.seats[seat]
+        if previous is not None:
+            previous.match = None  # Conexión vieja que el servidor aún no dio por perdida
+            previous.writer.close()
+        hold = self.reserved.pop(seat, None)
+        if hold is not None:
+            hold.cancel()
+        if self.engine.current_player == seat:
+            self.cancel_ai()  # La IA estaba decidiendo por él: ahora elige el jugador
+        self.seats[seat] = connection
+        connection.match = self
+        connection.seat = seat
+        connection.send(self.missed(seat, seq) + proto.encode_resumed(self.log.seq))
+
+    def missed(self, seat: int, seq: int) -> bytes:
+        """Lo que le falta a un jugador que recibió hasta el evento seq"""
+        log = self.log
+        missed = log.since(seq)
+        if missed is None:
+            missed = (proto.encode_snapshot(self.match_id, seat, log.checkpoint, log.checkpoint_seq, self.tokens[seat])
+                      + log.since(log.checkpoint_seq))
+        return missed
+
+    def watch(self, connection: Connection):
+        connection.watching = self
+        # Si no vacía su buffer, drain() espera hasta que baje de SPECTATOR_BUFFER / 4
+        connection.writer.transport.set_write_buffer_limits(SPECTATOR_BUFFER)
+        connection.send(proto.encode_snapshot(self.match_id, proto.SPECTATOR, self.engine.state))
+        if not self.spectators:
+            self._published = self.engine.state.copy()
+        self.spectators[connection] = None
+
+    def unwatch(self, connection: Connection):
+        connection.watching = None
+        self.spectators.pop(connection, None)
+        self.lagging.pop(connection, None)
+
+    def release_spectators(self):
+        """La partida terminó: los espectadores atrasados aún reciben el resumen final"""
+        for connection in self.spectators:
+            connection.watching = None
+        self.spectators.clear()
+
+    def _end_action(self):
+        # Las instantáneas se toman entre turnos: lo que falta tras ellas nunca deja una tirada a medias
+        if not self.awaiting_move:
+            self.log.take_checkpoint(self.engine.state)
+        self._publish()
+
+    def _publish(self):
+        """Envía a los espectadores las tramas de la última acción, unidas en un único bytes
+
+        Todos los envíos comparten el mismo objeto inmutable; al que tiene el buffer
+        lleno no se le añade nada más: recibirá un DELTA cuando se ponga al día.
+        """
+        if not self._outbox:
+            return
+        frame = b"".join(self._outbox)
+        self._outbox.clear()
+        started = time.perf_counter_ns()
+        since = self._published
+        lagging = self.lagging
+        writes = 0
+        for connection in self.spectators:
+            if connection in lagging:
+                continue
+            if connection.outbox:
+                connection.flush()  # Su SNAPSHOT (o lo que tenga pendiente) va antes
+            transport = connection.writer.transport
+            if transport.get_write_buffer_size() > SPECTATOR_BUFFER:
+                lagging[connection] = since
+                asyncio.ensure_future(self._catch_up(connection))
+            elif not transport.is_closing():
+                transport.write(frame)
+                writes += 1
+        self._published = self.engine.state.copy()
+        self.fanout.add(writes, time.perf_counter_ns() - started)
+
+    async def _catch_up(self, connection: Connection):
+        """Espera a que un espectador atrasado vacíe su buffer y le manda lo que se perdió"""
+        if not await drain_or_drop(connection.writer):
+            self.lagging.pop(connection, None)
+            return
+        since = self.lagging.pop(connection, None)
+        if since is not None and connection.watching in (self, None):
+            state = self.engine.state
+            connection.send(proto.encode_delta(state, proto.changed_slots(since, state)))
+            self.fanout.coalesced += 1
+
+    def _roll(self) -> List[int]:
+        seat = self.engine.current_player
+        value = self.engine.roll()
+        moves = self.engine.legal_moves()
+        self.broadcast(proto.encode_rolled(seat, value, moves))
+        if moves:
+            self.awaiting_move = True
+        elif self.engine.pass_turn() == TurnOutcome.NEXT_PLAYER:
+            self.broadcast(proto.encode_turn(self.engine.current_player))
+        return moves
+
+    def _move(self, piece: int):
+        result = self.engine.apply_move(piece)
+        self.awaiting_move = False
+        self.moves += 1
+        # Solo viajan las fichas que cambiaron: la movida y las capturadas
+        self.broadcast(proto.encode_moved(result.player, piece, result.end,
+                                          result.outcome == TurnOutcome.ROLL_AGAIN))
+        for seat, index in result.captured:
+            self.broadcast(proto.encode_captured(seat, index))
+        if result.winner is not None:
+            self.broadcast(proto.encode_game_over(result.winner))
+        elif result.outcome != TurnOutcome.ROLL_AGAIN:
+            self.broadcast(proto.encode_turn(self.engine.current_player))
+
+    def _play_ai(self):
+        """Juega los turnos de la IA hasta que le toque a un cliente (o termine la partida)
+
+        Con pool, al llegar a una elección entre varias fichas se lanza la decisión y se
+        vuelve; _think la aplica cuando llega y sigue desde ahí.
+        """
+        engine = self.engine
+        while (self.thinking is None and not engine.is_over and self.seats[engine.current_player] is None
+               and engine.current_player not in self.reserved):
+            if not self.has_players:
+                return  # Nadie mirando: la partida se descarta
+            if not self.awaiting_move:
+                moves = self._roll()
+                if not moves:
+                    continue
+            moves = engine.legal_moves()
+            if len(moves) == 1:
+                self._move(moves[0])
+            elif self.ai_pool is None:
+                self._move(self.ai_policy(engine, moves))
+            else:
+                self.thinking = asyncio.ensure_future(self._think(moves))
+
+    async def _think(self, moves: List[int]):
+        task = asyncio.current_task()
+        try:
+            piece = await self.ai_pool.decide(self.engine, moves)
+        finally:
+            if self.thinking is task:
+                self.thinking = None
+        self._move(piece)
+        self._play_ai()
+        self._end_action()
+        if self.on_ai_move is not None:
+            self.on_ai_move(self)
+
+    def cancel_ai(self):
+        """Descarta la decisión de la IA en curso (el estado sigue esperando esa jugada)"""
+        if self.thinking is not None:
+            self.thinking.cancel()
+            self.thinking = None
+
+
+class LudoServer:
+    """Acepta clientes, los agrupa en partidas y reparte sus mensajes"""
+    def __init__(self, seed: Optional[int] = None, ai_policy: str = "heuristic",
+                 reconnect_grace: float = RECONNECT_GRACE, ai_workers: int = 0):
+        self.streams = MatchStreams(seed)
+        self.reconnect_grace = reconnect_grace
+        self.ai_policy = ludo_ai.get_policy(ai_policy)
+        self.ai_pool = AIPool(ai_policy, ai_workers) if ai_workers else None
+        self.waiting: Dict[Tuple[int, int], List[Connection]] = {}
+        self.matches: Dict[int, Match] = {}
+        self._match_ids = itertools.count(1)
+        self.connections = 0
+        self.matches_finished = 0
+        self.moves = 0
+        self.fanout = FanoutStats()  # De las partidas ya terminadas
+        self.server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT):
+        self.server = await asyncio.start_server(self.handle_client, host, port, backlog=BACKLOG)
+        return self.server
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        await self.serve_connection(Connection(writer), reader)
+
+    async def serve_connection(self, connection: Connection, reader: asyncio.StreamReader,
+                               pending: List[tuple] = ()):
+        """Atiende los mensajes de un cliente hasta que se desconecte (o se ceda su socket)"""
+        self.connections += 1
+        messages = pending
+        try:
+            while True:
+                for message in messages:
+                    self.dispatch(connection, message)
+                    if connection.detached:
+                        return
+                data = await reader.read(READ_SIZE)
+                if not data:
+                    break
+                try:
+                    messages = connection.frames.feed(data)
+                except ValueError as e:
+                    connection.error(f"Mensaje no válido: {e}")
+                    break  # No se puede saber dónde empieza la siguiente trama
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            if not connection.detached:
+                self.disconnect(connection)
+                connection.flush()
+                connection.writer.close()
+
+    def dispatch(self, connection: Connection, message: tuple):
+        kind = message[0]
+        match = connection.match
+        if kind == proto.ROLL and match is not None:
+            match.roll(connection)
+            self._check_finished(match)
+        elif kind == proto.MOVE and match is not None:
+            match.move(connection, message[1])
+            self._check_finished(match)
+        elif kind == proto.JOIN:
+            if message[1] != proto.PROTOCOL_VERSION:
+                return connection.error(f"Versión del protocolo no soportada: {message[1]}")
+            self.join(connection, message[2], message[3])
+        elif kind == proto.WATCH:
+            self.watch(connection, message[1])
+        elif kind == proto.RESUME:
+            self.resume(connection, *message[1:])
+        elif kind == proto.STATS:
+            self.send_stats(connection, self.stats())
+        else:
+            connection.error(f"Mensaje inesperado: {proto.NAMES.get(kind, kind)}")
+
+    def join(self, connection: Connection, players, ai):
+        """Pone al cliente en la cola de su tipo de partida y la empieza al completarse"""
+        if connection.match is not None and not connection.match.is_over:
+            return connection.error("Ya estás en una partida")
+        if not 2 <= players <= MAX_PLAYERS or not 0 <= ai < players:
+            return connection.error("Partida no válida")
+        if connection.watching is not None:
+            connection.watching.unwatch(connection)
+        self.leave_queue(connection)  # Un JOIN nuevo sustituye al anterior: nunca en dos colas
+        queue = self.waiting.setdefault((players, ai), [])
+        queue.append(connection)
+        if len(queue) < players - ai:
+            connection.send(proto.encode_joined(players - ai - len(queue)))
+            return
+        del self.waiting[(players, ai)]
+        match_id = next(self._match_ids)
+        self.start_match(match_id, queue + [None] * ai, self.streams.spawn("match", match_id))
+
+    def leave_queue(self, connection: Connection):
+        """Saca al cliente de la cola en la que esté esperando partida"""
+        for key, queue in list(self.waiting.items()):
+            if connection in queue:
+                queue.remove(connection)
+                if not queue:
+                    del self.waiting[key]
+
+    def start_match(self, match_id: int, seats: List[Optional[Connection]], streams: MatchStreams) -> Match:
+        match = Match(match_id, seats, streams, self.ai_policy, self.ai_pool, self._check_finished)
+        self.matches[match_id] = match
+        match.start()
+        self._check_finished(match)
+        return match
+
+    def watch(self, connection: Connection, match_id: int):
+        """El cliente pasa a ser espectador de una partida en curso"""
+        match = self.matches.get(match_id)
+        if match is None:
+            return connection.error(f"Partida no encontrada: {match_id}")
+        if connection.match is not None and not connection.match.is_over:
+            return connection.error("Ya estás en una partida")
+        if connection.watching is not None:
+            connection.watching.unwatch(connection)
+        self.leave_queue(connection)
+        match.watch(connection)
+
+    def resume(self, connection: Connection, match_id: int, seat: int, token: int, seq: int):
+        """Un jugador que perdió la conexión vuelve a su asiento"""
+        match = self.matches.get(match_id)
+        if match is None:
+            return connection.error(f"Partida no encontrada: {match_id}")
+        if not 0 <= seat < len(match.seats) or match.tokens[seat] != token:
+            return connection.error("No se puede recuperar ese asiento")
+        if connection.match is not None and connection.match is not match and not connection.match.is_over:
+            return connection.error("Ya estás en una partida")
+        if connection.watching is not None:
+            connection.watching.unwatch(connection)
+        self.leave_queue(connection)
+        match.resume(connection, seat, seq)
+
+    def disconnect(self, connection: Connection):
+        self.leave_queue(connection)
+        if connection.watching is not None:
+            connection.watching.unwatch(connection)
+        if connection.match is not None:
+            match = connection.match
+            hold = None
+            if self.reconnect_grace > 0 and not match.is_over:
+                hold = asyncio.get_running_loop().call_later(self.reconnect_grace, self._release_seat,
+                                                             match, connection.seat)
+            match.leave(connection, hold)
+            self._check_finished(match)
+
+    def _release_seat(self, match: Match, seat: int):
+        match.release(seat)
+        self._check_finished(match)
+
+    def _check_finished(self, match: Match):
+        if match.match_id in self.matches and (match.is_over or not match.has_players):
+            del self.matches[match.match_id]
+            match.cancel_ai()
+            for hold in match.reserved.values():
+                hold.cancel()
+            match.reserved.clear()
+            self.matches_finished += match.is_over
+            self.moves += match.moves
+            self.fanout.merge(match.fanout)
+            for connection in match.seats:
+                if connection is not None:
+                    connection.match = None
+            if not match.is_over:
+                for connection in match.spectators:
+                    connection.error("La partida se canceló: no quedan jugadores")
+            match.release_spectators()
+
+    def send_stats(self, connection: Connection, stats: dict):
+        """Responde a STATS; si no caben en una trama el cliente recibe un error en vez de nada"""
+        try:
+            frame = proto.encode_stats(stats)
+        except ValueError as exc:
+            return connection.error(str(exc))
+        connection.send(frame)
+
+    def stats(self) -> dict:
+        """Carga del proceso (para el test de carga y la monitorización)"""
+        return {
+            "connections": self.connections,
+            "matches": len(self.matches),
+            "matches_finished": self.matches_finished,
+            "moves": self.moves + sum(match.moves for match in self.matches.values()),
+            "spectators": sum(len(match.spectators) for match in self.matches.values()),
+            **self._fanout_stats(),
+            **(self.ai_pool.stats() if self.ai_pool is not None else {}),
+            **SEND_STATS.as_dict(),
+            "cpu": time.process_time(),
+            "rss": _current_rss(),
+        }
+
+
+    def _fanout_stats(self) -> dict:
+        total = FanoutStats()
+        total.merge(self.fanout)
+        for match in self.matches.values():
+            total.merge(match.fanout)
+        return {"fanout_events": total.events, "fanout_writes": total.writes, "fanout_ns": total.ns,
+                "coalesced": total.coalesced}
+
+
+def _current_rss() -> int:
+    """Memoria residente actual en bytes (o la máxima si no hay /proc)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+async def serve(host: str = "127.0.0.1", port: int = DEFAULT_PORT, seed: Optional[int] = None,
+                ai_policy: str = "heuristic", reconnect_grace: float = RECONNECT_GRACE, ai_workers: int = 0):
+    server = LudoServer(seed, ai_policy, reconnect_grace, ai_workers)
+    await server.start(host, port)
+    if server.ai_pool is not None:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, exit_with_pool, server.ai_pool)
+    try:
+        async with server.server:
+            await server.server.serve_forever()
+    finally:
+        if server.ai_pool is not None:
+            server.ai_pool.shutdown()
+
+
+def exit_with_pool(pool: AIPool):
+    """SIGTERM (Process.terminate): sale en el acto como sin manejador, pero apagando antes el pool"""
+    pool.shutdown()
+    os._exit(0)
+
+
+def run_server(host: str = "127.0.0.1", port: int = DEFAULT_PORT, seed: Optional[int] = None,
+               ai_policy: str = "heuristic", reconnect_grace: float = RECONNECT_GRACE, ai_workers: int = 0):
+    """Punto de entrada bloqueante (también para lanzarlo en otro proceso)"""
+    try:
+        asyncio.run(serve(host, port, seed, ai_policy, reconnect_grace, ai_workers))
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor de partidas de Ludo en red")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--ai-policy", default="heuristic", help="IA de los asientos sin cliente")
+    parser.add_argument("--reconnect-grace", type=float, default=RECONNECT_GRACE,
+                        help="segundos que se guarda el asiento de un jugador desconectado (0 = la IA lo ocupa ya)")
+    parser.add_argument("--ai-workers", type=int, default=0,
+                        help="procesos para las decisiones de la IA (0 = en el bucle del servidor)")
+    args = parser.parse_args()
+    print(f"Servidor en {args.host}:{args.port}")
+    run_server(args.host, args.port, args.seed, args.ai_policy, args.reconnect_grace, args.ai_workers)
+
+
+if __name__ == "__main__":
+    main()
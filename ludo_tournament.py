@@ -0,0 +1,203 @@
+import argparse
+import itertools
+import math
+import multiprocessing
+import os
+import time
+from typing import List, Dict, Tuple, NamedTuple
+
+from ludo_engine import COLORS, LudoEngine
+from ludo_rng import MatchStreams
+import ludo_ai
+
+# Torneo entre políticas de IA repartido en un pool de procesos.
+# Cada partida rota los asientos y los colores para compensar la ventaja
+# del primer turno y de la casilla de salida.
+
+MAX_ROLLS_PER_MATCH = 100000
+
+
+class MatchSpec(NamedTuple):
+    """Alineación de una partida: política por asiento y rotación de colores"""
+    lineup: Tuple[str, ...]
+    color_shift: int
+    seed: int                 # Semilla de los flujos de la partida (dados e IA)
+
+
+class PolicyStats:
+    """Estadísticas acumuladas de una política"""
+    def __init__(self):
+        self.seats = 0            # Asientos ocupados (una partida puede tener varios)
+        self.wins = 0
+        self.decisions = 0
+        self.decision_ns = 0
+        self.max_decision_ns = 0
+        self.cache_hits = 0       # Tabla de transposición (solo políticas que la usan)
+        self.cache_misses = 0
+
+    def merge(self, other: "PolicyStats"):
+        self.seats += other.seats
+        self.wins += other.wins
+        self.decisions += other.decisions
+        self.decision_ns += other.decision_ns
+        self.max_decision_ns = max(self.max_decision_ns, other.max_decision_ns)
+        self.cache_hits += other.cache_hits
+        self.cache_misses += other.cache_misses
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.seats if self.seats else 0.0
+
+    @property
+    def cache_hit_rate(self) -> float:
+        lookups = self.cache_hits + self.cache_misses
+        return self.cache_hits / lookups if lookups else 0.0
+
+    @property
+    def mean_decision_us(self) -> float:
+        return self.decision_ns / self.decisions / 1000 if self.decisions else 0.0
+
+
+def wilson_interval(successes: int, trials: int, z: float = 1.96) -> Tuple[float, float]:
+    """Intervalo de confianza de Wilson para una proporción"""
+    if trials == 0:
+        return 0.0, 0.0
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    center = (p + z * z / (2 * trials)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return center - margin, center + margin
+
+
+def build_schedule(policies: List[str], num_players: int, num_games: int, seed: int) -> List[MatchSpec]:
+    """Reparte las partidas entre todas las permutaciones de asientos y rotaciones de color"""
+    base = [policies[i % len(policies)] for i in range(num_players)]
+    lineups = sorted(set(itertools.permutations(base)))
+    rotations = [(lineup, shift) for lineup in lineups for shift in range(len(COLORS))]
+    # Cada partida deriva sus flujos de la semilla del torneo y de su número, así el
+    # resultado no depende de cómo se repartan las partidas entre los procesos
+    streams = MatchStreams(seed)
+    return [MatchSpec(*rotations[i % len(rotations)], streams.spawn("match", i).seed) for i in range(num_games)]
+
+
+def play_match(spec: MatchSpec) -> Tuple[int, Dict[str, PolicyStats]]:
+    """Juega una partida completa; devuelve el asiento ganador y las estadísticas por política"""
+    num_players = len(spec.lineup)
+    colors = [COLORS[(seat + spec.color_shift) % len(COLORS)] for seat in range(num_players)]
+    streams = MatchStreams(spec.seed)
+    engine = LudoEngine(colors, streams.ai(), dice=streams.dice())
+    choosers = [ludo_ai.get_policy(name) for name in spec.lineup]
+    stats = {name: PolicyStats() for name in spec.lineup}
+    for name in spec.lineup:
+        stats[name].seats += 1
+    tables = {name: chooser.table for name, chooser in zip(spec.lineup, choosers)
+              if getattr(chooser, "table", None) is not None}
+    cache_before = {name: (table.hits, table.misses) for name, table in tables.items()}
+
+    clock = time.perf_counter_ns
+    for _ in range(MAX_ROLLS_PER_MATCH):
+        if engine.is_over:
+            break
+        engine.roll()
+        moves = engine.legal_moves()
+        if not moves:
+            engine.pass_turn()
+            continue
+        name = spec.lineup[engine.current_player]
+        # Solo se mide la latencia cuando hay algo que decidir
+        if len(moves) == 1:
+            piece = moves[0]
+        else:
+            started = clock()
+            piece = choosers[engine.current_player](engine, moves)
+            elapsed = clock() - started
+            policy_stats = stats[name]
+            policy_stats.decisions += 1
+            policy_stats.decision_ns += elapsed
+            if elapsed > policy_stats.max_decision_ns:
+                policy_stats.max_decision_ns = elapsed
+        engine.apply_move(piece)
+
+    for name, table in tables.items():
+        hits, misses = cache_before[name]
+        stats[name].cache_hits = table.hits - hits
+        stats[name].cache_misses = table.misses - misses
+
+    winner = engine.winner if engine.winner is not None else -1
+    if winner >= 0:
+        stats[spec.lineup[winner]].wins += 1
+    return winner, stats
+
+
+def play_chunk(specs: List[MatchSpec]) -> Tuple[int, Dict[str, PolicyStats]]:
+    """Juega un bloque de partidas en un proceso del pool y agrega sus resultados"""
+    totals: Dict[str, PolicyStats] = {}
+    unfinished = 0
+    for spec in specs:
+        winner, stats = play_match(spec)
+        unfinished += winner < 0
+        for name, policy_stats in stats.items():
+            totals.setdefault(name, PolicyStats()).merge(policy_stats)
+    return unfinished, totals
+
+
+def run_tournament(policies: List[str], num_players: int = 4, num_games: int = 1000,
+                   workers: int = 0, chunk_size: int = 50, seed: int = 0):
+    """Reparte el torneo entre los procesos y devuelve (estadísticas, partidas sin terminar, segundos)"""
+    for name in policies:
+        ludo_ai.get_policy(name)  # Falla pronto si la política no existe
+    schedule = build_schedule(policies, num_players, num_games, seed)
+    chunks = [schedule[i:i + chunk_size] for i in range(0, len(schedule), chunk_size)]
+    workers = workers or os.cpu_count() or 1
+
+    totals: Dict[str, PolicyStats] = {name: PolicyStats() for name in policies}
+    unfinished = 0
+    started = time.perf_counter()
+    if workers == 1:
+        results = map(play_chunk, chunks)
+        for chunk_unfinished, stats in results:
+            unfinished += chunk_unfinished
+            for name, policy_stats in stats.items():
+                totals[name].merge(policy_stats)
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            for chunk_unfinished, stats in pool.imap_unordered(play_chunk, chunks):
+                unfinished += chunk_unfinished
+                for name, policy_stats in stats.items():
+                    totals[name].merge(policy_stats)
+    return totals, unfinished, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Torneo entre políticas de IA de Ludo")
+    parser.add_argument("policies", nargs="+", help=f"políticas: {', '.join(sorted(ludo_ai.POLICIES))}")
+    parser.add_argument("--games", type=int, default=2000)
+    parser.add_argument("--players", type=int, default=4, choices=[2, 3, 4])
+    parser.add_argument("--workers", type=int, default=0, help="procesos (0 = todos los núcleos)")
+    parser.add_argument("--chunk-size", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    totals, unfinished, seconds = run_tournament(args.policies, args.players, args.games,
+                                                 args.workers, args.chunk_size, args.seed)
+    workers = args.workers or os.cpu_count() or 1
+    print(f"{args.games} partidas en {seconds:.2f} s con {workers} procesos "
+          f"({args.games / seconds:.1f} partidas/s)")
+    if unfinished:
+        print(f"Partidas sin terminar: {unfinished}")
+    print(f"{'Política':<12} {'Victorias':>10} {'IC 95%':>17} {'Decisiones':>11} {'Media µs':>9} {'Máx µs':>9}")
+    for name in args.policies:
+        stats = totals[name]
+        low, high = wilson_interval(stats.wins, stats.seats)
+        print(f"{name:<12} {stats.win_rate:>10.1%} {f'[{low:.1%}, {high:.1%}]':>17} "
+              f"{stats.decisions:>11} {stats.mean_decision_us:>9.1f} {stats.max_decision_ns / 1000:>9.1f}")
+    for name in args.policies:
+        stats = totals[name]
+        if stats.cache_hits + stats.cache_misses:
+            print(f"Tabla de transposición de {name}: {stats.cache_hits} aciertos, "
+                  f"{stats.cache_misses} fallos ({stats.cache_hit_rate:.1%})")
+    print(f"(Sin ventaja se espera {1 / args.players:.1%} por asiento)")
+
+
+if __name__ == "__main__":
+    main()